@@ -1,10 +1,42 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import time
 
 from api.movie_api import MovieAPI
 from services.jwt_service import jwt_required
-from api.utils import get_query_params, extract_query_params
+from api.utils import get_query_params, extract_query_params, parse_id_list
 from api.api_auth import handle_login
+from database.database import seed_status, SEED_READY
+from services.metrics_service import (
+    REGISTRY, HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+)
+from services.trace_service import (
+    start_trace, finish_trace, current_trace, span
+)
+
+
+def route_label(path):
+    """
+    Map a request path to a bounded route template for metrics labels, so
+    that e.g. every '/movies/<id>' request is counted under one series.
+    """
+    parts = path.split('?', 1)[0].strip('/').split('/')
+    if parts[0] == 'movies':
+        if len(parts) == 1:
+            return '/movies'
+        if len(parts) == 2:
+            if parts[1] in ['batch', 'facets']:
+                return '/movies/' + parts[1]
+            return '/movies/{movie_id}'
+    elif len(parts) == 1 and parts[0] in ['login', 'register', 'metrics',
+                                          'healthz', 'readyz']:
+        return '/' + parts[0]
+    return 'other'
+
+
+# Shared encoder: compact separators and no ASCII escaping keep responses
+# small and avoid re-creating an encoder for every response.
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
 
 
 class MovieRequestHandler(BaseHTTPRequestHandler):
@@ -12,13 +44,81 @@ class MovieRequestHandler(BaseHTTPRequestHandler):
 
     def __init__(self, *args, **kwargs):
         self.api = MovieAPI()
+        self._status_code = None
         super().__init__(*args, **kwargs)
 
+    def handle_one_request(self):
+        """Handle a single request, recording its latency and status."""
+        self._status_code = None
+        self.command = None
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        self._request_start = time.perf_counter()
+        try:
+            super().handle_one_request()
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            if self.command:
+                finish_trace(self.command, self.path, self._status_code,
+                             self._request_start)
+            if self.command and self._status_code is not None:
+                labels = (
+                    self.command, route_label(self.path), self._status_code
+                )
+                HTTP_REQUEST_DURATION.labels(*labels).observe(
+                    time.perf_counter() - self._request_start
+                )
+                HTTP_REQUESTS.labels(*labels).inc()
+
+    def parse_request(self):
+        """Parse the request and start its trace when one is requested."""
+        parsed = super().parse_request()
+        if parsed:
+            trace = start_trace(self.command, self.path, self.headers,
+                                self._request_start)
+            if trace is not None:
+                trace.add('parse_request', self._request_start,
+                          time.perf_counter() - self._request_start)
+        return parsed
+
+    def send_response(self, code, message=None):
+        self._status_code = int(code)
+        super().send_response(code, message)
+
+    def end_headers(self):
+        trace = current_trace()
+        if trace is not None:
+            self.send_header('X-Trace-Id', trace.trace_id)
+        super().end_headers()
+
     def do_GET(self):
         path_parts = self.path.strip('/').split('?')
         resource_path = path_parts[0]
 
-        if resource_path.startswith('movies/') and len(resource_path.split(
+        if resource_path == 'metrics':
+            self.send_text_response(
+                REGISTRY.render(), 'text/plain; version=0.0.4'
+            )
+
+        elif resource_path == 'healthz':
+            self.send_http_response({'status': 'ok'}, 200)
+
+        elif resource_path == 'readyz':
+            state = seed_status()
+            response = {'status': state['status']}
+            if state['error']:
+                response['error'] = state['error']
+            self.send_http_response(
+                response, 200 if state['status'] == SEED_READY else 503
+            )
+
+        elif resource_path == 'movies/facets':
+            query_params = get_query_params(
+                path_parts[1] if len(path_parts) > 1 else ''
+            )
+            response, status_code = self.api.get_facets(filters=query_params)
+            self.send_http_response(response, status_code)
+
+        elif resource_path.startswith('movies/') and len(resource_path.split(
             '/')) == 2:
             movie_id = path_parts[0].split('/')[1]
             if not movie_id.isdigit():
@@ -29,10 +129,30 @@ class MovieRequestHandler(BaseHTTPRequestHandler):
             self.send_http_response(response, status_code)
 
         elif path_parts[0] == 'movies':
-            query_params = get_query_params(
-                path_parts[1] if len(path_parts) > 1 else ''
-            )
-            limit, page, order_by, filters = extract_query_params(query_params)
+            with span('routing'):
+                query_params = get_query_params(
+                    path_parts[1] if len(path_parts) > 1 else ''
+                )
+
+            if 'ids' in query_params or 'imdb_ids' in query_params:
+                ids = query_params.get('ids')
+                imdb_ids = query_params.get('imdb_ids')
+                response, status_code = self.api.get_movies_batch(
+                    ids=parse_id_list(ids) if ids is not None else None,
+                    imdb_ids=parse_id_list(imdb_ids)
+                    if imdb_ids is not None else None
+                )
+                self.send_http_response(response, status_code)
+                return
+
+            try:
+                with span('routing'):
+                    limit, page, order_by, filters = extract_query_params(
+                        query_params
+                    )
+            except ValueError as e:
+                self.send_http_response({'error': str(e)}, 400)
+                return
 
             response, status_code = self.api.get_movies(
                 limit=limit,
@@ -69,6 +189,18 @@ class MovieRequestHandler(BaseHTTPRequestHandler):
 
         if path_parts[0] in ['register', 'login']:
             handle_login(self)
+        elif path_parts[0] == 'movies/batch':
+            content_length = int(self.headers['Content-Length'])
+            data = json.loads(self.rfile.read(content_length))
+
+            if not isinstance(data, dict):
+                self.send_error(400, 'Request body must be a JSON object')
+                return
+
+            response, status_code = self.api.get_movies_batch(
+                ids=data.get('ids'), imdb_ids=data.get('imdb_ids')
+            )
+            self.send_http_response(response, status_code)
         elif path_parts[0] == 'movies':
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
@@ -86,10 +218,20 @@ class MovieRequestHandler(BaseHTTPRequestHandler):
 
     def send_http_response(self, response, status_code):
         """Send HTTP response with the specified response and status code."""
+        with span('serialize'):
+            body = _json_encoder.encode(response).encode('utf-8')
         self.send_response(status_code)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text_response(self, body, content_type='text/plain'):
+        """Send a plain-text HTTP 200 response."""
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
         self.end_headers()
-        self.wfile.write(bytes(json.dumps(response), 'utf-8'))
+        self.wfile.write(body.encode('utf-8'))
 
     def send_yaml_response(self, filename):
         """Send the OpenAPI YAML specification."""
@@ -0,0 +1,162 @@
+"""
+Filter grammar for the GET /movies endpoint.
+
+Query parameters are parsed into (field, operator, value) filters and then
+compiled into SQL conditions that can use the column indexes:
+
+    year=2001            equality           year_start = 2001
+    year=2001..2010      inclusive range    year_start BETWEEN 2001 AND 2010
+    year=2001..          open range         year_start >= 2001
+    movie_type=a,b       any of             movie_type IN ('a', 'b')
+    title_prefix=Sev     prefix             title >= 'Sev' AND title < 'Sew'
+    title_search=dark    full-text search   every word appears in the title
+
+Prefixes are compiled into a half-open range rather than LIKE 'Sev%', so they
+are answered from an index, and match case-sensitively. The range is compared
+in a binary collation on every backend (see database.dialects.PrefixMatch).
+
+Full-text searches use the title index of the backend (see
+database.dialects.FullTextMatch) and match whole words, ignoring case.
+
+Year filters match the integer year_start column, so series such as
+'2005–2010' are matched by the year they started in. Year values that are
+not plain years, such as '2005–2010' itself, are matched against the OMDB
+year string instead.
+"""
+from database.dialects import FullTextMatch, PrefixMatch
+from database.models import Movie
+
+EQ = 'eq'
+IN = 'in'
+RANGE = 'range'
+PREFIX = 'prefix'
+SEARCH = 'search'
+
+RANGE_SEPARATOR = '..'
+LIST_SEPARATOR = ','
+# Operators selected by a suffix of the parameter name, e.g. title_prefix.
+SUFFIX_OPERATORS = {'_prefix': PREFIX, '_search': SEARCH}
+MAX_LIST_VALUES = 100
+
+# Operators each field accepts besides equality.
+FILTERABLE_FIELDS = {
+    'title': {PREFIX, SEARCH},
+    'year': {IN, RANGE},
+    'movie_type': {IN},
+    'imdb_id': {IN, PREFIX}
+}
+
+
+class FilterError(ValueError):
+    """Raised when a filter parameter cannot be parsed."""
+
+
+def _check_year(field, value):
+    if field == 'year' and not (value.isdigit() and len(value) == 4):
+        raise FilterError(
+            f"Invalid year '{value}': must be a four digit number."
+        )
+    return value
+
+
+def parse_filter(key, value):
+    """
+    Parse a single query parameter into a (field, operator, value) filter.
+
+    Raises:
+        FilterError: If the field is unknown or the value is malformed.
+    """
+    for suffix, operator in SUFFIX_OPERATORS.items():
+        if key.endswith(suffix):
+            field = key[:-len(suffix)]
+            if operator not in FILTERABLE_FIELDS.get(field, ()):
+                raise FilterError(f"Unknown filter '{key}'.")
+            if not value.strip():
+                raise FilterError(f"Filter '{key}' must not be empty.")
+            return field, operator, value
+
+    if key not in FILTERABLE_FIELDS:
+        raise FilterError(f"Unknown filter '{key}'.")
+    operators = FILTERABLE_FIELDS[key]
+
+    if RANGE in operators and RANGE_SEPARATOR in value:
+        low, _, high = value.partition(RANGE_SEPARATOR)
+        low, high = low.strip() or None, high.strip() or None
+        if low is None and high is None:
+            raise FilterError(
+                f"Range filter '{key}' needs at least one bound."
+            )
+        low = _check_year(key, low) if low is not None else None
+        high = _check_year(key, high) if high is not None else None
+        if low is not None and high is not None and low > high:
+            raise FilterError(f"Range filter '{key}' has low > high.")
+        return key, RANGE, (low, high)
+
+    if IN in operators and LIST_SEPARATOR in value:
+        values = list(dict.fromkeys(
+            item.strip() for item in value.split(LIST_SEPARATOR)
+            if item.strip()
+        ))
+        if not values:
+            raise FilterError(f"Filter '{key}' must not be empty.")
+        if len(values) > MAX_LIST_VALUES:
+            raise FilterError(
+                f"Filter '{key}' accepts at most {MAX_LIST_VALUES} values."
+            )
+        return key, IN, values
+
+    return key, EQ, value
+
+
+def parse_filters(params):
+    """Parse a dict of query parameters into a list of filters."""
+    return [parse_filter(key, value) for key, value in params.items()]
+
+
+def _year_filter(operator, value):
+    """Move year filters on plain years to the integer year_start column."""
+    if operator == RANGE:
+        low, high = value
+        return 'year_start', (
+            int(low) if low is not None else None,
+            int(high) if high is not None else None
+        )
+    values = value if operator == IN else [value]
+    if all(item.isdigit() for item in values):
+        numbers = [int(item) for item in values]
+        return 'year_start', numbers if operator == IN else numbers[0]
+    return 'year', value
+
+
+def compile_filter(field, operator, value, model=Movie):
+    """Compile a parsed filter into a list of SQL conditions."""
+    if field == 'year':
+        field, value = _year_filter(operator, value)
+    column = getattr(model, field)
+    if operator == EQ:
+        return [column == value]
+    if operator == IN:
+        return [column.in_(value)]
+    if operator == RANGE:
+        low, high = value
+        if low is not None and high is not None:
+            return [column.between(low, high)]
+        return [column >= low] if low is not None else [column <= high]
+    if operator == PREFIX:
+        return [PrefixMatch(column, value)]
+    if operator == SEARCH:
+        return [FullTextMatch(column, value)]
+    raise FilterError(f"Unknown filter operator '{operator}'.")
+
+
+def compile_filters(params, model=Movie):
+    """
+    Parse query parameters and compile them into SQL conditions.
+
+    Raises:
+        FilterError: If any parameter is invalid.
+    """
+    conditions = []
+    for field, operator, value in parse_filters(params):
+        conditions.extend(compile_filter(field, operator, value, model))
+    return conditions
@@ -1,30 +1,137 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+
 import sqlalchemy.exc
+from sqlalchemy import func
 
-from database.models import Movie
+from api.filters import compile_filters, FilterError
+from database.models import (
+    Movie, MovieDetails, MovieRating, MOVIE_COLUMNS, DETAIL_COLUMNS,
+    movie_row_to_dict, details_to_dict, omdb_details_row, omdb_rating_rows
+)
 from database.database import DatabaseSession
-from services.omdb_service import OMDBService
+from services.config_service import CONFIG
+from services.deferred_queue import DeferredQueue
+from services.omdb_service import (
+    OMDBService, OMDBUnavailableError, OMDB_BREAKER
+)
+from services.metrics_service import observe_operation, OMDB_DEFERRED_ADDS
+from services.cache_service import MOVIE_CACHE, FACETS_CACHE, MISSING
+
+BATCH_LOOKUP_MAX = CONFIG.BATCH_LOOKUP_MAX
+DEFERRED_ADD_MAX = CONFIG.DEFERRED_ADD_MAX
+CONFIG.bind(globals(), 'BATCH_LOOKUP_MAX', 'DEFERRED_ADD_MAX')
+
+# Sort keys for order_by; years sort numerically by the year they started.
+ORDER_BY_COLUMNS = {
+    'title': (Movie.title,),
+    'year': (Movie.year_start, Movie.year),
+    'movie_type': (Movie.movie_type,)
+}
+
+
+def _load_movies(session, condition):
+    """
+    Select the movies matching a condition together with their OMDB
+    details, which are None until the movie has been enriched.
+    """
+    rows = (
+        session.query(*MOVIE_COLUMNS, MovieDetails.movie_id, *DETAIL_COLUMNS)
+        .outerjoin(MovieDetails, MovieDetails.movie_id == Movie.id)
+        .filter(condition)
+        .all()
+    )
+    split = len(MOVIE_COLUMNS)
+    enriched = [row.id for row in rows if row[split] is not None]
+    ratings = defaultdict(list)
+    if enriched:
+        for movie_id, source, value in (
+            session.query(MovieRating.movie_id, MovieRating.source,
+                          MovieRating.value)
+            .filter(MovieRating.movie_id.in_(enriched))
+            .order_by(MovieRating.movie_id, MovieRating.source)
+        ):
+            ratings[movie_id].append((source, value))
+
+    movies = []
+    for row in rows:
+        movie = movie_row_to_dict(row[:split])
+        movie['details'] = (
+            details_to_dict(row[split + 1:], ratings[movie['id']])
+            if row[split] is not None else None
+        )
+        movies.append(movie)
+    return movies
+
+
+def _add_movie(title):
+    """Look a movie up in OMDB by title and store it with its details."""
+    movie_data = OMDBService().fetch_movie_by_title(title)
+    if not movie_data:
+        return {"error": f"Movie '{title}' not found in OMDB."}, 404
+
+    enriched_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    movie = Movie(
+        title=movie_data['Title'],
+        year=movie_data['Year'],
+        imdb_id=movie_data['imdbID'],
+        poster=movie_data['Poster'],
+        movie_type=movie_data['Type'],
+        details=MovieDetails(**omdb_details_row(
+            None, movie_data, enriched_at
+        )),
+        ratings=[
+            MovieRating(**row) for row in omdb_rating_rows(None, movie_data)
+        ]
+    )
+
+    with DatabaseSession() as session:
+        try:
+            DatabaseSession().add_element(session, movie)
+            return {
+                "message": f"Movie '{title}' added successfully.",
+                "movie": movie.to_dict()
+            }, 201
+        except sqlalchemy.exc.IntegrityError:
+            return {"error": f"The movie '{title}' is already "
+                             f"registered in the database."}, 409
+
+
+# Additions that failed because OMDB was unavailable, retried in the
+# background once its circuit breaker lets calls through again.
+DEFERRED_ADDS = DeferredQueue(
+    'deferred-adds', _add_movie, OMDB_BREAKER, (OMDBUnavailableError,),
+    maxsize=DEFERRED_ADD_MAX, gauge=OMDB_DEFERRED_ADDS
+)
+
+
+@CONFIG.subscribe
+def _apply_config(config, changed):
+    DEFERRED_ADDS.maxsize = config.DEFERRED_ADD_MAX
 
 
 class MovieAPI:
     """API class for managing movie operations."""
 
     @staticmethod
+    @observe_operation('get_movies')
     def get_movies(limit=10, page=1, filters=None, order_by='title'):
         """Retrieve a list of movies from the database with pagination,
-        filtering, and ordering. """
-        with DatabaseSession() as session:
-            offset = (page - 1) * limit
-            query = session.query(Movie)
+        filtering, and ordering. Filters follow the grammar in api.filters;
+        invalid filters are answered with 400. """
+        try:
+            conditions = compile_filters(filters or {})
+        except FilterError as e:
+            return {"error": str(e)}, 400
 
-            if filters:
-                for key, value in filters.items():
-                    if hasattr(Movie, key):
-                        query = query.filter(getattr(Movie, key) == value)
+        with DatabaseSession(read_only=True) as session:
+            offset = (page - 1) * limit
+            query = session.query(*MOVIE_COLUMNS).filter(*conditions)
 
-            if order_by in ['title', 'year', 'movie_type']:
-                query = query.order_by(getattr(Movie, order_by))
+            if order_by in ORDER_BY_COLUMNS:
+                query = query.order_by(*ORDER_BY_COLUMNS[order_by])
 
-            movies = query.limit(limit).offset(offset).all()
+            rows = query.limit(limit).offset(offset).all()
             total_count = query.count()
 
             response = {
@@ -34,7 +141,7 @@ class MovieAPI:
                     "next_page": page + 1 if (offset + limit) < total_count
                     else None,
                     "prev_page": page - 1 if page > 1 else None,
-                    "movies": [movie.to_dict() for movie in movies]
+                    "movies": [movie_row_to_dict(row) for row in rows]
                 },
                 "message": "Movies retrieved successfully."
             }
@@ -42,44 +149,161 @@ class MovieAPI:
             return response, 200
 
     @staticmethod
+    @observe_operation('get_movie_by_id')
     def get_movie_by_id(movie_id):
-        """Retrieve a single movie by its ID."""
-        with DatabaseSession() as session:
-            movie = session.query(Movie).filter(Movie.id == movie_id).first()
+        """Retrieve a single movie by its ID, with its OMDB details."""
+        movie_id = int(movie_id)
+        movie = MOVIE_CACHE.get(movie_id)
+        if movie is not MISSING:
+            return movie, 200
 
-            if movie:
-                return movie.to_dict(), 200
-            else:
-                return {'error': 'Movie not found'}, 404
+        with DatabaseSession(read_only=True) as session:
+            movies = _load_movies(session, Movie.id == movie_id)
+
+        if movies:
+            movie, = movies
+            MOVIE_CACHE.set(movie_id, movie)
+            return movie, 200
+        else:
+            return {'error': 'Movie not found'}, 404
+
+    @staticmethod
+    @observe_operation('get_movies_batch')
+    def get_movies_batch(ids=None, imdb_ids=None):
+        """
+        Retrieve many movies by ID or IMDb ID with a single query.
+
+        Movies are returned in request order; keys that do not match a movie
+        are returned as null and listed under 'missing'. Movies already in
+        the movie cache are served from it.
+        """
+        if (ids is None) == (imdb_ids is None):
+            return {"error": "Provide either 'ids' or 'imdb_ids'."}, 400
+
+        keys = ids if ids is not None else imdb_ids
+        if not isinstance(keys, list) or not keys:
+            return {"error": "The list of ids must not be empty."}, 400
+        if len(keys) > BATCH_LOOKUP_MAX:
+            return {"error": f"At most {BATCH_LOOKUP_MAX} movies can be "
+                             f"requested at once."}, 400
+
+        if ids is not None:
+            try:
+                keys = [int(key) for key in keys]
+            except (TypeError, ValueError):
+                return {"error": "Invalid movie ID: must be a number"}, 400
+            found = MOVIE_CACHE.get_many(set(keys))
+            column = Movie.id
+        else:
+            keys = [str(key) for key in keys]
+            found = {}
+            column = Movie.imdb_id
+
+        pending = {key for key in keys if key not in found}
+        if pending:
+            with DatabaseSession(read_only=True) as session:
+                rows = _load_movies(session, column.in_(pending))
+            for movie in rows:
+                MOVIE_CACHE.set(movie['id'], movie)
+                found[movie['id'] if ids is not None else
+                      movie['imdb_id']] = movie
+
+        movies = [found.get(key) for key in keys]
+        missing = [key for key, movie in zip(keys, movies) if movie is None]
+
+        return {
+            "status": "success",
+            "data": {
+                "movies": movies,
+                "missing": missing
+            },
+            "message": "Movies retrieved successfully."
+        }, 200
 
     @staticmethod
+    @observe_operation('get_facets')
+    def get_facets(filters=None):
+        """
+        Count movies by decade and by type, optionally within filters.
+
+        Each facet is a single grouped query over an indexed column. Results
+        are cached per set of filters until the next write to the catalog.
+        """
+        key = tuple(sorted((filters or {}).items()))
+        facets = FACETS_CACHE.get(key)
+        if facets is not MISSING:
+            return facets, 200
+
+        try:
+            conditions = compile_filters(filters or {})
+        except FilterError as e:
+            return {"error": str(e)}, 400
+
+        decade = (Movie.year_start // 10 * 10).label('decade')
+        with DatabaseSession(read_only=True) as session:
+            total_count = (
+                session.query(func.count(Movie.id))
+                .filter(*conditions)
+                .scalar()
+            )
+            decades = (
+                session.query(decade, func.count(Movie.id))
+                .filter(*conditions)
+                .group_by(decade)
+                .order_by(decade)
+                .all()
+            )
+            movie_types = (
+                session.query(Movie.movie_type, func.count(Movie.id))
+                .filter(*conditions)
+                .group_by(Movie.movie_type)
+                .order_by(Movie.movie_type)
+                .all()
+            )
+
+        facets = {
+            "status": "success",
+            "data": {
+                "total_count": total_count,
+                "decades": [
+                    {"decade": value, "count": count}
+                    for value, count in decades
+                ],
+                "movie_types": [
+                    {"movie_type": value, "count": count}
+                    for value, count in movie_types
+                ]
+            },
+            "message": "Facets retrieved successfully."
+        }
+        FACETS_CACHE.set(key, facets)
+        return facets, 200
+
+    @staticmethod
+    @observe_operation('add_movie')
     def add_movie(title):
-        """Adds a movie to the database using the provided title."""
-        with DatabaseSession() as session:
-            movie_data = OMDBService().fetch_movie_by_title(title)
-
-            if movie_data:
-                movie = Movie(
-                    title=movie_data['Title'],
-                    year=movie_data['Year'],
-                    imdb_id=movie_data['imdbID'],
-                    poster=movie_data['Poster'],
-                    movie_type=movie_data['Type']
-                )
-
-                try:
-                    DatabaseSession().add_element(session, movie)
-                    return {
-                        "message": f"Movie '{title}' added successfully.",
-                        "movie": movie.to_dict()
-                    }, 201
-                except sqlalchemy.exc.IntegrityError:
-                    return {"error": f"The movie '{title}' is already "
-                                     f"registered in the database."}, 409
-            else:
-                return {"error": f"Movie '{title}' not found in OMDB."}, 404
+        """
+        Adds a movie to the database using the provided title. The OMDB
+        lookup by title carries the movie details, so they are stored with
+        the movie and it needs no enrichment.
+
+        While OMDB is unavailable the lookup is deferred and retried in the
+        background, and the request is answered with 202.
+        """
+        try:
+            return _add_movie(title)
+        except OMDBUnavailableError:
+            if not DEFERRED_ADDS.add(title):
+                return {"error": "OMDB is unavailable, try again "
+                                 "later."}, 503
+            return {
+                "status": "deferred",
+                "message": f"OMDB is unavailable; the movie '{title}' will "
+                           f"be added once it is back."
+            }, 202
 
     @staticmethod
+    @observe_operation('remove_movie')
     def remove_movie(movie_id):
         """Remove a movie from the database by its ID."""
         with DatabaseSession() as session:
@@ -87,6 +311,7 @@ class MovieAPI:
 
             if movie:
                 DatabaseSession().delete_element(session, movie)
+                MOVIE_CACHE.invalidate(int(movie_id))
                 return {'message': 'Movie removed successfully'}, 200
             else:
                 return {'error': 'Movie not found'}, 404
\ No newline at end of file
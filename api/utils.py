@@ -1,27 +1,56 @@
+from urllib.parse import unquote_plus
+
+ORDER_BY_FIELDS = ['title', 'year', 'movie_type']
+
+
 def get_query_params(query_string):
     if not query_string:
         return {}
     return {
-        key: value
+        unquote_plus(key): unquote_plus(value)
         for key, value in (
-            param.split('=')
+            param.split('=', 1)
             for param in query_string.split('&')
             if '=' in param
         )
     }
 
 
+def _positive_int(query_params, name, default):
+    value = query_params.get(name, default)
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name} '{value}': must be a number.")
+    if number < 1:
+        raise ValueError(f"Invalid {name} '{value}': must be at least 1.")
+    return number
+
+
 def extract_query_params(query_params):
     """
     Extract and convert limit, page, order_by,
     and filters from query parameters.
+
+    Raises:
+        ValueError: If limit, page or order_by are invalid.
     """
-    limit = int(query_params.get('limit', 10))
-    page = int(query_params.get('page', 1))
+    limit = _positive_int(query_params, 'limit', 10)
+    page = _positive_int(query_params, 'page', 1)
     order_by = query_params.get('order_by', 'title')
+    if order_by not in ORDER_BY_FIELDS:
+        raise ValueError(
+            f"Invalid order_by '{order_by}': must be one of "
+            f"{', '.join(ORDER_BY_FIELDS)}."
+        )
     filters = {
         key: value
         for key, value in query_params.items()
         if key not in ['limit', 'page', 'order_by']
     }
     return limit, page, order_by, filters
+
+
+def parse_id_list(value):
+    """Split a comma-separated list of ids, ignoring empty items."""
+    return [item.strip() for item in value.split(',') if item.strip()]
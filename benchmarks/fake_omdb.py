@@ -0,0 +1,150 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeOMDBHandler(BaseHTTPRequestHandler):
+    """
+    Answers OMDB-style lookups ('t', 'i' and 's' parameters) with synthetic
+    but deterministic movie data.
+    """
+
+    def do_GET(self):
+        omdb = self.server
+        params = {
+            key: values[0]
+            for key, values in parse_qs(urlparse(self.path).query).items()
+        }
+
+        with omdb.lock:
+            omdb.request_count += 1
+            fail = omdb.random.random() < omdb.error_rate
+            latency = omdb.latency_ms
+            if omdb.latency_jitter_ms:
+                latency += omdb.random.uniform(0, omdb.latency_jitter_ms)
+
+        if latency:
+            time.sleep(latency / 1000)
+
+        if fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        if 's' in params:
+            body = omdb.search(params['s'], int(params.get('page', 1)))
+        elif 'i' in params:
+            body = omdb.movie(params['i'], params['i'])
+        elif 't' in params:
+            body = omdb.movie(params['t'], omdb.imdb_id_for(params['t']))
+        else:
+            body = {'Response': 'False', 'Error': 'Incorrect IMDb ID.'}
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOMDBServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the OMDB API with injectable latency and errors.
+
+    Args:
+        latency_ms (float): Fixed latency added to every response.
+        latency_jitter_ms (float): Extra random latency up to this value.
+        error_rate (float): Fraction of requests answered with HTTP 503.
+        search_results (int): Total results reported for every search.
+        seed (int): Seed for the latency jitter and error injection.
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, latency_ms=0, latency_jitter_ms=0,
+                 error_rate=0.0, search_results=100, seed=0):
+        super().__init__(('localhost', port), FakeOMDBHandler)
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.search_results = search_results
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://localhost:{self.server_address[1]}/'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @staticmethod
+    def imdb_id_for(title):
+        """Derive a stable, unique-per-title IMDb id."""
+        digest = hashlib.md5(title.encode('utf-8')).hexdigest()
+        return 'tt' + str(int(digest[:12], 16) % 10 ** 12).zfill(12)
+
+    @staticmethod
+    def movie(title, imdb_id):
+        return {
+            'Title': title,
+            'Year': str(1950 + int(imdb_id[-4:], 36) % 75),
+            'Rated': 'PG-13',
+            'Runtime': '120 min',
+            'Genre': 'Drama',
+            'Director': 'Jane Doe',
+            'Plot': f'A synthetic movie called {title}.',
+            'imdbID': imdb_id,
+            'Type': 'movie',
+            'Poster': f'https://img.example/{imdb_id}.jpg',
+            'Ratings': [
+                {'Source': 'Internet Movie Database', 'Value': '7.1/10'}
+            ],
+            'imdbRating': '7.1',
+            'Response': 'True'
+        }
+
+    def search(self, title, page):
+        start = (page - 1) * 10
+        if start >= self.search_results:
+            return {'Response': 'False', 'Error': 'Movie not found!'}
+        count = min(10, self.search_results - start)
+        movies = [
+            {
+                'Title': f'{title} {start + i + 1}',
+                'Year': str(1950 + (start + i) % 75),
+                'imdbID': self.imdb_id_for(f'{title} {start + i + 1}'),
+                'Type': 'series' if (start + i) % 5 == 0 else 'movie',
+                'Poster': 'N/A'
+            }
+            for i in range(count)
+        ]
+        return {
+            'Search': movies,
+            'totalResults': str(self.search_results),
+            'Response': 'True'
+        }
@@ -0,0 +1,108 @@
+"""
+Compare per-row commits with group commit for concurrent inserts.
+
+Each mode inserts the same movies from a pool of threads into a fresh
+SQLite file: the per-row mode commits every insert in its own session, as
+DatabaseSession.add_element does by default, and the grouped mode hands the
+inserts to a GroupCommitWriter.
+
+Example:
+    python -m benchmarks.group_commit --writes 2000 --threads 16
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.group_commit import GroupCommitWriter
+from database.models import Base, Movie
+
+
+def new_movie(i):
+    return Movie(title=f'Movie {i}', year=str(1950 + i % 75),
+                 movie_type='movie', imdb_id=f'tt{i:08d}')
+
+
+def per_row(engine, writes, threads):
+    Session = sessionmaker(bind=engine)
+
+    def insert(i):
+        session = Session()
+        try:
+            session.add(new_movie(i))
+            session.commit()
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(insert, range(writes)))
+
+
+def grouped(engine, writes, threads, max_delay_ms, max_batch):
+    writer = GroupCommitWriter(engine, max_delay_ms=max_delay_ms,
+                               max_batch=max_batch)
+
+    def insert(i):
+        writer.add(new_movie(i)).result()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(insert, range(writes)))
+    writer.close()
+
+
+def measure(mode, writes, threads, **kwargs):
+    """Return the throughput of one mode on a fresh database file."""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(directory, 'writes.db')}",
+            connect_args={'timeout': 60}
+        )
+        Base.metadata.create_all(engine)
+        start = time.perf_counter()
+        mode(engine, writes, threads, **kwargs)
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+    return {
+        'seconds': round(elapsed, 3),
+        'writes_per_second': round(writes / elapsed, 1)
+    }
+
+
+def run(writes=2000, threads=16, max_delay_ms=2.0, max_batch=100):
+    """Run the comparison and return a report dictionary."""
+    single = measure(per_row, writes, threads)
+    group = measure(grouped, writes, threads, max_delay_ms=max_delay_ms,
+                    max_batch=max_batch)
+    return {
+        'writes': writes,
+        'threads': threads,
+        'max_delay_ms': max_delay_ms,
+        'max_batch': max_batch,
+        'per_row': single,
+        'group_commit': group,
+        'speedup': round(
+            group['writes_per_second'] / single['writes_per_second'], 2
+        )
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--writes', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    parser.add_argument('--max-batch', type=int, default=100)
+    args = parser.parse_args(argv)
+    report = run(writes=args.writes, threads=args.threads,
+                 max_delay_ms=args.max_delay_ms, max_batch=args.max_batch)
+    sys.stdout.write(json.dumps(report, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
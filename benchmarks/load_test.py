@@ -0,0 +1,389 @@
+"""
+Reproducible load test for the Movie API.
+
+Seeds a SQLite database with synthetic movies, starts the API server and a
+fake OMDB server in-process, replays a weighted mix of requests at the given
+concurrency and prints (or writes) a JSON report with throughput and latency
+percentiles per operation, suitable for regression tracking.
+
+Example:
+    python -m benchmarks.load_test --movies 100000 --requests 5000 \\
+        --concurrency 16 --omdb-latency-ms 50 --output bench.json
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, func, select
+
+from benchmarks.fake_omdb import FakeOMDBServer
+from database.models import Base, Movie, parse_year_range
+
+DEFAULT_MIX = {
+    'list': 50,
+    'list_filtered': 15,
+    'deep_page': 5,
+    'detail': 20,
+    'login': 5,
+    'write': 5
+}
+
+MOVIE_TYPES = ['movie', 'series', 'episode']
+TITLE_WORDS = [
+    'Sevilla', 'Malaga', 'Andalucia', 'Night', 'Return', 'Shadow', 'River',
+    'Dawn', 'Empire', 'Garden', 'Storm', 'Silent', 'Golden', 'Last', 'City'
+]
+SEED_CHUNK_SIZE = 10000
+
+
+def seed_database(db_path, movies, seed=0):
+    """
+    Create a SQLite database with the given number of synthetic movies.
+
+    An existing database that already holds exactly that many movies is
+    reused as is, so repeated runs do not pay the seeding cost again.
+    """
+    engine = create_engine(f'sqlite:///{db_path}')
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count(Movie.id))).scalar() == movies:
+            engine.dispose()
+            return
+    with engine.begin() as conn:
+        conn.execute(Movie.__table__.delete())
+
+    rng = random.Random(seed)
+    insert = Movie.__table__.insert()
+    for start in range(0, movies, SEED_CHUNK_SIZE):
+        rows = []
+        for i in range(start, min(start + SEED_CHUNK_SIZE, movies)):
+            year = rng.randint(1950, 2024)
+            movie_type = rng.choice(MOVIE_TYPES)
+            if movie_type == 'series' and rng.random() < 0.5:
+                year = f'{year}–{min(year + rng.randint(1, 10), 2024)}'
+            year_start, year_end = parse_year_range(str(year))
+            rows.append({
+                'title': ' '.join(rng.sample(TITLE_WORDS, 2)) + f' {i}',
+                'year': str(year),
+                'year_start': year_start,
+                'year_end': year_end,
+                'movie_type': movie_type,
+                'imdb_id': f'tt{i:08d}',
+                'poster': f'https://img.example/tt{i:08d}.jpg'
+            })
+        with engine.begin() as conn:
+            conn.execute(insert, rows)
+    engine.dispose()
+
+
+class LoadGenerator:
+    """Issues a weighted mix of API requests and records their latencies."""
+
+    def __init__(self, port, movies, mix, seed=0):
+        self.port = port
+        self.movies = movies
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.seed = seed
+        self.token = None
+        self.lock = threading.Lock()
+        self.written_ids = []
+        self.samples = {name: [] for name in self.operations}
+        self.errors = {name: 0 for name in self.operations}
+
+    def request(self, method, path, body=None, headers=None):
+        conn = http.client.HTTPConnection('localhost', self.port, timeout=60)
+        try:
+            headers = dict(headers or {})
+            payload = None
+            if body is not None:
+                payload = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+            conn.request(method, path, payload, headers)
+            response = conn.getresponse()
+            data = response.read()
+            return response.status, data
+        finally:
+            conn.close()
+
+    def setup(self):
+        """Register the benchmark user and obtain a token for writes."""
+        credentials = {'username': 'benchmark', 'password': 'benchmark'}
+        self.request('POST', '/register', credentials)
+        status, data = self.request('POST', '/login', credentials)
+        if status != 200:
+            raise RuntimeError(f'Benchmark login failed with status {status}')
+        self.token = json.loads(data)['token']
+
+    def run_one(self, rng):
+        """Run one randomly chosen operation, returning its name and status."""
+        name = rng.choices(self.operations, self.weights)[0]
+        start = time.perf_counter()
+        status = getattr(self, f'op_{name}')(rng)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples[name].append(elapsed)
+            if status >= 500 or status in [400, 401]:
+                self.errors[name] += 1
+        return name, status
+
+    def op_list(self, rng):
+        limit = rng.choice([10, 10, 10, 50, 100])
+        order_by = rng.choice(['title', 'year', 'movie_type'])
+        page = rng.randint(1, 5)
+        return self.request(
+            'GET', f'/movies?limit={limit}&page={page}&order_by={order_by}'
+        )[0]
+
+    def op_list_filtered(self, rng):
+        if rng.random() < 0.5:
+            query = f'movie_type={rng.choice(MOVIE_TYPES)}'
+        else:
+            query = f'year={rng.randint(1950, 2024)}'
+        return self.request('GET', f'/movies?{query}&limit=20')[0]
+
+    def op_deep_page(self, rng):
+        last_page = max(self.movies // 10, 1)
+        page = rng.randint(max(last_page - 100, 1), last_page)
+        return self.request('GET', f'/movies?limit=10&page={page}')[0]
+
+    def op_detail(self, rng):
+        movie_id = rng.randint(1, max(self.movies, 1))
+        status = self.request('GET', f'/movies/{movie_id}')[0]
+        return 200 if status == 404 else status
+
+    def op_login(self, rng):
+        return self.request(
+            'POST', '/login',
+            {'username': 'benchmark', 'password': 'benchmark'}
+        )[0]
+
+    def op_write(self, rng):
+        with self.lock:
+            movie_id = (self.written_ids.pop()
+                        if self.written_ids and rng.random() < 0.5 else None)
+        if movie_id is not None:
+            return self.request(
+                'DELETE', f'/movies/{movie_id}',
+                headers={'Authorization': f'Bearer {self.token}'}
+            )[0]
+
+        title = f'Benchmark {rng.getrandbits(64):016x}'
+        status, data = self.request('POST', '/movies', {'title': title})
+        if status == 201:
+            with self.lock:
+                self.written_ids.append(json.loads(data)['movie']['id'])
+            return status
+        return 200 if status == 409 else status
+
+    def run(self, requests, concurrency, warmup=0):
+        """Run the workload and return the wall time of the measured part."""
+        if warmup:
+            rng = random.Random(f'{self.seed}-warmup')
+            for _ in range(warmup):
+                self.run_one(rng)
+            self.samples = {name: [] for name in self.operations}
+            self.errors = {name: 0 for name in self.operations}
+
+        per_worker = [requests // concurrency] * concurrency
+        for i in range(requests % concurrency):
+            per_worker[i] += 1
+
+        def worker(index, count):
+            rng = random.Random(f'{self.seed}-{index}')
+            for _ in range(count):
+                self.run_one(rng)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(worker, index, count)
+                for index, count in enumerate(per_worker)
+            ]
+            for future in futures:
+                future.result()
+        return time.perf_counter() - start
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(samples):
+    values = sorted(samples)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values) * 1000, 3),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3)
+    }
+
+
+def run_benchmark(movies=10000, requests=2000, concurrency=8, mix=None,
+                  db_path=None, omdb_latency_ms=0, omdb_jitter_ms=0,
+                  omdb_error_rate=0.0, warmup=100, seed=0):
+    """
+    Run a full benchmark and return the report as a dictionary.
+
+    The database URL and OMDB base URL are pointed at the benchmark database
+    and fake OMDB server for the duration of the run and restored afterwards,
+    as are the secret key and OMDB API key when they are not set.
+    """
+    import database.database as database
+    import services.jwt_service as jwt_service
+    from api.api_server import MovieRequestHandler
+    from services.omdb_service import OMDBService
+
+    mix = dict(mix or DEFAULT_MIX)
+    with ExitStack() as stack:
+        if db_path is None:
+            temporary = stack.enter_context(tempfile.TemporaryDirectory())
+            db_path = os.path.join(temporary, 'benchmark.db')
+
+        seed_start = time.perf_counter()
+        seed_database(db_path, movies, seed)
+        seed_seconds = time.perf_counter() - seed_start
+
+        stack.enter_context(
+            patch.object(database, 'DATABASE_URL', f'sqlite:///{db_path}')
+        )
+        stack.enter_context(patch.object(
+            jwt_service, 'SECRET_KEY', jwt_service.SECRET_KEY or 'benchmark'
+        ))
+        stack.enter_context(patch.dict(os.environ, {
+            'OMDB_API_KEY': os.environ.get('OMDB_API_KEY') or 'benchmark'
+        }))
+        omdb = stack.enter_context(
+            FakeOMDBServer(latency_ms=omdb_latency_ms,
+                           latency_jitter_ms=omdb_jitter_ms,
+                           error_rate=omdb_error_rate, seed=seed)
+        )
+        stack.enter_context(patch.object(OMDBService, 'BASE_URL', omdb.url))
+
+        server = ThreadingHTTPServer(('localhost', 0), MovieRequestHandler)
+        stack.callback(server.server_close)
+        server.daemon_threads = True
+        server.request_queue_size = max(concurrency * 2, 5)
+        server_thread = threading.Thread(target=server.serve_forever,
+                                         daemon=True)
+        server_thread.start()
+        stack.callback(server_thread.join)
+        stack.callback(server.shutdown)
+
+        generator = LoadGenerator(server.server_address[1], movies, mix, seed)
+        generator.setup()
+        elapsed = generator.run(requests, concurrency, warmup)
+
+    all_samples = [
+        value for values in generator.samples.values() for value in values
+    ]
+    total_errors = sum(generator.errors.values())
+    operations = {}
+    for name, values in generator.samples.items():
+        operations[name] = summarize(values)
+        operations[name]['errors'] = generator.errors[name]
+
+    return {
+        'config': {
+            'movies': movies,
+            'requests': requests,
+            'concurrency': concurrency,
+            'mix': mix,
+            'omdb_latency_ms': omdb_latency_ms,
+            'omdb_jitter_ms': omdb_jitter_ms,
+            'omdb_error_rate': omdb_error_rate,
+            'warmup': warmup,
+            'seed': seed
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': int(time.time())
+        },
+        'seed_seconds': round(seed_seconds, 3),
+        'total': dict(
+            summarize(all_samples),
+            errors=total_errors,
+            duration_s=round(elapsed, 3),
+            throughput_rps=round(len(all_samples) / elapsed, 2)
+            if elapsed else None,
+            omdb_requests=omdb.request_count
+        ),
+        'operations': operations
+    }
+
+
+def parse_mix(value):
+    """Parse a mix such as 'list=60,detail=30,write=10'."""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(
+                f"Unknown operation '{name}'; expected one of "
+                f"{', '.join(DEFAULT_MIX)}."
+            )
+        mix[name] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--movies', type=int, default=10000,
+                        help='Number of movies to seed (default 10000).')
+    parser.add_argument('--requests', type=int, default=2000,
+                        help='Measured requests to issue (default 2000).')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Concurrent client threads (default 8).')
+    parser.add_argument('--mix', type=parse_mix, default=None,
+                        help='Operation weights, e.g. list=60,detail=40.')
+    parser.add_argument('--db-path', default=None,
+                        help='SQLite file to seed and reuse across runs.')
+    parser.add_argument('--omdb-latency-ms', type=float, default=0)
+    parser.add_argument('--omdb-jitter-ms', type=float, default=0)
+    parser.add_argument('--omdb-error-rate', type=float, default=0.0)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None,
+                        help='Write the JSON report to this file.')
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        movies=args.movies, requests=args.requests,
+        concurrency=args.concurrency, mix=args.mix, db_path=args.db_path,
+        omdb_latency_ms=args.omdb_latency_ms,
+        omdb_jitter_ms=args.omdb_jitter_ms,
+        omdb_error_rate=args.omdb_error_rate, warmup=args.warmup,
+        seed=args.seed
+    )
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Compare the ORM and column-tuple read paths for movie listings.
+
+Each path runs the same paginated query against an in-memory SQLite
+database and serializes the page to JSON bytes: the ORM path loads Movie
+identities and calls to_dict(), the tuple path selects MOVIE_COLUMNS and
+uses movie_row_to_dict().
+
+Example:
+    python -m benchmarks.serialization --movies 20000 --repeat 200
+"""
+import argparse
+import json
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.load_test import MOVIE_TYPES, TITLE_WORDS
+from database.models import Base, Movie, MOVIE_COLUMNS, movie_row_to_dict
+
+LIMITS = (10, 100, 1000)
+
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def build_session(movies):
+    """Return a session factory over an in-memory database of movies."""
+    engine = create_engine('sqlite://', poolclass=StaticPool,
+                           connect_args={'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Movie.__table__.insert(), [
+            {
+                'title': f'{TITLE_WORDS[i % len(TITLE_WORDS)]} {i}',
+                'year': str(1950 + i % 75),
+                'movie_type': MOVIE_TYPES[i % len(MOVIE_TYPES)],
+                'imdb_id': f'tt{i:08d}',
+                'poster': f'https://img.example/tt{i:08d}.jpg'
+            }
+            for i in range(movies)
+        ])
+    return sessionmaker(bind=engine)
+
+
+def orm_page(session, limit):
+    movies = session.query(Movie).order_by(Movie.title).limit(limit).all()
+    return _json_encoder.encode(
+        [movie.to_dict() for movie in movies]
+    ).encode('utf-8')
+
+
+def tuple_page(session, limit):
+    rows = (
+        session.query(*MOVIE_COLUMNS)
+        .order_by(Movie.title)
+        .limit(limit)
+        .all()
+    )
+    return _json_encoder.encode(
+        [movie_row_to_dict(row) for row in rows]
+    ).encode('utf-8')
+
+
+def measure(session_factory, page, limit, repeat):
+    """Return the mean time in milliseconds of one page, fresh session each."""
+    timings = []
+    for _ in range(repeat):
+        session = session_factory()
+        start = time.perf_counter()
+        page(session, limit)
+        timings.append(time.perf_counter() - start)
+        session.close()
+    timings.sort()
+    return {
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 4),
+        'p50_ms': round(timings[len(timings) // 2] * 1000, 4)
+    }
+
+
+def run(movies=20000, repeat=100, limits=LIMITS):
+    """Run the comparison and return a report dictionary."""
+    session_factory = build_session(max(movies, max(limits)))
+
+    session = session_factory()
+    assert orm_page(session, 10) == tuple_page(session, 10)
+    session.close()
+
+    results = {}
+    for limit in limits:
+        orm = measure(session_factory, orm_page, limit, repeat)
+        tuples = measure(session_factory, tuple_page, limit, repeat)
+        results[str(limit)] = {
+            'orm': orm,
+            'tuple': tuples,
+            'speedup': round(orm['mean_ms'] / tuples['mean_ms'], 2)
+        }
+    return {'movies': movies, 'repeat': repeat, 'limits': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--movies', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args(argv)
+    report = run(movies=args.movies, repeat=args.repeat)
+    sys.stdout.write(json.dumps(report, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
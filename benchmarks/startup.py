@@ -0,0 +1,105 @@
+"""
+Measure the cold start of the server process with `python -X importtime`.
+
+Each run imports the server module in a fresh interpreter and parses the
+import times it reports. The report gives the best and median total import
+time over the runs, the slowest top-level packages, and which of the modules
+deferred to the routes that need them were loaded anyway. The process exits
+with status 1 when the best run exceeds the startup budget.
+
+Example:
+    python -m benchmarks.startup --runs 5 --budget-ms 1000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODULE = 'main'
+
+# Modules imported on first use by the routes that need them: requests by
+# OMDB lookups, jwt by logins and authenticated routes, and the PostgreSQL
+# dialect by PostgreSQL databases only.
+DEFERRED_MODULES = ('requests', 'jwt', 'sqlalchemy.dialects.postgresql')
+
+# Generous enough for a loaded CI machine; an eager import of a heavy
+# dependency on the startup path still shows up well before it is reached.
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '1000'))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(output):
+    """
+    Parse the stderr of `python -X importtime`.
+
+    Returns:
+        dict: Self and cumulative import time in microseconds by module.
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return times
+
+
+def import_profile(module=MODULE):
+    """Import a module in a fresh interpreter and return its import times."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+
+def run(module=MODULE, runs=3, top=10):
+    """Profile the import of a module `runs` times and return a report."""
+    profiles = sorted(
+        (import_profile(module) for _ in range(runs)),
+        key=lambda profile: profile[module][1]
+    )
+    best = profiles[0]
+    packages = sorted(
+        (
+            (name, cumulative) for name, (_, cumulative) in best.items()
+            if '.' not in name and name != module
+        ),
+        key=lambda item: item[1], reverse=True
+    )
+    return {
+        'module': module,
+        'runs': runs,
+        'best_ms': round(best[module][1] / 1000, 1),
+        'median_ms': round(profiles[len(profiles) // 2][module][1] / 1000, 1),
+        'slowest': [
+            {'package': name, 'cumulative_ms': round(cumulative / 1000, 1)}
+            for name, cumulative in packages[:top]
+        ],
+        'deferred_loaded': [
+            name for name in DEFERRED_MODULES if name in best
+        ]
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--module', default=MODULE)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args(argv)
+    report = run(module=args.module, runs=args.runs)
+    report['budget_ms'] = args.budget_ms
+    sys.stdout.write(json.dumps(report, indent=2) + '\n')
+    if report['best_ms'] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,212 @@
+import json
 import logging
 import os
 import sys
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, inspect, select, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import IntegrityError
-from database.models import Movie, Base
+from database.dialects import (
+    POOL_SETTINGS, create_search_index, enable_foreign_keys, engine_options,
+    insert_ignoring_duplicates
+)
+from database.group_commit import GroupCommitWriter
+from database.models import Movie, Base, parse_year_range, omdb_movie_row
+from database.replica import ReadOnlyReplica, SnapshotReplica, sqlite_path
+from database.snapshot import is_snapshot_file, load_snapshot
 from services.movie_service import find_unique_movies
+from services.cache_service import notify_snapshot, notify_write
+from services.config_service import CONFIG
+from services.metrics_service import DB_QUERY_DURATION, DB_ERRORS
+from services.trace_service import span, record_span
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 db_path = os.path.join(os.getcwd(), 'local_movies.db')
-DATABASE_URL = f'sqlite:///{db_path}'
+DATABASE_URL = CONFIG.DATABASE_URL or f'sqlite:///{db_path}'
 
-TESTING_MODE: bool = 'test' in sys.argv[0]
+TESTING_MODE: bool = (
+    CONFIG.TESTING_MODE if CONFIG.TESTING_MODE is not None
+    else 'test' in sys.argv[0]
+)
 if TESTING_MODE:
-    DATABASE_URL = DATABASE_URL.replace('.db', '_test.db')
+    # Tests never run against DATABASE_URL, which may be a shared database.
+    DATABASE_URL = CONFIG.TEST_DATABASE_URL or \
+        f"sqlite:///{db_path.replace('.db', '_test.db')}"
+
+SEED_SNAPSHOT = CONFIG.SEED_SNAPSHOT
+
+# Group commit is enabled by setting WRITE_BATCH_MS to a positive delay.
+WRITE_BATCH_MS = CONFIG.WRITE_BATCH_MS
+WRITE_BATCH_SIZE = CONFIG.WRITE_BATCH_SIZE
+
+# Where read-only queries go: 'primary', 'readonly' (a read-only connection
+# pool on DATABASE_READ_URL or the primary file) or 'snapshot' (a copy of
+# the primary file refreshed every READ_REFRESH_INTERVAL seconds and used
+# while no older than READ_MAX_STALENESS seconds).
+READ_PRIMARY = 'primary'
+READ_ONLY = 'readonly'
+READ_SNAPSHOT = 'snapshot'
+DATABASE_READ_MODE = CONFIG.DATABASE_READ_MODE
+DATABASE_READ_URL = CONFIG.DATABASE_READ_URL
+READ_REFRESH_INTERVAL = CONFIG.READ_REFRESH_INTERVAL
+READ_MAX_STALENESS = CONFIG.READ_MAX_STALENESS
+CONFIG.bind(globals(), 'WRITE_BATCH_SIZE', 'READ_REFRESH_INTERVAL',
+            'READ_MAX_STALENESS')
+
+SEED_PENDING = 'seeding'
+SEED_READY = 'ready'
+SEED_FAILED = 'failed'
+
+_seed_state = {'status': SEED_PENDING, 'error': None}
+database_ready = threading.Event()
+
+# Engines by database URL, so every session shares its connection pool.
+_engines = {}
+_engines_lock = threading.Lock()
+
+# Session factories by engine, so a DatabaseSession costs two dict lookups.
+_session_factories = {}
+
+# Database URLs whose schema has already been created in this process.
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+# Group commit writers by database URL.
+_writers = {}
+_writers_lock = threading.Lock()
+
+# Read replicas by primary database URL.
+_replicas = {}
+_replicas_lock = threading.Lock()
+
+
+def _statement_kind(statement):
+    """Return the leading SQL keyword of a statement (SELECT, INSERT...)."""
+    parts = statement.lstrip().split(None, 1)
+    return parts[0].upper() if parts else 'UNKNOWN'
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    start = conn.info['query_start_time'].pop()
+    elapsed = time.perf_counter() - start
+    DB_QUERY_DURATION.labels(_statement_kind(statement)).observe(elapsed)
+    record_span('sql', start, elapsed, ' '.join(statement.split())[:200])
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start_time'):
+        conn.info['query_start_time'].pop()
+    DB_ERRORS.labels(
+        _statement_kind(exception_context.statement or '')
+    ).inc()
+
+
+def _create_engine(url):
+    return enable_foreign_keys(create_engine(url, **engine_options(url)))
+
+
+def get_engine(url):
+    """Return the engine of a database URL, creating it on first use."""
+    engine = _engines.get(url)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(url)
+            if engine is None:
+                engine = _create_engine(url)
+                _engines[url] = engine
+    return engine
+
+
+def session_factory(engine):
+    """Return the sessionmaker bound to an engine, creating it on first use."""
+    factory = _session_factories.get(engine)
+    if factory is None:
+        factory = _session_factories.setdefault(
+            engine, sessionmaker(bind=engine)
+        )
+    return factory
+
+
+def reload_engines():
+    """
+    Replace every engine with one using the current pool settings.
+
+    New sessions, the group commit writers and the read replicas use the new
+    pools. Idle connections of the old pools are closed; connections in use
+    are left alone and closed when returned, so running requests are not
+    interrupted. In-memory SQLite databases live in their single connection
+    and keep their engine.
+    """
+    replaced = {}
+    with _engines_lock:
+        for url, engine in list(_engines.items()):
+            if 'poolclass' in engine_options(url):
+                continue
+            replaced[engine] = _engines[url] = _create_engine(url)
+            _session_factories.pop(engine, None)
+    with _writers_lock:
+        for writer in _writers.values():
+            if writer.engine in replaced:
+                writer.rebind(replaced[writer.engine])
+    with _replicas_lock:
+        replicas = list(_replicas.values())
+    for replica in replicas:
+        replica.reload_engine()
+    for engine in replaced:
+        engine.dispose()
+        logger.info("Replaced the connection pool of %s",
+                    engine.url.render_as_string(hide_password=True))
+
+
+@CONFIG.subscribe
+def _apply_config(config, changed):
+    if changed & set(POOL_SETTINGS):
+        reload_engines()
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.max_batch = config.WRITE_BATCH_SIZE
+    with _replicas_lock:
+        for replica in _replicas.values():
+            if isinstance(replica, SnapshotReplica):
+                replica.refresh_interval = config.READ_REFRESH_INTERVAL
+                replica.max_staleness = config.READ_MAX_STALENESS
+
 
 class DatabaseSession:
-    def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
-        self.create_tables()
+    """
+    Engine and sessions of the movie database.
+
+    Args:
+        read_only (bool): Open the session of the context manager on the read
+            replica selected by DATABASE_READ_MODE. get_session() and the
+            write helpers always use the primary.
+    """
+
+    def __init__(self, read_only=False):
+        with span('session.init'):
+            self.engine = get_engine(DATABASE_URL)
+            self.Session = session_factory(self.engine)
+            self.create_tables()
+            self.ReadSession = self.Session
+            if read_only:
+                replica = self.replica()
+                if replica is not None:
+                    self.ReadSession = (
+                        replica.sessionmaker() or self.Session
+                    )
         self._session = None
 
     def get_session(self):
@@ -29,12 +214,34 @@ class DatabaseSession:
         return self.Session()
 
     def create_tables(self):
-        """Create the tables if they do not already exist."""
-        Base.metadata.create_all(self.engine)
+        """
+        Create the tables and indexes if they do not already exist.
+
+        This runs once per database URL and process; later sessions skip the
+        schema inspection entirely.
+        """
+        url = str(self.engine.url)
+        if url in _schema_ready:
+            return
+        with _schema_lock:
+            if url in _schema_ready:
+                return
+            Base.metadata.create_all(self.engine)
+            added = add_missing_columns(self.engine)
+            # create_all only creates indexes together with new tables, so
+            # indexes added to existing tables are created here.
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(self.engine, checkfirst=True)
+            if {'year_start', 'year_end'} & set(added.get('movies', ())):
+                backfill_year_range(self.engine)
+            create_search_index(self.engine, Movie.title)
+            _schema_ready.add(url)
 
     def commit(self, session):
-        """Commit the current session."""
+        """Commit the current session and drop caches derived from it."""
         session.commit()
+        notify_write()
 
     def rollback(self, session):
         """Rollback the current session."""
@@ -44,11 +251,68 @@ class DatabaseSession:
         """Close the session."""
         session.close()
 
+    def writer(self):
+        """
+        Return the group commit writer of this database, or None when group
+        commit is disabled.
+        """
+        if WRITE_BATCH_MS <= 0:
+            return None
+        url = str(self.engine.url)
+        with _writers_lock:
+            if url not in _writers:
+                _writers[url] = GroupCommitWriter(
+                    self.engine, max_delay_ms=WRITE_BATCH_MS,
+                    max_batch=WRITE_BATCH_SIZE, on_commit=notify_write
+                )
+            return _writers[url]
+
+    def replica(self):
+        """
+        Return the read replica of this database, or None when reads go to
+        the primary.
+        """
+        if DATABASE_READ_MODE == READ_PRIMARY:
+            return None
+        url = str(self.engine.url)
+        with _replicas_lock:
+            if url not in _replicas:
+                _replicas[url] = self._create_replica(url)
+            return _replicas[url]
+
+    def _create_replica(self, url):
+        if DATABASE_READ_MODE not in [READ_ONLY, READ_SNAPSHOT]:
+            raise ValueError(
+                f"Invalid DATABASE_READ_MODE '{DATABASE_READ_MODE}': must be "
+                f"one of {READ_PRIMARY}, {READ_ONLY}, {READ_SNAPSHOT}."
+            )
+        if sqlite_path(url) is not None:
+            # In WAL mode readers see the last commit instead of waiting for
+            # the writer to finish.
+            with self.engine.connect() as conn:
+                conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+        if DATABASE_READ_MODE == READ_ONLY:
+            return ReadOnlyReplica(DATABASE_READ_URL or url)
+        return SnapshotReplica(
+            url, refresh_interval=READ_REFRESH_INTERVAL,
+            max_staleness=READ_MAX_STALENESS, on_refresh=notify_snapshot
+        )
+
     def add_element(self, session, element):
-        """Add a single element to the database."""
+        """
+        Add a single element to the database.
+
+        With group commit enabled the insert is handed to the writer thread
+        and this call returns once the batch holding it is committed.
+        """
+        writer = self.writer()
         try:
-            session.add(element)
-            self.commit(session)
+            if writer is not None:
+                with span('session.group_commit'):
+                    writer.add(element).result()
+            else:
+                session.add(element)
+                self.commit(session)
             logger.info(f"Successfully added {element}.")
         except IntegrityError as ie:
             self.rollback(session)
@@ -82,11 +346,44 @@ class DatabaseSession:
             )
             raise
 
-    def delete_element(self, session, element):
-        """Delete a single element from the database."""
+    def insert_rows(self, session, table, rows):
+        """
+        Insert plain rows with a single executemany, skipping rows that
+        duplicate a unique key already in the table.
+        """
+        if not rows:
+            # An executemany without rows would insert one default row.
+            return
         try:
-            session.delete(element)
+            session.execute(
+                insert_ignoring_duplicates(table, self.engine.dialect.name),
+                rows
+            )
             self.commit(session)
+            logger.info(
+                f"Inserted up to {len(rows)} rows into {table.name}."
+            )
+        except Exception as e:
+            self.rollback(session)
+            logger.error(
+                "An error occurred while inserting rows: %s",
+                e
+            )
+            raise
+
+    def delete_element(self, session, element):
+        """
+        Delete a single element from the database, through the group commit
+        writer when it is enabled.
+        """
+        writer = self.writer()
+        try:
+            if writer is not None:
+                with span('session.group_commit'):
+                    writer.delete(element).result()
+            else:
+                session.delete(element)
+                self.commit(session)
             logger.info(f"Successfully deleted {element}.")
         except Exception as e:
             self.rollback(session)
@@ -98,7 +395,8 @@ class DatabaseSession:
 
     def __enter__(self):
         """Enter the runtime context related to this object."""
-        self._session = self.Session()
+        with span('session.checkout'):
+            self._session = self.ReadSession()
         return self._session
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -108,36 +406,212 @@ class DatabaseSession:
         self._session.close()
 
 
-def initialize_database():
+def close_writers():
+    """Flush and stop every group commit writer."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+def close_replicas():
+    """Stop and release every read replica."""
+    with _replicas_lock:
+        replicas = list(_replicas.values())
+        _replicas.clear()
+    for replica in replicas:
+        replica.close()
+
+
+def add_missing_columns(engine):
+    """
+    Add model columns missing from existing tables with ALTER TABLE.
+
+    This is the schema migration for columns added to the models after a
+    database was created; new columns are always nullable.
+
+    Returns:
+        dict: The names of the added columns, by table name.
+    """
+    inspector = inspect(engine)
+    added = {}
+    for table in Base.metadata.sorted_tables:
+        existing = {
+            column['name'] for column in inspector.get_columns(table.name)
+        }
+        missing = [
+            column for column in table.columns if column.name not in existing
+        ]
+        if not missing:
+            continue
+        with engine.begin() as conn:
+            for column in missing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} '
+                    f'ADD COLUMN {column.name} {column_type}'
+                ))
+        added[table.name] = [column.name for column in missing]
+        logger.info(
+            "Added columns %s to table %s", added[table.name], table.name
+        )
+    return added
+
+
+def backfill_year_range(engine, batch_size=10000):
+    """
+    Populate year_start and year_end for movies inserted without them.
+
+    Rows are read in id order in batches and updated with executemany, so
+    the migration of a large catalog runs in bounded memory.
+
+    Returns:
+        int: The number of updated movies.
+    """
+    table = Movie.__table__
+    update = (
+        table.update()
+        .where(table.c.id == text(':movie_id'))
+        .values(year_start=text(':start'), year_end=text(':end'))
+    )
+    updated = 0
+    last_id = 0
+    with engine.begin() as conn:
+        while True:
+            rows = conn.execute(
+                select(table.c.id, table.c.year)
+                .where(table.c.id > last_id)
+                .where(table.c.year_start.is_(None))
+                .where(table.c.year.isnot(None))
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            params = []
+            for movie_id, year in rows:
+                start, end = parse_year_range(year)
+                if start is not None:
+                    params.append(
+                        {'movie_id': movie_id, 'start': start, 'end': end}
+                    )
+            if params:
+                conn.execute(update, params)
+                updated += len(params)
+    if updated:
+        logger.info("Backfilled the year range of %d movies", updated)
+    return updated
+
+
+def load_seed_file(path):
+    """
+    Load seed movies from a local JSON snapshot.
+
+    The file holds a list of OMDB search results, i.e. dictionaries with the
+    'Title', 'Year', 'Type', 'imdbID' and 'Poster' keys.
+
+    Args:
+        path (str): Path of the JSON snapshot.
+
+    Returns:
+        list: The movie data stored in the snapshot.
+    """
+    with open(path, encoding='utf-8') as f:
+        movies = json.load(f)
+    if not isinstance(movies, list):
+        raise ValueError(f"Seed snapshot '{path}' must contain a JSON list.")
+    return movies
+
+
+def initialize_database(snapshot_path=None):
     """
     Initialize the database by creating the movies table and inserting unique
     movies.
 
-    This function checks if the movies table is empty. If it is, it calls a
-    function to find unique movies and inserts them into the database.
+    This function checks if the movies table is empty. If it is, it loads the
+    movies from the local snapshot given by snapshot_path (or the
+    SEED_SNAPSHOT environment variable) when set, and otherwise calls a
+    function to find unique movies in OMDB, and inserts them into the
+    database. Binary snapshots written by database.snapshot are streamed
+    straight into the table; JSON snapshots go through the ORM. The readiness
+    state is updated once it finishes.
     """
 
+    snapshot_path = snapshot_path or SEED_SNAPSHOT
     db_session = DatabaseSession()
 
     with db_session as session:
         try:
             if session.query(Movie).count() == 0:
-                movies = find_unique_movies()
-                movie_objects = [
-                    Movie(
-                        title=movie_data.get('Title'),
-                        year=movie_data.get('Year'),
-                        movie_type=movie_data.get('Type'),
-                        imdb_id=movie_data.get('imdbID'),
-                        poster=movie_data.get('Poster')
+                seeded = False
+                if snapshot_path and is_snapshot_file(snapshot_path):
+                    logger.info("Seeding movies from %s", snapshot_path)
+                    try:
+                        load_snapshot(db_session.engine, snapshot_path)
+                    except ValueError as e:
+                        # Nothing was inserted; the snapshot is rejected
+                        # before the transaction writes any row.
+                        logger.warning(
+                            "Snapshot not loaded, seeding from OMDB: %s", e
+                        )
+                        snapshot_path = None
+                    else:
+                        backfill_year_range(db_session.engine)
+                        notify_write()
+                        seeded = True
+                if not seeded:
+                    if snapshot_path:
+                        logger.info("Seeding movies from %s", snapshot_path)
+                        movies = load_seed_file(snapshot_path)
+                    else:
+                        movies = find_unique_movies()
+                    db_session.insert_rows(
+                        session, Movie.__table__,
+                        [omdb_movie_row(movie_data) for movie_data in movies]
                     )
-                    for movie_data in movies
-                ]
-                db_session.bulk_save(session, movie_objects)
 
         except Exception as e:
+            _seed_state.update(status=SEED_FAILED, error=str(e))
             logger.exception(
                 "An error occurred during database initialization: %s",
                 e
             )
             raise
+
+    _seed_state.update(status=SEED_READY, error=None)
+    database_ready.set()
+
+
+def initialize_database_in_background(snapshot_path=None):
+    """
+    Run initialize_database in a daemon thread, so the server can accept
+    requests while the database is being seeded.
+
+    Returns:
+        threading.Thread: The started seeding thread.
+    """
+    _seed_state.update(status=SEED_PENDING, error=None)
+    database_ready.clear()
+
+    def seed():
+        try:
+            initialize_database(snapshot_path)
+        except Exception:
+            pass  # Already logged and recorded in the seed state.
+
+    thread = threading.Thread(target=seed, name='database-seed', daemon=True)
+    thread.start()
+    return thread
+
+
+def seed_status():
+    """
+    Return the seeding state of the database.
+
+    Returns:
+        dict: 'status' is one of 'seeding', 'ready' or 'failed'; 'error'
+        holds the failure message, if any.
+    """
+    return dict(_seed_state)
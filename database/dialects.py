@@ -0,0 +1,333 @@
+"""
+Backend-specific pieces of the database layer.
+
+The rest of the code is written against SQLAlchemy Core and ORM constructs
+that every backend understands. This module holds what differs per backend:
+
+    engine_options      pool settings for SQLite files, in-memory SQLite and
+                        server databases such as PostgreSQL, from the
+                        DB_POOL_* settings
+    enable_foreign_keys turns on SQLite foreign key enforcement, which
+                        ON DELETE CASCADE relies on
+    insert_ignoring_duplicates
+                        INSERT that skips rows violating a unique constraint
+                        (ON CONFLICT DO NOTHING)
+    reset_id_sequence   realign a serial primary key after rows were
+                        inserted with explicit ids
+    PrefixMatch         case-sensitive prefix match as an index range,
+                        compared in the "C" collation on PostgreSQL
+    FullTextMatch       full-text title search: an FTS5 table on SQLite, a
+                        GIN tsvector index on PostgreSQL, LIKE elsewhere
+    create_search_index creates the FTS5 table or GIN index, and the "C"
+                        collation index PrefixMatch uses on PostgreSQL
+    search_index_deferred
+                        rebuilds the FTS5 table once after a bulk load
+"""
+import logging
+from contextlib import contextmanager
+
+from sqlalchemy import (
+    and_, event, func, inspect, literal, literal_column, text
+)
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql.expression import ColumnElement
+
+from services.config_service import CONFIG
+
+logger = logging.getLogger(__name__)
+
+POOL_SETTINGS = ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT',
+                 'DB_POOL_RECYCLE', 'SQLITE_BUSY_TIMEOUT')
+DB_POOL_SIZE = CONFIG.DB_POOL_SIZE
+DB_MAX_OVERFLOW = CONFIG.DB_MAX_OVERFLOW
+DB_POOL_TIMEOUT = CONFIG.DB_POOL_TIMEOUT
+DB_POOL_RECYCLE = CONFIG.DB_POOL_RECYCLE
+SQLITE_BUSY_TIMEOUT = CONFIG.SQLITE_BUSY_TIMEOUT
+CONFIG.bind(globals(), *POOL_SETTINGS)
+
+SEARCH_CONFIG = 'simple'
+
+
+def backend_name(url):
+    """Return the backend of a database URL, e.g. 'sqlite' or 'postgresql'."""
+    return make_url(url).get_backend_name()
+
+
+def engine_options(url):
+    """
+    Return create_engine keyword arguments suited to the database URL.
+
+    In-memory SQLite databases share one connection, as every connection
+    would otherwise see its own empty database. SQLite files keep the default
+    pool and wait up to SQLITE_BUSY_TIMEOUT seconds for the write lock.
+    Server databases get a bounded pool whose connections are checked before
+    use and recycled, so replicas survive database restarts and idle
+    timeouts.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        if not url.database or url.database == ':memory:':
+            return {
+                'poolclass': StaticPool,
+                'connect_args': {'check_same_thread': False}
+            }
+        return {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT}
+        }
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': True
+    }
+
+
+def _sqlite_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def enable_foreign_keys(engine):
+    """
+    Enforce foreign keys on every new SQLite connection of the engine.
+
+    SQLite ignores foreign keys, and so ON DELETE CASCADE, unless enabled
+    per connection; other backends always enforce them.
+    """
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _sqlite_foreign_keys)
+    return engine
+
+
+def insert_ignoring_duplicates(table, dialect_name):
+    """
+    Return an INSERT for the table that skips rows conflicting with a unique
+    constraint, so several API nodes can seed the same database safely.
+    """
+    if dialect_name == 'postgresql':
+        # Imported here, as the PostgreSQL dialect is slow to import and
+        # SQLite deployments never load it.
+        from sqlalchemy.dialects import postgresql
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect_name == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect_name in ['mysql', 'mariadb']:
+        return table.insert().prefix_with('IGNORE')
+    return table.insert()
+
+
+def reset_id_sequence(conn, table):
+    """
+    Move the id sequence of a PostgreSQL table past its largest id.
+
+    Rows inserted with explicit ids do not advance the sequence; other
+    backends derive new ids from the table itself.
+    """
+    if conn.dialect.name != 'postgresql':
+        return
+    conn.execute(
+        text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"COALESCE(MAX(id), 0) + 1, false) FROM {table.name}"
+        )
+    )
+
+
+def prefix_upper_bound(prefix):
+    """Return the smallest string greater than every string with prefix."""
+    if ord(prefix[-1]) == 0x10FFFF:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class PrefixMatch(ColumnElement):
+    """
+    Match the values of a text column starting with a prefix, case-sensitively.
+
+    Compiles to a half-open range, column >= 'Sev' AND column < 'Sew', which
+    is a prefix match only in a code point (binary) collation. That is the
+    default of SQLite; on PostgreSQL, whose databases usually use a
+    linguistic collation, the column is compared COLLATE "C" and the range
+    is answered by the index of create_search_index.
+    """
+    inherit_cache = True
+
+    def __init__(self, column, prefix):
+        self.column = column
+        self.prefix = prefix
+
+
+def _prefix_range(column, prefix):
+    upper = prefix_upper_bound(prefix)
+    if upper is None:
+        return column >= prefix
+    return and_(column >= prefix, column < upper)
+
+
+@compiles(PrefixMatch)
+def _compile_prefix(element, compiler, **kw):
+    return compiler.process(_prefix_range(element.column, element.prefix), **kw)
+
+
+@compiles(PrefixMatch, 'postgresql')
+def _compile_prefix_postgresql(element, compiler, **kw):
+    return compiler.process(
+        _prefix_range(element.column.collate('C'), element.prefix), **kw
+    )
+
+
+class FullTextMatch(ColumnElement):
+    """
+    Match the words of a query against a text column, in any order.
+
+    Compiles to an FTS5 lookup on SQLite, to a tsvector match on PostgreSQL
+    and to a case-insensitive substring match elsewhere.
+    """
+    inherit_cache = True
+
+    def __init__(self, column, query):
+        self.column = column
+        self.query = query
+
+
+def fts5_query(query):
+    """Quote every word, so FTS5 operators in user input are matched as text."""
+    return ' '.join(
+        '"' + word.replace('"', '""') + '"' for word in query.split()
+    )
+
+
+def fts_table_name(table):
+    return f'{table.name}_fts'
+
+
+@compiles(FullTextMatch)
+def _compile_match(element, compiler, **kw):
+    return compiler.process(
+        func.lower(element.column).contains(
+            element.query.lower(), autoescape=True
+        ),
+        **kw
+    )
+
+
+@compiles(FullTextMatch, 'sqlite')
+def _compile_match_sqlite(element, compiler, **kw):
+    table = element.column.table
+    primary_key, = table.primary_key.columns
+    fts = fts_table_name(table)
+    query = compiler.process(literal(fts5_query(element.query)), **kw)
+    return (
+        f'{compiler.process(primary_key, **kw)} IN '
+        f'(SELECT rowid FROM {fts} WHERE {fts} MATCH {query})'
+    )
+
+
+@compiles(FullTextMatch, 'postgresql')
+def _compile_match_postgresql(element, compiler, **kw):
+    # The configuration is rendered inline, so the expression matches the
+    # one of the GIN index created by create_search_index.
+    config = literal_column(f"'{SEARCH_CONFIG}'")
+    return compiler.process(
+        func.to_tsvector(config, element.column).bool_op('@@')(
+            func.plainto_tsquery(config, element.query)
+        ),
+        **kw
+    )
+
+
+def create_search_index(engine, column):
+    """
+    Create the full-text index used by FullTextMatch on the column.
+
+    On SQLite this is an external-content FTS5 table kept in step with the
+    table by triggers, and filled from the existing rows when it is created.
+    On PostgreSQL it is a GIN index, together with an index on the column
+    COLLATE "C" for PrefixMatch.
+    """
+    table = column.table
+    if engine.dialect.name == 'sqlite':
+        _create_fts5_table(engine, table, column.name)
+    elif engine.dialect.name == 'postgresql':
+        with engine.begin() as conn:
+            conn.execute(text(
+                f'CREATE INDEX IF NOT EXISTS ix_{table.name}_{column.name}'
+                f'_search ON {table.name} USING gin '
+                f"(to_tsvector('{SEARCH_CONFIG}', {column.name}))"
+            ))
+            conn.execute(text(
+                f'CREATE INDEX IF NOT EXISTS ix_{table.name}_{column.name}'
+                f'_prefix ON {table.name} ({column.name} COLLATE "C")'
+            ))
+
+
+def _fts5_triggers(table, column, pk):
+    fts = fts_table_name(table)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON "
+        f"{table.name} BEGIN INSERT INTO {fts}(rowid, {column}) "
+        f"VALUES (new.{pk}, new.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON "
+        f"{table.name} BEGIN INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.{pk}, old.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF "
+        f"{column} ON {table.name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.{pk}, old.{column}); "
+        f"INSERT INTO {fts}(rowid, {column}) "
+        f"VALUES (new.{pk}, new.{column}); END"
+    ]
+
+
+def _create_fts5_table(engine, table, column):
+    fts = fts_table_name(table)
+    primary_key, = table.primary_key.columns
+    exists = inspect(engine).has_table(fts)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{column}, content='{table.name}', "
+            f"content_rowid='{primary_key.name}', "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+        for trigger in _fts5_triggers(table, column, primary_key.name):
+            conn.exec_driver_sql(trigger)
+        if not exists:
+            conn.exec_driver_sql(
+                f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"
+            )
+            logger.info("Built the full-text index %s", fts)
+
+
+@contextmanager
+def search_index_deferred(conn, table):
+    """
+    Defer full-text indexing of rows inserted within the block.
+
+    Indexing every row through the SQLite triggers is several times slower
+    than rebuilding the index once, so bulk loads drop the triggers, and
+    the index is rebuilt and the triggers restored when the block exits.
+    Must run inside a transaction; other backends index as usual.
+    """
+    fts = fts_table_name(table)
+    if conn.dialect.name != 'sqlite' or \
+            not inspect(conn).has_table(fts):
+        yield
+        return
+    column, = [
+        row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info({fts})')
+    ]
+    primary_key, = table.primary_key.columns
+    for kind in ['insert', 'delete', 'update']:
+        conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {fts}_{kind}')
+    yield
+    conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    for trigger in _fts5_triggers(table, column, primary_key.name):
+        conn.exec_driver_sql(trigger)
@@ -0,0 +1,212 @@
+"""
+Group commit for single-row writes.
+
+Request threads hand their inserts and deletes to a GroupCommitWriter and
+wait on a future. A single writer thread collects the pending operations
+for up to max_delay_ms milliseconds or max_batch operations and applies them
+in one transaction, so a burst of writes costs one commit (and one fsync)
+instead of one per row.
+
+A batch is first applied with a single flush. If that raises an
+IntegrityError, e.g. for a duplicate imdb_id, the batch is rolled back and
+replayed with every operation in its own SAVEPOINT, so only the failing
+operations are rejected and their errors raised to their callers; the rest
+of the batch is still committed.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import sqlalchemy.exc
+from sqlalchemy import delete, inspect
+from sqlalchemy.orm import sessionmaker
+
+from services.metrics_service import DB_WRITE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+ADD = 'add'
+DELETE = 'delete'
+
+_STOP = object()
+
+
+class _Operation:
+    __slots__ = ('kind', 'element', 'future')
+
+    def __init__(self, kind, element):
+        self.kind = kind
+        self.element = element
+        self.future = Future()
+
+
+def _delete_statement(element):
+    """Build a DELETE of the row behind a persistent ORM object."""
+    state = inspect(element)
+    mapper = state.mapper
+    return delete(mapper.local_table).where(*[
+        column == value
+        for column, value in zip(mapper.primary_key, state.identity)
+    ])
+
+
+class GroupCommitWriter:
+    """
+    Apply inserts and deletes from many threads in shared transactions.
+
+    Args:
+        engine (Engine): Engine the writer thread connects with.
+        max_delay_ms (float): How long the writer waits for more operations
+            after the first one of a batch arrives.
+        max_batch (int): Maximum number of operations per transaction.
+        on_commit (callable, optional): Called after every committed batch.
+    """
+
+    def __init__(self, engine, max_delay_ms=2.0, max_batch=100,
+                 on_commit=None):
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+        self.rebind(engine)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name='group-commit-writer', daemon=True
+        )
+        self._thread.start()
+
+    def rebind(self, engine):
+        """Apply the next batches through another engine."""
+        self.engine = engine
+        # Objects are handed back to request threads after the commit, so
+        # their loaded attributes must survive it.
+        self.Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    def add(self, element):
+        """Queue an insert; the future resolves to the persisted element."""
+        return self._submit(ADD, element)
+
+    def delete(self, element):
+        """Queue the delete of a persistent element by its primary key."""
+        return self._submit(DELETE, element)
+
+    def _submit(self, kind, element):
+        if not self._thread.is_alive():
+            raise RuntimeError('The group commit writer is closed.')
+        operation = _Operation(kind, element)
+        self._queue.put(operation)
+        return operation.future
+
+    def close(self):
+        """Apply the operations already queued and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _collect(self, first):
+        """Gather operations until the batch is full or the delay expires."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                operation = (
+                    self._queue.get(timeout=timeout) if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if operation is _STOP:
+                return batch, True
+            batch.append(operation)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stopping = self._collect(first)
+            try:
+                self._apply(batch)
+            except Exception as e:
+                # E.g. a rollback on a broken connection: fail what is still
+                # pending rather than the thread, so no caller waits forever.
+                logger.exception("Group commit of %d writes failed",
+                                 len(batch))
+                for operation in batch:
+                    if not operation.future.done():
+                        operation.future.set_exception(e)
+
+    def _apply(self, batch):
+        """Apply a batch in one transaction and resolve every future."""
+        DB_WRITE_BATCH_SIZE.observe(len(batch))
+        session = self.Session()
+        try:
+            try:
+                results = self._apply_together(session, batch)
+            except sqlalchemy.exc.IntegrityError:
+                session.rollback()
+                results = self._apply_isolated(session, batch)
+            session.commit()
+        except Exception as e:
+            logger.error("Group commit of %d writes failed: %s",
+                         len(batch), e)
+            session.rollback()
+            results = {operation: e for operation in batch}
+        else:
+            if self.on_commit is not None:
+                try:
+                    self.on_commit()
+                except Exception:
+                    # The writes are committed; report them as such.
+                    logger.exception("Group commit callback failed")
+        finally:
+            session.expunge_all()
+            session.close()
+
+        for operation in batch:
+            result = results[operation]
+            if isinstance(result, Exception):
+                operation.future.set_exception(result)
+            else:
+                operation.future.set_result(result)
+
+    def _apply_together(self, session, batch):
+        """Apply every operation with a single flush."""
+        results = {}
+        for operation in batch:
+            if operation.kind == ADD:
+                session.add(operation.element)
+                results[operation] = operation.element
+        session.flush()
+        for operation in batch:
+            if operation.kind == DELETE:
+                results[operation] = self._apply_one(session, operation)
+        return results
+
+    def _apply_isolated(self, session, batch):
+        """
+        Apply every operation in its own SAVEPOINT, so that the operations
+        that fail are rolled back and reported one by one.
+        """
+        results = {}
+        for operation in batch:
+            try:
+                with session.begin_nested():
+                    results[operation] = self._apply_one(session, operation)
+            except Exception as e:
+                results[operation] = e
+        return results
+
+    @staticmethod
+    def _apply_one(session, operation):
+        if operation.kind == ADD:
+            session.add(operation.element)
+            session.flush()
+            return operation.element
+        return session.execute(
+            _delete_statement(operation.element)
+        ).rowcount
@@ -1,17 +1,60 @@
-from sqlalchemy import Column, Integer, String
+import re
+from operator import attrgetter
+
+from sqlalchemy import (
+    Column, DateTime, Float, ForeignKey, Integer, String, Text
+)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship, validates
 
 Base = declarative_base()
 
+_YEAR_RANGE = re.compile(r'^\s*(\d{4})\s*(?:[-–—]\s*(\d{4})?)?\s*$')
+
+
+def parse_year_range(year):
+    """
+    Parse an OMDB year into integer start and end years.
+
+    Single years such as '1999' give (1999, 1999), ranges such as
+    '2005–2010' give (2005, 2010), open ranges of running series such as
+    '2005–' give (2005, None), and anything else gives (None, None).
+    """
+    match = _YEAR_RANGE.match(year) if year else None
+    if not match:
+        return None, None
+    start, end = match.groups()
+    if end is not None:
+        return int(start), int(end)
+    if '-' in year or '–' in year or '—' in year:
+        return int(start), None
+    return int(start), int(start)
+
+
 class Movie(Base):
     __tablename__ = 'movies'
 
     id = Column(Integer, primary_key=True)
-    title = Column(String(255), nullable=False)
-    year = Column(String(4), nullable=True)
-    movie_type = Column(String(50), nullable=True)
+    title = Column(String(255), nullable=False, index=True)
+    year = Column(String(16), nullable=True, index=True)
+    movie_type = Column(String(50), nullable=True, index=True)
     imdb_id = Column(String(20), nullable=True, unique=True)
     poster = Column(String(255), nullable=True)
+    year_start = Column(Integer, nullable=True, index=True)
+    year_end = Column(Integer, nullable=True, index=True)
+
+    # Details are deleted with the movie by the database (ON DELETE CASCADE)
+    # unless they are already loaded.
+    details = relationship('MovieDetails', uselist=False,
+                           cascade='all, delete-orphan', passive_deletes=True)
+    ratings = relationship('MovieRating', cascade='all, delete-orphan',
+                           passive_deletes=True)
+
+    @validates('year')
+    def _set_year_range(self, key, year):
+        """Keep year_start and year_end in step with the OMDB year."""
+        self.year_start, self.year_end = parse_year_range(year)
+        return year
 
     def __repr__(self):
         return (
@@ -21,11 +64,158 @@ class Movie(Base):
         )
 
     def to_dict(self):
-        movie_dict = {
-            column.name: getattr(self, column.name)
-            for column in self.__table__.columns
-        }
-        return movie_dict
+        return dict(zip(MOVIE_KEYS, _movie_values(self)))
+
+
+# Column order and keys are computed once, so serializing a row is a single
+# zip instead of a column walk and a getattr per column per row.
+MOVIE_COLUMNS = tuple(Movie.__table__.columns)
+MOVIE_KEYS = tuple(column.key for column in MOVIE_COLUMNS)
+_movie_values = attrgetter(*MOVIE_KEYS)
+
+
+def movie_row_to_dict(row):
+    """Convert a row selected with MOVIE_COLUMNS into a movie dict."""
+    return dict(zip(MOVIE_KEYS, row))
+
+
+def omdb_movie_row(movie_data):
+    """Convert an OMDB search result into a row of the movies table."""
+    year = movie_data.get('Year')
+    year_start, year_end = parse_year_range(year)
+    return {
+        'title': movie_data.get('Title'),
+        'year': year,
+        'movie_type': movie_data.get('Type'),
+        'imdb_id': movie_data.get('imdbID'),
+        'poster': movie_data.get('Poster'),
+        'year_start': year_start,
+        'year_end': year_end
+    }
+
+
+def _omdb_value(value):
+    """Return None for OMDB's 'N/A' placeholder."""
+    return None if value in (None, '', 'N/A') else value
+
+
+def _omdb_number(value, kind=int):
+    """Parse OMDB numbers such as '148 min', '1,234,567' or '8.8'."""
+    value = _omdb_value(value)
+    if value is None:
+        return None
+    try:
+        return kind(value.split()[0].replace(',', ''))
+    except (ValueError, IndexError):
+        return None
+
+
+class MovieDetails(Base):
+    """Detail fields of a movie from an OMDB lookup by IMDb ID."""
+    __tablename__ = 'movie_details'
+
+    movie_id = Column(
+        Integer, ForeignKey('movies.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    rated = Column(String(16), nullable=True)
+    released = Column(String(32), nullable=True)
+    runtime_minutes = Column(Integer, nullable=True)
+    genre = Column(String(255), nullable=True)
+    director = Column(String(255), nullable=True)
+    writer = Column(String(512), nullable=True)
+    actors = Column(String(512), nullable=True)
+    plot = Column(Text, nullable=True)
+    language = Column(String(255), nullable=True)
+    country = Column(String(255), nullable=True)
+    awards = Column(String(255), nullable=True)
+    imdb_rating = Column(Float, nullable=True)
+    imdb_votes = Column(Integer, nullable=True)
+    metascore = Column(Integer, nullable=True)
+    box_office = Column(String(32), nullable=True)
+    enriched_at = Column(DateTime, nullable=True)
+
+
+class MovieRating(Base):
+    """A rating of a movie by one source, e.g. Rotten Tomatoes."""
+    __tablename__ = 'movie_ratings'
+
+    movie_id = Column(
+        Integer, ForeignKey('movies.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    source = Column(String(64), primary_key=True)
+    value = Column(String(16), nullable=False)
+
+
+class EnrichmentTask(Base):
+    """
+    A movie waiting for its OMDB details; the persisted work queue of the
+    enrichment pipeline.
+    """
+    __tablename__ = 'enrichment_queue'
+
+    id = Column(Integer, primary_key=True)
+    movie_id = Column(
+        Integer, ForeignKey('movies.id', ondelete='CASCADE'),
+        nullable=False, unique=True
+    )
+    imdb_id = Column(String(20), nullable=False)
+    status = Column(String(16), nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(255), nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+
+DETAIL_COLUMNS = tuple(
+    column for column in MovieDetails.__table__.columns
+    if column.key not in ('movie_id', 'enriched_at')
+)
+DETAIL_KEYS = tuple(column.key for column in DETAIL_COLUMNS)
+
+
+def omdb_details_row(movie_id, movie_data, enriched_at=None):
+    """Convert an OMDB lookup by ID or title into a movie_details row."""
+    return {
+        'movie_id': movie_id,
+        'rated': _omdb_value(movie_data.get('Rated')),
+        'released': _omdb_value(movie_data.get('Released')),
+        'runtime_minutes': _omdb_number(movie_data.get('Runtime')),
+        'genre': _omdb_value(movie_data.get('Genre')),
+        'director': _omdb_value(movie_data.get('Director')),
+        'writer': _omdb_value(movie_data.get('Writer')),
+        'actors': _omdb_value(movie_data.get('Actors')),
+        'plot': _omdb_value(movie_data.get('Plot')),
+        'language': _omdb_value(movie_data.get('Language')),
+        'country': _omdb_value(movie_data.get('Country')),
+        'awards': _omdb_value(movie_data.get('Awards')),
+        'imdb_rating': _omdb_number(movie_data.get('imdbRating'), float),
+        'imdb_votes': _omdb_number(movie_data.get('imdbVotes')),
+        'metascore': _omdb_number(movie_data.get('Metascore')),
+        'box_office': _omdb_value(movie_data.get('BoxOffice')),
+        'enriched_at': enriched_at
+    }
+
+
+def omdb_rating_rows(movie_id, movie_data):
+    """Convert the Ratings of an OMDB lookup into movie_ratings rows."""
+    ratings = {}
+    for rating in movie_data.get('Ratings') or []:
+        if rating.get('Source') and rating.get('Value'):
+            ratings[rating['Source']] = rating['Value']
+    return [
+        {'movie_id': movie_id, 'source': source, 'value': value}
+        for source, value in ratings.items()
+    ]
+
+
+def details_to_dict(row, ratings):
+    """Build the details of a movie from DETAIL_COLUMNS and its ratings."""
+    details = dict(zip(DETAIL_KEYS, row))
+    details['ratings'] = [
+        {'source': source, 'value': value} for source, value in ratings
+    ]
+    return details
 
 
 class User(Base):
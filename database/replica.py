@@ -0,0 +1,273 @@
+"""
+Read-only copies of the primary database for the read endpoints.
+
+Two kinds of replica are supported:
+
+    ReadOnlyReplica   a separate connection pool opened read-only on the
+                      primary file (SQLite 'mode=ro'), or on another URL such
+                      as a streaming replica of a server database.
+    SnapshotReplica   a copy of the primary file taken with the SQLite backup
+                      API and refreshed in the background, so reads never
+                      touch the file the writer locks.
+
+A snapshot older than its staleness bound is not used; reads then fall back
+to the primary until the next successful refresh.
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from database.dialects import engine_options
+
+logger = logging.getLogger(__name__)
+
+
+def sqlite_path(url):
+    """Return the file of a SQLite URL, or None for other URLs."""
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        return None
+    if not url.database or url.database == ':memory:':
+        return None
+    return url.database
+
+
+def read_only_url(url):
+    """Turn a SQLite file URL into a read-only URI connection URL."""
+    path = sqlite_path(url)
+    if path is None:
+        raise ValueError(f"Not a SQLite file URL: {url}")
+    return f'sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true'
+
+
+class ReadOnlyReplica:
+    """
+    A read-only connection pool, always as fresh as its database.
+
+    Args:
+        url (str): The URL to read from; SQLite file URLs are opened with
+            mode=ro.
+    """
+
+    def __init__(self, url):
+        if sqlite_path(url) is not None:
+            url = read_only_url(url)
+        self.url = url
+        self.engine = create_engine(url, **engine_options(url))
+        self.Session = sessionmaker(bind=self.engine)
+
+    def sessionmaker(self):
+        """Return the session factory of the replica."""
+        return self.Session
+
+    def reload_engine(self):
+        """Replace the connection pool with one using the pool settings."""
+        previous = self.engine
+        self.engine = create_engine(self.url, **engine_options(self.url))
+        self.Session = sessionmaker(bind=self.engine)
+        previous.dispose()
+
+    def close(self):
+        self.engine.dispose()
+
+
+class _SnapshotSession(Session):
+    """A session that releases its snapshot copy when closed."""
+
+    def __init__(self, snapshot, **kwargs):
+        super().__init__(**kwargs)
+        self._snapshot = snapshot
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            snapshot, self._snapshot = self._snapshot, None
+            if snapshot is not None:
+                snapshot.release()
+
+
+class _Snapshot:
+    """
+    A copy of the primary, deleted once it is retired and the last session
+    reading from it is closed.
+    """
+    __slots__ = ('Session', 'engine', 'path', 'checked_at', '_users',
+                 '_retired', '_lock')
+
+    def __init__(self, path, checked_at):
+        url = read_only_url(f'sqlite:///{path}')
+        self.engine = create_engine(url, **engine_options(url))
+        self.Session = sessionmaker(
+            bind=self.engine, class_=_SnapshotSession, snapshot=self
+        )
+        self.path = path
+        self.checked_at = checked_at
+        self._users = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            discard = self._retired and not self._users
+        if discard:
+            self._discard()
+
+    def retire(self):
+        with self._lock:
+            self._retired = True
+            discard = not self._users
+        if discard:
+            self._discard()
+
+    def _discard(self):
+        self.engine.dispose()
+        try:
+            os.remove(self.path)
+        except OSError:
+            logger.warning("Could not remove read snapshot %s", self.path)
+
+
+class SnapshotReplica:
+    """
+    A periodically refreshed copy of a SQLite database file.
+
+    Every refresh copies the primary into a new file and swaps it in, so
+    sessions already reading from the previous copy are not disturbed; that
+    copy is deleted when the last of them is closed. The copy is skipped
+    when the primary has not changed since the last one.
+
+    Args:
+        url (str): URL of the primary SQLite file.
+        refresh_interval (float): Seconds between refreshes.
+        max_staleness (float): Age in seconds after which the copy is no
+            longer used for reads.
+        directory (str, optional): Where the copies are written.
+        on_refresh (callable, optional): Called when a new copy is swapped
+            in, e.g. to drop results cached from the previous one.
+    """
+
+    def __init__(self, url, refresh_interval=1.0, max_staleness=5.0,
+                 directory=None, on_refresh=None):
+        path = sqlite_path(url)
+        if path is None:
+            raise ValueError(f"Not a SQLite file URL: {url}")
+        self.source = sqlite3.connect(path, check_same_thread=False)
+        self.refresh_interval = refresh_interval
+        self.max_staleness = max_staleness
+        self.directory = directory
+        self.on_refresh = on_refresh
+        self._current = None
+        self._data_version = None
+        # _lock guards swapping the current copy and is all opening a session
+        # waits for; _refresh_lock serializes the slow copies.
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.refresh()
+        self._thread = threading.Thread(
+            target=self._run, name='snapshot-replica', daemon=True
+        )
+        self._thread.start()
+
+    def refresh(self):
+        """
+        Copy the primary into a new file and start reading from it.
+
+        Sessions keep being opened on the previous copy while the new one is
+        written; the lock they take is only held to swap the copies.
+        """
+        with self._refresh_lock:
+            checked_at = time.monotonic()
+            data_version = self.source.execute(
+                'PRAGMA data_version'
+            ).fetchone()[0]
+            with self._lock:
+                if self._current is not None and \
+                        data_version == self._data_version:
+                    self._current.checked_at = checked_at
+                    return
+
+            fd, path = tempfile.mkstemp(
+                prefix='replica-', suffix='.db', dir=self.directory
+            )
+            os.close(fd)
+            try:
+                target = sqlite3.connect(path)
+                try:
+                    self.source.backup(target)
+                finally:
+                    target.close()
+                snapshot = _Snapshot(path, checked_at)
+            except Exception:
+                os.remove(path)
+                raise
+
+            with self._lock:
+                previous, self._current = self._current, snapshot
+                self._data_version = data_version
+        if previous is not None:
+            previous.retire()
+        if self.on_refresh is not None:
+            self.on_refresh()
+
+    def reload_engine(self):
+        """Take a new copy, opened with the current pool settings."""
+        with self._refresh_lock:
+            self._data_version = None
+        self.refresh()
+
+    def age(self):
+        """Seconds since the primary was last known to match the copy."""
+        return time.monotonic() - self._current.checked_at
+
+    def sessionmaker(self):
+        """
+        Return the session factory of the replica, or None when the current
+        copy is older than the staleness bound.
+
+        The factory opens sessions on the copy current when it is called, so
+        a factory taken before a refresh never reads a deleted copy.
+        """
+        current = self._current
+        if current is None or \
+                time.monotonic() - current.checked_at > self.max_staleness:
+            return None
+        return self._open_session
+
+    def _open_session(self):
+        with self._lock:
+            current = self._current
+            if current is None:
+                raise RuntimeError("The read snapshot is closed.")
+            current.acquire()
+        return current.Session()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("Refreshing the read snapshot failed: %s", e)
+
+    def close(self):
+        """Stop refreshing and delete the current copy."""
+        self._stop.set()
+        self._thread.join()
+        with self._refresh_lock, self._lock:
+            current, self._current = self._current, None
+            self.source.close()
+        if current is not None:
+            current.retire()
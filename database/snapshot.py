@@ -0,0 +1,392 @@
+"""
+Compact columnar snapshots of the movies table.
+
+A snapshot stores every column of the movies table in its own section, so a
+large catalog can be exported once and loaded into an empty database without
+building a Python object per row. Files are read through mmap and streamed
+into the database with Core executemany in chunks, which keeps memory usage
+bounded by the chunk size rather than by the catalog size.
+
+File layout (little-endian):
+
+    header     b'MOVSNAP1', uint32 version, uint32 column count,
+               uint64 row count
+    columns    per column: uint16 name length, name (UTF-8), 1 byte kind
+               ('i' for integers, 's' for strings)
+    sections   per column, 8-byte aligned:
+               'i': int64[row count], NULL stored as INT64_MIN
+               's': uint32 distinct strings, uint64 blob length,
+                    uint64 offsets[distinct + 1], blob (UTF-8),
+                    uint32 indexes[row count], NULL stored as 0xFFFFFFFF
+
+String columns are interned: every distinct value is stored once and rows
+refer to it by index, which keeps low-cardinality columns such as year and
+movie_type down to four bytes per row.
+
+Usage:
+    python -m database.snapshot export movies.snap
+    python -m database.snapshot import movies.snap [--chunk-size 10000]
+"""
+import argparse
+import logging
+import mmap
+import struct
+import sys
+import time
+from array import array
+
+from sqlalchemy import Integer, select
+
+from database.dialects import reset_id_sequence, search_index_deferred
+from database.models import Movie
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MOVSNAP1'
+VERSION = 1
+INT_NULL = -2 ** 63
+STRING_NULL = 0xFFFFFFFF
+DEFAULT_CHUNK_SIZE = 10000
+# String columns with at most this many distinct values are decoded once;
+# larger ones are decoded per chunk so memory stays bounded.
+DECODE_CACHE_LIMIT = 65536
+
+_HEADER = struct.Struct('<8sIIQ')
+
+
+def _check_byte_order():
+    # Sections are written and mapped in native order; the format is
+    # little-endian, which every supported deployment target is.
+    if sys.byteorder != 'little':
+        raise RuntimeError('Movie snapshots require a little-endian host.')
+
+
+def is_snapshot_file(path):
+    """Return True if the file at path is a binary movies snapshot."""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _column_kind(column):
+    return 'i' if isinstance(column.type, Integer) else 's'
+
+
+def _pad(f):
+    padding = -f.tell() % 8
+    if padding:
+        f.write(b'\0' * padding)
+
+
+def export_snapshot(engine, path, table=Movie.__table__):
+    """
+    Write every row of the table to a snapshot file.
+
+    Args:
+        engine: SQLAlchemy engine to read from.
+        path (str): Destination file.
+        table: Table to export (the movies table by default).
+
+    Returns:
+        int: The number of exported rows.
+    """
+    _check_byte_order()
+    columns = list(table.columns)
+    kinds = [_column_kind(column) for column in columns]
+    values = [
+        array('q') if kind == 'i' else array('I') for kind in kinds
+    ]
+    interned = [{} if kind == 's' else None for kind in kinds]
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(
+            select(*columns).order_by(*table.primary_key.columns)
+        )
+        for row in result:
+            for i, value in enumerate(row):
+                if kinds[i] == 'i':
+                    values[i].append(INT_NULL if value is None else value)
+                elif value is None:
+                    values[i].append(STRING_NULL)
+                else:
+                    strings = interned[i]
+                    index = strings.get(value)
+                    if index is None:
+                        index = strings[value] = len(strings)
+                    values[i].append(index)
+
+    row_count = len(values[0]) if values else 0
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(columns), row_count))
+        for column, kind in zip(columns, kinds):
+            name = column.name.encode('utf-8')
+            f.write(struct.pack('<H', len(name)) + name + kind.encode())
+        for kind, column_values, strings in zip(kinds, values, interned):
+            _pad(f)
+            if kind == 'i':
+                f.write(column_values.tobytes())
+                continue
+            encoded = [value.encode('utf-8') for value in strings]
+            offsets = array('Q', [0])
+            for item in encoded:
+                offsets.append(offsets[-1] + len(item))
+            f.write(struct.pack('<IQ', len(encoded), offsets[-1]))
+            f.write(offsets.tobytes())
+            f.write(b''.join(encoded))
+            _pad(f)
+            f.write(column_values.tobytes())
+
+    logger.info("Exported %d rows to %s", row_count, path)
+    return row_count
+
+
+class _StringColumn:
+    """Lazily decodes interned strings from the mapped snapshot."""
+
+    def __init__(self, buffer, offsets, blob_start, indexes):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.blob_start = blob_start
+        self.indexes = indexes
+        self.cache = None
+        if len(offsets) - 1 <= DECODE_CACHE_LIMIT:
+            self.cache = [
+                self._decode(i) for i in range(len(offsets) - 1)
+            ]
+
+    def _decode(self, index):
+        start = self.blob_start + self.offsets[index]
+        end = self.blob_start + self.offsets[index + 1]
+        return str(self.buffer[start:end], 'utf-8')
+
+    def values(self, start, end):
+        cache = self.cache
+        decode = self._decode
+        return [
+            None if index == STRING_NULL
+            else cache[index] if cache is not None else decode(index)
+            for index in self.indexes[start:end]
+        ]
+
+
+class _IntColumn:
+    def __init__(self, values):
+        self.data = values
+
+    def values(self, start, end):
+        return [
+            None if value == INT_NULL else value
+            for value in self.data[start:end]
+        ]
+
+
+class SnapshotReader:
+    """
+    Reads a snapshot through mmap, yielding rows in chunks of dictionaries.
+
+    Use as a context manager so the mapping and file are closed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _section(self, start, length):
+        """Return the end of a section, raising ValueError past the file."""
+        end = start + length
+        if end > len(self._buffer):
+            raise ValueError(
+                f"Snapshot '{self.path}' is truncated: a section ends at byte "
+                f"{end} of {len(self._buffer)}."
+            )
+        return end
+
+    def _parse(self):
+        """
+        Read the header and map the column sections.
+
+        Raises:
+            ValueError: If the file is not a snapshot of a supported version,
+                or its size does not match its sections, e.g. when it was
+                truncated.
+        """
+        _check_byte_order()
+        buffer = self._buffer
+        self._section(0, _HEADER.size)
+        magic, version, column_count, self.row_count = _HEADER.unpack_from(
+            buffer, 0
+        )
+        if magic != MAGIC:
+            raise ValueError(f"'{self.path}' is not a movies snapshot.")
+        if version != VERSION:
+            raise ValueError(
+                f"Unsupported snapshot version {version} in '{self.path}'."
+            )
+
+        position = _HEADER.size
+        layout = []
+        for _ in range(column_count):
+            position = self._section(position, 2)
+            (length,) = struct.unpack_from('<H', buffer, position - 2)
+            self._section(position, length + 1)
+            name = str(buffer[position:position + length], 'utf-8')
+            position += length
+            kind = chr(buffer[position])
+            position += 1
+            layout.append((name, kind))
+
+        self.columns = [name for name, _ in layout]
+        self._readers = []
+        rows = self.row_count
+        for name, kind in layout:
+            position += -position % 8
+            if kind == 'i':
+                end = self._section(position, rows * 8)
+                values = buffer[position:end].cast('q')
+                self._readers.append(_IntColumn(values))
+                position = end
+                continue
+            position = self._section(position, 12)
+            count, blob_length = struct.unpack_from(
+                '<IQ', buffer, position - 12
+            )
+            end = self._section(position, (count + 1) * 8)
+            blob_start = end
+            position = self._section(blob_start, blob_length)
+            position += -position % 8
+            end = self._section(position, rows * 4)
+            offsets = buffer[blob_start - (count + 1) * 8:blob_start].cast('Q')
+            indexes = buffer[position:end].cast('I')
+            self._readers.append(
+                _StringColumn(buffer, offsets, blob_start, indexes)
+            )
+            position = end
+
+        if position != len(buffer):
+            raise ValueError(
+                f"Snapshot '{self.path}' is {len(buffer)} bytes, but its "
+                f"sections end at byte {position}."
+            )
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+        """
+        Yield lists of row dictionaries of at most chunk_size rows.
+
+        Args:
+            chunk_size (int): Rows per chunk.
+            columns (iterable, optional): Only include these column names.
+        """
+        selected = [
+            (name, reader)
+            for name, reader in zip(self.columns, self._readers)
+            if columns is None or name in columns
+        ]
+        names = [name for name, _ in selected]
+        for start in range(0, self.row_count, chunk_size):
+            end = min(start + chunk_size, self.row_count)
+            column_values = [reader.values(start, end) for _, reader in selected]
+            yield [dict(zip(names, row)) for row in zip(*column_values)]
+
+    def close(self):
+        for reader in getattr(self, '_readers', []):
+            if isinstance(reader, _StringColumn):
+                reader.offsets.release()
+                reader.indexes.release()
+            else:
+                reader.data.release()
+        self._readers = []
+        self._buffer.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_snapshot(engine, path, chunk_size=DEFAULT_CHUNK_SIZE,
+                  keep_ids=True, table=Movie.__table__):
+    """
+    Stream a snapshot into the table using Core executemany in chunks.
+
+    All chunks are inserted in a single transaction. Columns present in the
+    snapshot but not in the table are ignored, so older and newer snapshots
+    stay loadable.
+
+    Args:
+        engine: SQLAlchemy engine to write to.
+        path (str): Snapshot file.
+        chunk_size (int): Rows per executemany batch.
+        keep_ids (bool): Keep the primary keys stored in the snapshot.
+        table: Table to load into (the movies table by default).
+
+    Returns:
+        int: The number of loaded rows.
+    """
+    start = time.perf_counter()
+    columns = set(table.columns.keys())
+    if not keep_ids:
+        columns -= {column.name for column in table.primary_key.columns}
+
+    insert = table.insert()
+    loaded = 0
+    with SnapshotReader(path) as reader, engine.begin() as conn, \
+            search_index_deferred(conn, table):
+        for rows in reader.chunks(chunk_size, columns):
+            conn.execute(insert, rows)
+            loaded += len(rows)
+        if keep_ids:
+            reset_id_sequence(conn, table)
+
+    logger.info(
+        "Loaded %d rows from %s in %.2fs",
+        loaded, path, time.perf_counter() - start
+    )
+    return loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Export or import snapshots of the movies table.'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser(
+        'export', help='Write the movies table to a snapshot file.'
+    )
+    export_parser.add_argument('path')
+
+    import_parser = subparsers.add_parser(
+        'import', help='Load a snapshot file into the movies table.'
+    )
+    import_parser.add_argument('path')
+    import_parser.add_argument('--chunk-size', type=int,
+                               default=DEFAULT_CHUNK_SIZE)
+    import_parser.add_argument('--no-ids', action='store_true',
+                               help='Let the database assign new ids.')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from database.database import DatabaseSession
+
+    engine = DatabaseSession().engine
+    if args.command == 'export':
+        rows = export_snapshot(engine, args.path)
+        print(f'Exported {rows} movies to {args.path}.')
+    else:
+        rows = load_snapshot(engine, args.path, args.chunk_size,
+                             keep_ids=not args.no_ids)
+        print(f'Imported {rows} movies from {args.path}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,92 @@
-from database.database import initialize_database
+import logging
+import threading
+
+from database.database import (
+    initialize_database_in_background, WRITE_BATCH_MS
+)
 from api.api_server import MovieRequestHandler
-from http.server import HTTPServer
+from services.config_service import CONFIG, install_reload_handler
+from services.enrichment_service import (
+    ENRICHMENT_ENABLED, start_enrichment_in_background
+)
+from http.server import HTTPServer, ThreadingHTTPServer
+
+
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    """
+    Serve requests on threads, at most `max_threads` at a time.
+
+    Further connections wait in the listen backlog until a thread finishes.
+    A limit of 0 leaves the number of threads unbounded.
+    """
+
+    def __init__(self, server_address, handler_class, max_threads=0):
+        super().__init__(server_address, handler_class)
+        self.max_threads = max_threads
+        self._active = 0
+        self._slots = threading.Condition()
+
+    def set_max_threads(self, max_threads):
+        with self._slots:
+            self.max_threads = max_threads
+            self._slots.notify_all()
+
+    def process_request(self, request, client_address):
+        with self._slots:
+            while 0 < self.max_threads <= self._active:
+                self._slots.wait()
+            self._active += 1
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._release()
+
+    def _release(self):
+        with self._slots:
+            self._active -= 1
+            self._slots.notify()
+
 
+def run(server_class=None, handler_class=MovieRequestHandler, port=None):
+    """
+    Run the HTTP server.
 
-def run(server_class=HTTPServer, handler_class=MovieRequestHandler, port=8080):
-    """Run the HTTP server."""
-    initialize_database()
+    The port is bound before the database is seeded, so liveness checks pass
+    straight away; /readyz reports when seeding has finished. With group
+    commit enabled or SERVER_THREADS set, requests are served on concurrent
+    threads, whose writes the writer thread batches. With ENRICHMENT_ENABLED
+    set, stored movies are enriched with their OMDB details once seeding has
+    finished. SIGHUP reloads the configuration.
+    """
+    port = CONFIG.PORT if port is None else port
     server_address = ('', port)
-    httpd = server_class(server_address, handler_class)
+    if server_class is None and (WRITE_BATCH_MS > 0 or CONFIG.SERVER_THREADS):
+        httpd = BoundedThreadingHTTPServer(
+            server_address, handler_class, CONFIG.SERVER_THREADS
+        )
+        CONFIG.subscribe(
+            lambda config, changed: httpd.set_max_threads(
+                config.SERVER_THREADS
+            )
+        )
+    else:
+        httpd = (server_class or HTTPServer)(server_address, handler_class)
+    install_reload_handler()
+    initialize_database_in_background()
+    if ENRICHMENT_ENABLED:
+        start_enrichment_in_background()
 
     print(f'Starting server on port {port}...')
     httpd.serve_forever()
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     run()
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+
+from services.config_service import CONFIG
+from services.metrics_service import CACHE_LOOKUPS
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    A thread-safe LRU cache with an optional time-to-live per entry.
+
+    Hits and misses are reported to the cache_lookups_total metric under the
+    cache name.
+
+    Args:
+        name (str): Name used in metrics.
+        maxsize (int): Maximum number of entries; 0 disables the cache.
+        ttl (float, optional): Seconds an entry stays valid, None for no
+            expiry.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = CACHE_LOOKUPS.labels(name, 'hit')
+        self._misses = CACHE_LOOKUPS.labels(name, 'miss')
+
+    def _lookup(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return MISSING
+        value, expires = entry
+        if expires is not None and expires <= now:
+            del self._data[key]
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for key, or default if absent."""
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+        if value is MISSING:
+            self._misses.inc()
+            return default
+        self._hits.inc()
+        return value
+
+    def get_many(self, keys):
+        """Return a dict with the cached values of the given keys."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                value = self._lookup(key, now)
+                if value is not MISSING:
+                    found[key] = value
+        self._hits.inc(len(found))
+        self._misses.inc(len(keys) - len(found))
+        return found
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries."""
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def configure(self, maxsize, ttl=None):
+        """
+        Change the size and time-to-live of the cache. Entries beyond the new
+        size are evicted; cached entries keep their expiry time.
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop a single entry."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+MOVIE_CACHE = LRUCache(
+    'movie',
+    maxsize=CONFIG.MOVIE_CACHE_SIZE,
+    ttl=CONFIG.MOVIE_CACHE_TTL
+)
+
+# Facet counts depend on the whole catalog, so they are dropped on every write
+# of this process. Writes of other API nodes or processes, and replicas that
+# lag behind the primary, are only caught up with after FACETS_CACHE_TTL.
+FACETS_CACHE = LRUCache(
+    'facets',
+    maxsize=CONFIG.FACETS_CACHE_SIZE,
+    ttl=CONFIG.FACETS_CACHE_TTL
+)
+
+# OMDB responses are fresh for OMDB_CACHE_TTL seconds. They are kept after
+# that, as long as the LRU holds them, so they can still be served while
+# OMDB is unavailable; the OMDB service checks their age itself.
+OMDB_CACHE = LRUCache(
+    'omdb',
+    maxsize=CONFIG.OMDB_CACHE_SIZE
+)
+
+
+@CONFIG.subscribe
+def _apply_config(config, changed):
+    MOVIE_CACHE.configure(config.MOVIE_CACHE_SIZE, config.MOVIE_CACHE_TTL)
+    FACETS_CACHE.configure(config.FACETS_CACHE_SIZE, config.FACETS_CACHE_TTL)
+    OMDB_CACHE.configure(config.OMDB_CACHE_SIZE)
+
+
+def notify_write():
+    """Drop cached results that are derived from the whole catalog."""
+    FACETS_CACHE.clear()
+
+
+def notify_snapshot():
+    """
+    Drop every cached result read from the database, when reads move to a
+    new snapshot. Movies read from the previous snapshot after a write was
+    committed, e.g. a deleted movie, are cached again after the write has
+    invalidated them; they are dropped here instead of living for
+    MOVIE_CACHE_TTL.
+    """
+    MOVIE_CACHE.clear()
+    FACETS_CACHE.clear()
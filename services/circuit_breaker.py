@@ -0,0 +1,164 @@
+"""
+A circuit breaker for calls to an unreliable dependency.
+
+    closed      calls go through; the outcome of the last `window` calls is
+                kept, and a call that raises or takes longer than
+                `slow_call_seconds` counts as failed
+    open        entered when at least `min_calls` calls were made and the
+                share of failed calls reaches `failure_rate`; calls fail at
+                once with CircuitOpenError for `open_seconds`
+    half-open   after `open_seconds` one trial call is let through; the
+                circuit closes if it succeeds and opens again otherwise
+
+The state of every breaker is exported as the circuit_breaker_state gauge.
+"""
+import threading
+import time
+from collections import deque
+
+from services.metrics_service import (
+    CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_REJECTED
+)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Gauge values of the states.
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a dependency keeps failing or answering slowly.
+
+    Args:
+        name (str): Name used in metrics and errors.
+        failure_rate (float): Share of failed calls (0 to 1) in the window
+            that opens the circuit.
+        slow_call_seconds (float, optional): Calls slower than this count as
+            failed even when they succeed.
+        window (int): Number of recent calls the failure rate is taken over.
+        min_calls (int): Calls needed in the window before it can open.
+        open_seconds (float): How long the circuit stays open before a trial
+            call is let through.
+    """
+
+    def __init__(self, name, failure_rate=0.5, slow_call_seconds=None,
+                 window=20, min_calls=5, open_seconds=30.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self._gauge = CIRCUIT_BREAKER_STATE.labels(name)
+        self._rejected = CIRCUIT_BREAKER_REJECTED.labels(name)
+        self._gauge.set(STATE_VALUES[CLOSED])
+
+    @property
+    def state(self):
+        """The current state, moving from open to half-open when due."""
+        with self._lock:
+            self._check_open_period(time.monotonic())
+            return self._state
+
+    def retry_after(self):
+        """Seconds until an open circuit lets a trial call through."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(
+                0.0, self._opened_at + self.open_seconds - time.monotonic()
+            )
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call func through the breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with its
+                trial call still running.
+        """
+        trial = self._before_call()
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._record(False, trial)
+            raise
+        duration = time.monotonic() - start
+        self._record(
+            self.slow_call_seconds is None or
+            duration <= self.slow_call_seconds,
+            trial
+        )
+        return result
+
+    def configure(self, failure_rate, slow_call_seconds, window, min_calls,
+                  open_seconds):
+        """Change the thresholds, keeping the state and recent calls."""
+        with self._lock:
+            self.failure_rate = failure_rate
+            self.slow_call_seconds = slow_call_seconds
+            self.min_calls = min_calls
+            self.open_seconds = open_seconds
+            if window != self._outcomes.maxlen:
+                self._outcomes = deque(self._outcomes, maxlen=window)
+
+    def reset(self):
+        """Close the circuit and forget the recorded calls."""
+        with self._lock:
+            self._outcomes.clear()
+            self._trial_running = False
+            self._set_state(CLOSED)
+
+    def _before_call(self):
+        """Admit a call, returning whether it is the half-open trial."""
+        with self._lock:
+            self._check_open_period(time.monotonic())
+            if self._state == CLOSED:
+                return False
+            if self._state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+        self._rejected.inc()
+        raise CircuitOpenError(f"The {self.name} circuit is open.")
+
+    def _record(self, succeeded, trial):
+        with self._lock:
+            if trial:
+                self._trial_running = False
+                if succeeded:
+                    self._outcomes.clear()
+                    self._set_state(CLOSED)
+                else:
+                    self._open()
+                return
+            if self._state != CLOSED:
+                return
+            self._outcomes.append(succeeded)
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and \
+                    self._outcomes.count(False) / calls >= self.failure_rate:
+                self._open()
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._set_state(OPEN)
+
+    def _check_open_period(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._set_state(HALF_OPEN)
+
+    def _set_state(self, state):
+        self._state = state
+        self._gauge.set(STATE_VALUES[state])
@@ -0,0 +1,258 @@
+"""
+Runtime configuration of the service.
+
+Every setting is declared once in SETTINGS with its type and default and is
+read from the environment variable of the same name. When CONFIG_FILE points
+to a JSON object of setting names and values, those values take precedence,
+so a setting can be retuned in production by editing the file and sending
+SIGHUP to the server, without a restart:
+
+    CONFIG.SLOW_REQUEST_MS            typed access to a setting
+    CONFIG.bind(globals(), *names)    keep module globals of the same names
+                                      up to date across reloads
+    CONFIG.subscribe(callback)        called with (config, changed names)
+                                      after every reload, e.g. to resize a
+                                      cache or swap a connection pool
+
+Settings marked restart-only (the database URL, the port, ...) keep their
+value on reload; a change is logged and applied at the next start.
+"""
+import json
+import logging
+import os
+import signal
+import threading
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = os.getenv('CONFIG_FILE')
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ['1', 'true', 'yes']
+
+
+class Setting:
+    """
+    A configuration setting.
+
+    Args:
+        name (str): Name of the setting and of its environment variable.
+        kind (type): int, float, str or bool.
+        default: Value used when the setting is not configured.
+        reloadable (bool): Whether a reload applies a changed value.
+        secret (bool): Keep the value out of logs.
+    """
+    __slots__ = ('name', 'kind', 'default', 'reloadable', 'secret')
+
+    def __init__(self, name, kind, default=None, reloadable=True,
+                 secret=False):
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.reloadable = reloadable
+        self.secret = secret
+
+    def parse(self, value):
+        """Convert a configured value, raising ValueError if invalid."""
+        if value is None or value == '':
+            return self.default
+        if self.kind is bool:
+            return _parse_bool(value)
+        return self.kind(value)
+
+
+SETTINGS = (
+    # Server
+    Setting('PORT', int, 8080, reloadable=False),
+    Setting('SERVER_THREADS', int, 0),
+    Setting('SECRET_KEY', str, secret=True),
+    # Database
+    Setting('DATABASE_URL', str, reloadable=False),
+    Setting('TEST_DATABASE_URL', str, reloadable=False),
+    Setting('TESTING_MODE', bool, reloadable=False),
+    Setting('SEED_SNAPSHOT', str, reloadable=False),
+    Setting('MOVIE_TITLES', str, 'Andalucia,Sevilla,Malaga'),
+    Setting('DB_POOL_SIZE', int, 5),
+    Setting('DB_MAX_OVERFLOW', int, 10),
+    Setting('DB_POOL_TIMEOUT', float, 30.0),
+    Setting('DB_POOL_RECYCLE', int, 1800),
+    Setting('SQLITE_BUSY_TIMEOUT', float, 5.0),
+    Setting('WRITE_BATCH_MS', float, 0.0, reloadable=False),
+    Setting('WRITE_BATCH_SIZE', int, 100),
+    Setting('DATABASE_READ_MODE', str, 'primary', reloadable=False),
+    Setting('DATABASE_READ_URL', str, reloadable=False),
+    Setting('READ_REFRESH_INTERVAL', float, 1.0),
+    Setting('READ_MAX_STALENESS', float, 5.0),
+    # Caches and limits
+    Setting('MOVIE_CACHE_SIZE', int, 4096),
+    Setting('MOVIE_CACHE_TTL', float, 60.0),
+    Setting('FACETS_CACHE_SIZE', int, 256),
+    Setting('FACETS_CACHE_TTL', float, 30.0),
+    Setting('OMDB_CACHE_SIZE', int, 1024),
+    Setting('OMDB_CACHE_TTL', float, 3600.0),
+    Setting('BATCH_LOOKUP_MAX', int, 100),
+    Setting('DEFERRED_ADD_MAX', int, 1000),
+    # OMDB
+    Setting('OMDB_TIMEOUT', float, 5.0),
+    Setting('OMDB_BREAKER_FAILURE_RATE', float, 0.5),
+    Setting('OMDB_BREAKER_SLOW_CALL_MS', float, 2000.0),
+    Setting('OMDB_BREAKER_WINDOW', int, 20),
+    Setting('OMDB_BREAKER_MIN_CALLS', int, 5),
+    Setting('OMDB_BREAKER_OPEN_SECONDS', float, 30.0),
+    Setting('OMDB_RATE_LIMIT', float, 5.0),
+    Setting('ENRICHMENT_ENABLED', bool, False, reloadable=False),
+    Setting('ENRICH_WORKERS', int, 4, reloadable=False),
+    Setting('ENRICH_BATCH_SIZE', int, 50),
+    Setting('ENRICH_MAX_ATTEMPTS', int, 3),
+    Setting('ENRICH_INTERVAL', float, 60.0),
+    # Tracing
+    Setting('TRACE_SAMPLE_RATE', float, 0.0),
+    Setting('SLOW_REQUEST_MS', float, 500.0),
+    Setting('TRACE_PROFILE_DIR', str),
+)
+
+
+class Config:
+    """
+    Typed settings read from the environment and an optional JSON file.
+
+    Args:
+        settings (tuple): The Setting declarations.
+        environ (dict, optional): Environment to read; os.environ by default.
+        path (str, optional): JSON file whose values override the
+            environment.
+
+    Raises:
+        ValueError: If a configured value is invalid.
+    """
+
+    def __init__(self, settings=SETTINGS, environ=None, path=None):
+        self._settings = {setting.name: setting for setting in settings}
+        self._environ = os.environ if environ is None else environ
+        self.path = path
+        self._values = self._load()
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"Unknown setting '{name}'.") from None
+
+    def _load(self):
+        configured = {
+            name: self._environ.get(name) for name in self._settings
+        }
+        if self.path:
+            with open(self.path) as config_file:
+                overrides = json.load(config_file)
+            if not isinstance(overrides, dict):
+                raise ValueError(f"Config file '{self.path}' must contain a "
+                                 f"JSON object.")
+            unknown = set(overrides) - set(self._settings)
+            if unknown:
+                raise ValueError(f"Unknown settings in '{self.path}': "
+                                 f"{', '.join(sorted(unknown))}")
+            configured.update(overrides)
+
+        values = {}
+        for name, setting in self._settings.items():
+            try:
+                values[name] = setting.parse(configured[name])
+            except (TypeError, ValueError):
+                raise ValueError(
+                    f"Invalid value for {name}: {configured[name]!r}"
+                ) from None
+        return values
+
+    def subscribe(self, callback):
+        """Call callback(config, changed) after every reload."""
+        self._subscribers.append(callback)
+        return callback
+
+    def bind(self, namespace, *names):
+        """
+        Update the given names in a module namespace, usually globals(), to
+        their settings after every reload.
+        """
+
+        def update(config, changed):
+            for name in changed & set(names):
+                namespace[name] = config._values[name]
+
+        self.subscribe(update)
+
+    def reload(self):
+        """
+        Read the settings again and apply the changed reloadable ones.
+
+        An invalid configuration is logged and leaves every setting as it
+        was. Subscribers are called in the order they subscribed.
+
+        Returns:
+            set: The names of the settings that changed.
+        """
+        # Imported here, as the metrics module depends on this one through
+        # the trace service.
+        from services.metrics_service import CONFIG_RELOADS
+
+        with self._lock:
+            try:
+                loaded = self._load()
+            except (OSError, ValueError) as e:
+                CONFIG_RELOADS.labels('error').inc()
+                logger.error("Configuration not reloaded: %s", e)
+                return set()
+
+            values = dict(self._values)
+            changed = set()
+            for name, value in loaded.items():
+                if value == values[name]:
+                    continue
+                setting = self._settings[name]
+                if not setting.reloadable:
+                    logger.warning("%s changed; restart to apply it", name)
+                    continue
+                logger.info(
+                    "%s changed to %s", name,
+                    '***' if setting.secret else repr(value)
+                )
+                values[name] = value
+                changed.add(name)
+            self._values = values
+
+            for callback in self._subscribers:
+                try:
+                    callback(self, changed)
+                except Exception as e:
+                    logger.error("Applying the configuration failed: %s", e)
+            CONFIG_RELOADS.labels('success').inc()
+            return changed
+
+
+CONFIG = Config(path=CONFIG_FILE)
+
+
+def install_reload_handler(config=CONFIG):
+    """
+    Reload the configuration when the process receives SIGHUP.
+
+    The reload runs on its own thread, so the signal never lands while the
+    interrupted thread holds a lock the reload needs. Must be called from
+    the main thread; does nothing on platforms without SIGHUP.
+    """
+    if not hasattr(signal, 'SIGHUP'):
+        return
+
+    def handle(signum, frame):
+        threading.Thread(
+            target=config.reload, name='config-reload', daemon=True
+        ).start()
+
+    signal.signal(signal.SIGHUP, handle)
@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredQueue:
+    """
+    Retry work that failed because a dependency is unavailable.
+
+    Deferred keys are handed to `handler` one at a time on a background
+    thread, oldest first, started when the first key is deferred. While the
+    handler raises one of `retry_on` the key stays queued and the thread
+    waits for the circuit breaker to let a trial call through, so the first
+    retry doubles as the probe that closes the circuit. Any other error drops
+    the key.
+
+    Args:
+        name (str): Name of the background thread.
+        handler (callable): Called with a deferred key.
+        breaker (CircuitBreaker): Breaker of the dependency.
+        retry_on (tuple): Exception types meaning "still unavailable".
+        maxsize (int): Maximum number of deferred keys.
+        retry_interval (float): Minimum seconds between failed attempts.
+        gauge (Gauge, optional): Set to the number of deferred keys.
+    """
+
+    def __init__(self, name, handler, breaker, retry_on, maxsize=1000,
+                 retry_interval=5.0, gauge=None):
+        self.name = name
+        self.handler = handler
+        self.breaker = breaker
+        self.retry_on = retry_on
+        self.maxsize = maxsize
+        self.retry_interval = retry_interval
+        self.gauge = gauge
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, key):
+        """
+        Defer a key; keys already queued are not added twice.
+
+        Returns:
+            bool: False if the queue is full and the key was not deferred.
+        """
+        with self._lock:
+            if key not in self._keys:
+                if len(self._keys) >= self.maxsize:
+                    return False
+                self._keys[key] = None
+                self._update_gauge()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._thread.start()
+        return True
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def _update_gauge(self):
+        if self.gauge is not None:
+            self.gauge.set(len(self._keys))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._keys:
+                    self._thread = None
+                    return
+                key = next(iter(self._keys))
+            time.sleep(self.breaker.retry_after())
+            try:
+                self.handler(key)
+            except self.retry_on as e:
+                logger.info("Deferred %r is still waiting: %s", key, e)
+                time.sleep(
+                    max(self.breaker.retry_after(), self.retry_interval)
+                )
+                continue
+            except Exception as e:
+                logger.error("Deferred %r failed and is dropped: %s", key, e)
+            with self._lock:
+                self._keys.pop(key, None)
+                self._update_gauge()
@@ -0,0 +1,338 @@
+"""
+Enrichment of stored movies with their OMDB details.
+
+Seeding stores only the fields of OMDB search results. The enrichment
+pipeline fills the movie_details and movie_ratings tables from lookups by
+IMDb ID:
+
+    enqueue_missing     adds every movie with an imdb_id but no details to
+                        the enrichment_queue table
+    EnrichmentPipeline  takes pending tasks in batches, fetches them on a
+                        bounded thread pool within the OMDB rate limit and
+                        writes the results of a batch in one transaction
+
+The queue lives in the database, so a restarted process carries on with the
+tasks still pending; a crash in the middle of a batch at worst fetches that
+batch again. Run the pipeline on one node only, or as a separate process:
+
+    python -m services.enrichment_service
+"""
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, exists, literal, select
+
+from database.dialects import insert_ignoring_duplicates
+from database.models import (
+    EnrichmentTask, Movie, MovieDetails, MovieRating, omdb_details_row,
+    omdb_rating_rows
+)
+from services.cache_service import MOVIE_CACHE
+from services.circuit_breaker import OPEN
+from services.config_service import CONFIG
+from services.metrics_service import ENRICHMENT_TASKS
+from services.omdb_service import (
+    OMDBService, OMDBUnavailableError, OMDB_BREAKER
+)
+from services.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_ENABLED = CONFIG.ENRICHMENT_ENABLED
+ENRICH_WORKERS = CONFIG.ENRICH_WORKERS
+OMDB_RATE_LIMIT = CONFIG.OMDB_RATE_LIMIT
+ENRICH_BATCH_SIZE = CONFIG.ENRICH_BATCH_SIZE
+ENRICH_MAX_ATTEMPTS = CONFIG.ENRICH_MAX_ATTEMPTS
+ENRICH_INTERVAL = CONFIG.ENRICH_INTERVAL
+CONFIG.bind(globals(), 'OMDB_RATE_LIMIT', 'ENRICH_BATCH_SIZE',
+            'ENRICH_MAX_ATTEMPTS', 'ENRICH_INTERVAL')
+
+# The pipeline started by start_enrichment_in_background, retuned on reload.
+_background_pipeline = None
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+# Returned by a lookup skipped or failed because OMDB is unavailable; its task
+# stays pending with its attempts unchanged.
+UNAVAILABLE = object()
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue_missing(engine):
+    """
+    Queue every movie that has an imdb_id but neither details nor a task.
+
+    Returns:
+        int: The number of movies queued.
+    """
+    movies = Movie.__table__
+    queue = EnrichmentTask.__table__
+    missing = (
+        select(movies.c.id, movies.c.imdb_id, literal(PENDING),
+               literal(0), literal(_now(), queue.c.updated_at.type))
+        .where(movies.c.imdb_id.isnot(None))
+        .where(~exists().where(MovieDetails.movie_id == movies.c.id))
+        .where(~exists().where(queue.c.movie_id == movies.c.id))
+    )
+    statement = insert_ignoring_duplicates(
+        queue, engine.dialect.name
+    ).from_select(
+        ['movie_id', 'imdb_id', 'status', 'attempts', 'updated_at'], missing
+    )
+    with engine.begin() as conn:
+        queued = conn.execute(statement).rowcount
+    if queued:
+        logger.info("Queued %d movies for enrichment", queued)
+    return queued
+
+
+class EnrichmentPipeline:
+    """
+    Fetch the OMDB details of queued movies and store them.
+
+    Args:
+        engine (Engine): Engine of the movie database.
+        omdb (OMDBService, optional): Client used for the lookups.
+        workers (int, optional): Number of concurrent OMDB lookups.
+        rate (float, optional): OMDB lookups allowed per second across all
+            workers.
+        batch_size (int, optional): Tasks fetched and written per
+            transaction.
+        max_attempts (int, optional): Failed lookups after which a task is
+            given up.
+
+    Unset arguments default to the ENRICH_* and OMDB_RATE_LIMIT settings.
+    """
+
+    def __init__(self, engine, omdb=None, workers=None, rate=None,
+                 batch_size=None, max_attempts=None):
+        workers = workers or ENRICH_WORKERS
+        self.engine = engine
+        self.omdb = omdb or OMDBService()
+        self.batch_size = batch_size or ENRICH_BATCH_SIZE
+        self.max_attempts = max_attempts or ENRICH_MAX_ATTEMPTS
+        self.limiter = RateLimiter(
+            OMDB_RATE_LIMIT if rate is None else rate, burst=workers
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='enrichment'
+        )
+
+    def run_once(self):
+        """
+        Enrich one batch of pending movies.
+
+        Once a lookup finds OMDB unavailable, e.g. because the circuit
+        breaker opened during the batch, the remaining lookups are skipped
+        and their tasks left pending without using up an attempt.
+
+        Returns:
+            int: The number of tasks processed; 0 when the queue is empty
+            or OMDB is unavailable.
+        """
+        if OMDB_BREAKER.state == OPEN:
+            # Lookups would fail at once and use up the attempts of tasks.
+            return 0
+        with self.engine.connect() as conn:
+            tasks = conn.execute(
+                select(EnrichmentTask.id, EnrichmentTask.movie_id,
+                       EnrichmentTask.imdb_id, EnrichmentTask.attempts)
+                .where(EnrichmentTask.status == PENDING)
+                .order_by(EnrichmentTask.attempts, EnrichmentTask.id)
+                .limit(self.batch_size)
+            ).all()
+        if not tasks:
+            return 0
+
+        outage = threading.Event()
+        results = list(self._executor.map(
+            lambda task: self._fetch(task, outage), tasks
+        ))
+        processed = [(task, result) for task, result in zip(tasks, results)
+                     if result is not UNAVAILABLE]
+        if outage.is_set():
+            logger.warning("OMDB is unavailable; %d movies stay queued",
+                           len(tasks) - len(processed))
+        if processed:
+            self._store(*zip(*processed))
+        return len(processed)
+
+    def run(self):
+        """Queue the movies missing details and enrich all of them."""
+        enqueue_missing(self.engine)
+        processed = 0
+        while True:
+            count = self.run_once()
+            if not count:
+                return processed
+            processed += count
+
+    def run_forever(self, interval=None, stop=None):
+        """
+        Run the pipeline every `interval` seconds, ENRICH_INTERVAL by
+        default, until `stop` is set.
+        """
+        stop = stop or threading.Event()
+        while True:
+            try:
+                self.run()
+            except Exception as e:
+                logger.error("Enrichment run failed: %s", e)
+            if stop.wait(ENRICH_INTERVAL if interval is None else interval):
+                return
+
+    def close(self):
+        self._executor.shutdown()
+
+    def _fetch(self, task, outage):
+        """
+        Look a movie up by IMDb ID; errors are returned, not raised. Returns
+        UNAVAILABLE, and sets `outage`, once OMDB is unavailable.
+        """
+        if outage.is_set() or OMDB_BREAKER.state == OPEN:
+            outage.set()
+            return UNAVAILABLE
+        self.limiter.acquire()
+        if outage.is_set():
+            return UNAVAILABLE
+        try:
+            return self.omdb.fetch_movie_by_id(task.imdb_id)
+        except OMDBUnavailableError:
+            outage.set()
+            return UNAVAILABLE
+        except Exception as e:
+            return e
+
+    def _store(self, tasks, results):
+        """Write the details and task states of a batch in one transaction."""
+        now = _now()
+        updates = []
+        details = []
+        ratings = []
+        for task, result in zip(tasks, results):
+            if isinstance(result, Exception) or result is None:
+                # OMDB also answers with an error, and so None, when the
+                # daily request limit is reached, so not found is retried.
+                attempts = task.attempts + 1
+                status = PENDING if attempts < self.max_attempts else FAILED
+                error = 'Movie not found in OMDB.' if result is None \
+                    else str(result)[:255]
+                updates.append({
+                    'task_id': task.id, 'new_status': status,
+                    'new_attempts': attempts, 'error': error
+                })
+                ENRICHMENT_TASKS.labels(
+                    'retry' if status == PENDING else FAILED
+                ).inc()
+                continue
+            updates.append({
+                'task_id': task.id, 'new_status': DONE,
+                'new_attempts': task.attempts + 1, 'error': None
+            })
+            details.append(omdb_details_row(task.movie_id, result, now))
+            ratings.extend(omdb_rating_rows(task.movie_id, result))
+            ENRICHMENT_TASKS.labels(DONE).inc()
+
+        queue = EnrichmentTask.__table__
+        details_table = MovieDetails.__table__
+        ratings_table = MovieRating.__table__
+        enriched = [row['movie_id'] for row in details]
+        with self.engine.begin() as conn:
+            if enriched:
+                # Movies deleted while their details were fetched are
+                # skipped; their tasks are deleted with them.
+                existing = set(conn.execute(
+                    select(Movie.id).where(Movie.id.in_(enriched))
+                ).scalars())
+                details = [row for row in details
+                           if row['movie_id'] in existing]
+                ratings = [row for row in ratings
+                           if row['movie_id'] in existing]
+                conn.execute(details_table.delete().where(
+                    details_table.c.movie_id.in_(enriched)
+                ))
+                conn.execute(ratings_table.delete().where(
+                    ratings_table.c.movie_id.in_(enriched)
+                ))
+                if details:
+                    conn.execute(details_table.insert(), details)
+                if ratings:
+                    conn.execute(ratings_table.insert(), ratings)
+            conn.execute(
+                queue.update()
+                .where(queue.c.id == bindparam('task_id'))
+                .values(status=bindparam('new_status'),
+                        attempts=bindparam('new_attempts'),
+                        last_error=bindparam('error'),
+                        updated_at=now),
+                updates
+            )
+
+        for movie_id in enriched:
+            MOVIE_CACHE.invalidate(movie_id)
+
+
+@CONFIG.subscribe
+def _apply_config(config, changed):
+    pipeline = _background_pipeline
+    if pipeline is not None:
+        pipeline.limiter.rate = config.OMDB_RATE_LIMIT
+        pipeline.batch_size = config.ENRICH_BATCH_SIZE
+        pipeline.max_attempts = config.ENRICH_MAX_ATTEMPTS
+
+
+def start_enrichment_in_background(interval=None):
+    """
+    Run the enrichment pipeline in a daemon thread once the database has
+    been seeded.
+
+    Returns:
+        threading.Thread: The started enrichment thread.
+    """
+    from database.database import DatabaseSession, database_ready
+
+    def enrich():
+        global _background_pipeline
+        database_ready.wait()
+        _background_pipeline = EnrichmentPipeline(DatabaseSession().engine)
+        _background_pipeline.run_forever(interval)
+
+    thread = threading.Thread(target=enrich, name='enrichment', daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Fetch the OMDB details of movies stored without them.'
+    )
+    parser.add_argument('--workers', type=int, default=ENRICH_WORKERS)
+    parser.add_argument('--rate', type=float, default=OMDB_RATE_LIMIT,
+                        help='OMDB lookups per second.')
+    parser.add_argument('--batch-size', type=int, default=ENRICH_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from database.database import DatabaseSession
+
+    pipeline = EnrichmentPipeline(
+        DatabaseSession().engine, workers=args.workers, rate=args.rate,
+        batch_size=args.batch_size
+    )
+    try:
+        processed = pipeline.run()
+    finally:
+        pipeline.close()
+    print(f'Processed {processed} movies.')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,21 @@
-import jwt
 import datetime
-import os
 from functools import wraps
 from http import HTTPStatus
 
-SECRET_KEY = os.getenv('SECRET_KEY')
+from services.config_service import CONFIG
+
+# Reloadable, e.g. to rotate the key; tokens signed with the previous key are
+# then rejected.
+SECRET_KEY = CONFIG.SECRET_KEY
+CONFIG.bind(globals(), 'SECRET_KEY')
 
 
 def generate_jwt(user_id):
     """Generates a JWT token for the specified user."""
+    import jwt
+
     payload = {
-        'sub': user_id,
+        'sub': str(user_id),
         'iat': datetime.datetime.utcnow(),
         'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)
     }
@@ -19,6 +24,8 @@ def generate_jwt(user_id):
 
 def verify_jwt(token):
     """Verifies a JWT token and returns the user ID if valid."""
+    import jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
         return payload['sub']
@@ -0,0 +1,350 @@
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from services.trace_service import span
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0
+)
+
+
+class _CounterChild:
+    """A single labelled counter value."""
+
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    """A single labelled gauge value."""
+
+    __slots__ = ()
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class _HistogramChild:
+    """A single labelled histogram with cumulative buckets."""
+
+    __slots__ = ('_lock', 'buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if index < len(self.counts):
+                self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Return a context manager observing the elapsed wall time."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child):
+        self._child = child
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _Metric:
+    """
+    Base class for a labelled metric family.
+
+    Children are created once per label combination under the family lock;
+    afterwards lookups are plain dict reads and each update only holds the
+    child's own lock, so unrelated routes never contend with each other.
+    """
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Return the child metric for the given label values."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(
+                    f"Metric '{self.name}' expects labels {self.labelnames}."
+                )
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _format_labels(self, values, extra=None):
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        body = ','.join(
+            f'{name}="{_escape(value)}"' for name, value in pairs
+        )
+        return '{' + body + '}'
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        """Render the metric family in the Prometheus text format."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.metric_type}'
+        ]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """A monotonically increasing counter."""
+    metric_type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            yield (f'{self.name}{self._format_labels(values)} '
+                   f'{_format_value(child.value)}')
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+    metric_type = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def dec(self, amount=1.0):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    """A histogram of observed values, typically latencies in seconds."""
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = self._format_labels(values, ('le', repr(bound)))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = self._format_labels(values, ('le', '+Inf'))
+            yield f'{self.name}_bucket{labels} {count}'
+            labels = self._format_labels(values)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class MetricsRegistry:
+    """Holds every metric family exposed on the /metrics endpoint."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' already exists.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=DEFAULT_BUCKETS):
+        return self.register(
+            Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Render all registered metrics in the Prometheus text format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def _format_value(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total',
+    'Total HTTP requests by method, route and status.',
+    ('method', 'route', 'status')
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by method, route and status.',
+    ('method', 'route', 'status')
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    'http_requests_in_flight',
+    'HTTP requests currently being served.'
+)
+API_OPERATION_DURATION = REGISTRY.histogram(
+    'api_operation_duration_seconds',
+    'Time spent in MovieAPI operations.',
+    ('operation',)
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    'db_query_duration_seconds',
+    'Database statement execution time by statement kind.',
+    ('statement',)
+)
+DB_ERRORS = REGISTRY.counter(
+    'db_errors_total',
+    'Database statements that raised an error.',
+    ('statement',)
+)
+DB_WRITE_BATCH_SIZE = REGISTRY.histogram(
+    'db_write_batch_size',
+    'Writes applied per group commit transaction.',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+OMDB_REQUEST_DURATION = REGISTRY.histogram(
+    'omdb_request_duration_seconds',
+    'OMDB API call latency by lookup kind.',
+    ('lookup',)
+)
+OMDB_ERRORS = REGISTRY.counter(
+    'omdb_errors_total',
+    'OMDB API calls that failed, by lookup kind and reason.',
+    ('lookup', 'reason')
+)
+OMDB_STALE_RESPONSES = REGISTRY.counter(
+    'omdb_stale_responses_total',
+    'Expired cached OMDB responses served because OMDB was unavailable.',
+    ('lookup',)
+)
+OMDB_DEFERRED_ADDS = REGISTRY.gauge(
+    'omdb_deferred_adds',
+    'Movie additions waiting for OMDB to become available again.'
+)
+CIRCUIT_BREAKER_STATE = REGISTRY.gauge(
+    'circuit_breaker_state',
+    'State of a circuit breaker: 0 closed, 1 half-open, 2 open.',
+    ('name',)
+)
+CIRCUIT_BREAKER_REJECTED = REGISTRY.counter(
+    'circuit_breaker_rejected_total',
+    'Calls rejected by an open circuit breaker.',
+    ('name',)
+)
+ENRICHMENT_TASKS = REGISTRY.counter(
+    'enrichment_tasks_total',
+    'Movies processed by the OMDB enrichment pipeline, by result.',
+    ('result',)
+)
+CONFIG_RELOADS = REGISTRY.counter(
+    'config_reloads_total',
+    'Configuration reloads by result (success or error).',
+    ('result',)
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'cache_lookups_total',
+    'Cache lookups by cache name and result (hit or miss).',
+    ('cache', 'result')
+)
+
+
+def observe_operation(operation):
+    """
+    Decorator recording the duration of a MovieAPI operation, both in the
+    metrics and as a span of the current request trace.
+    """
+
+    def decorator(func):
+        child = API_OPERATION_DURATION.labels(operation)
+        span_name = f'api.{operation}'
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with child.time(), span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
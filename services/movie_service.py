@@ -1,10 +1,16 @@
 import logging
-import os
-from services.omdb_service import OMDBService
+from services.config_service import CONFIG
+from services.omdb_service import OMDBService, OMDBUnavailableError
 
 logger = logging.getLogger(__name__)
 
-MOVIES_TITLES_DEFAULT = os.getenv('MOVIE_TITLES', 'Andalucia,Sevilla,Malaga')
+MOVIES_TITLES_DEFAULT = CONFIG.MOVIE_TITLES
+
+
+@CONFIG.subscribe
+def _apply_config(config, changed):
+    global MOVIES_TITLES_DEFAULT
+    MOVIES_TITLES_DEFAULT = config.MOVIE_TITLES
 
 
 def fetch_movies(title, total_movies=100, year=None, movie_type=None):
@@ -23,7 +29,8 @@ def fetch_movies(title, total_movies=100, year=None, movie_type=None):
 
     Returns:
         list: A list of dictionaries containing movie information up to the
-        specified total_movies.
+        specified total_movies. When OMDB returns an error or is unavailable,
+        the movies fetched so far.
     """
     movies = []
     page = 1
@@ -44,7 +51,7 @@ def fetch_movies(title, total_movies=100, year=None, movie_type=None):
                 response.get('next_page') is None):
                 break
             page = response['next_page']
-        except ValueError as e:
+        except (ValueError, OMDBUnavailableError) as e:
             logger.error("Error fetching movies: %s", e)
             break
     return movies[:total_movies]
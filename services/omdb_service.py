@@ -1,9 +1,47 @@
 import os
-import requests
+import time
 import logging
 
+from services.cache_service import OMDB_CACHE, MISSING
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.config_service import CONFIG
+from services.metrics_service import (
+    OMDB_REQUEST_DURATION, OMDB_ERRORS, OMDB_STALE_RESPONSES
+)
+from services.trace_service import span
+
 logger = logging.getLogger(__name__)
 
+OMDB_TIMEOUT = CONFIG.OMDB_TIMEOUT
+OMDB_CACHE_TTL = CONFIG.OMDB_CACHE_TTL
+CONFIG.bind(globals(), 'OMDB_TIMEOUT', 'OMDB_CACHE_TTL')
+
+
+def _breaker_settings(config):
+    return {
+        'failure_rate': config.OMDB_BREAKER_FAILURE_RATE,
+        'slow_call_seconds': config.OMDB_BREAKER_SLOW_CALL_MS / 1000.0,
+        'window': config.OMDB_BREAKER_WINDOW,
+        'min_calls': config.OMDB_BREAKER_MIN_CALLS,
+        'open_seconds': config.OMDB_BREAKER_OPEN_SECONDS
+    }
+
+
+# Every OMDB call goes through this breaker, so an outage costs one timeout
+# per window instead of one per request.
+OMDB_BREAKER = CircuitBreaker('omdb', **_breaker_settings(CONFIG))
+
+
+@CONFIG.subscribe
+def _apply_config(config, changed):
+    OMDB_BREAKER.configure(**_breaker_settings(config))
+
+
+# IOError is the base of requests' exceptions, so code catching those, or
+# IOError, still catches this, without importing requests to subclass one.
+class OMDBUnavailableError(IOError):
+    """OMDB failed to answer, or its circuit breaker is open."""
+
 
 class OMDBService:
     """
@@ -30,7 +68,9 @@ class OMDBService:
             dict: A dictionary containing movie information.
 
         Raises:
-            ValueError: If the API response indicates an error.
+            OMDBUnavailableError: If OMDB failed to answer, including with a
+                response that is not valid JSON, and no cached response is
+                available.
         """
         params = {
             'i': imdb_id,
@@ -51,7 +91,9 @@ class OMDBService:
             dict: A dictionary containing movie information.
 
         Raises:
-            ValueError: If the API response indicates an error.
+            OMDBUnavailableError: If OMDB failed to answer, including with a
+                response that is not valid JSON, and no cached response is
+                available.
         """
         params = {
             't': title,
@@ -81,6 +123,9 @@ class OMDBService:
 
         Raises:
             ValueError: If the API response indicates an error.
+            OMDBUnavailableError: If OMDB failed to answer, including with a
+                response that is not valid JSON, and no cached response is
+                available.
         """
         params = {
             's': title,
@@ -116,6 +161,10 @@ class OMDBService:
         """
         Helper function to fetch movie data from OMDB API.
 
+        Responses are cached for OMDB_CACHE_TTL seconds. When OMDB fails or
+        its circuit breaker is open, an expired cached response is served
+        instead, if there is one.
+
         Args:
             params (dict): Parameters to pass to the API.
 
@@ -123,23 +172,70 @@ class OMDBService:
             dict or None: API response data or None if no movie is found.
 
         Raises:
-            ValueError: If the API response indicates an error other than movie not found.
+            OMDBUnavailableError: If OMDB failed to answer, or its circuit
+                is open, and no cached response is available.
         """
-        try:
-            response = requests.get(self.BASE_URL, params=params)
-            response.raise_for_status()
-
-            data = response.json()
+        lookup = self._lookup_kind(params)
+        key = tuple(sorted(
+            (name, value) for name, value in params.items()
+            if name != 'apikey'
+        ))
+        cached = OMDB_CACHE.get(key)
+        if cached is not MISSING and \
+                time.monotonic() - cached[1] < OMDB_CACHE_TTL:
+            return cached[0]
 
+        try:
+            data = OMDB_BREAKER.call(self._request, lookup, params)
+        except CircuitOpenError as e:
+            OMDB_ERRORS.labels(lookup, 'circuit_open').inc()
+            error = OMDBUnavailableError(str(e))
+        except OMDBUnavailableError as e:
+            error = e
+        else:
             if 'Error' in data:
+                OMDB_ERRORS.labels(lookup, 'api').inc()
                 logger.error("Error fetching data: %s", data['Error'])
                 return None
-
+            OMDB_CACHE.set(key, (data, time.monotonic()))
             return data
 
-        except requests.RequestException as e:
-            logger.error("Request failed: %s", e)
-            raise
+        if cached is MISSING:
+            raise error
+        OMDB_STALE_RESPONSES.labels(lookup).inc()
+        logger.warning("OMDB is unavailable, serving a cached %s lookup: %s",
+                       lookup, error)
+        return cached[0]
+
+    def _request(self, lookup, params):
+        """Call OMDB once, raising OMDBUnavailableError on any failure."""
+        # Imported on the first OMDB call rather than at module level: it is
+        # slow to import and most requests are served without OMDB.
+        import requests
+
+        try:
+            with OMDB_REQUEST_DURATION.labels(lookup).time(), \
+                    span(f'omdb.{lookup}'):
+                response = requests.get(self.BASE_URL, params=params,
+                                        timeout=OMDB_TIMEOUT)
+                response.raise_for_status()
+
+                return response.json()
+
         except ValueError as ve:
+            OMDB_ERRORS.labels(lookup, 'decode').inc()
             logger.error("ValueError: %s", ve)
-            raise
+            raise OMDBUnavailableError(str(ve)) from ve
+        except requests.RequestException as e:
+            OMDB_ERRORS.labels(lookup, 'http').inc()
+            logger.error("Request failed: %s", e)
+            raise OMDBUnavailableError(str(e)) from e
+
+    @staticmethod
+    def _lookup_kind(params):
+        """Return the metrics label for the kind of OMDB lookup."""
+        if 's' in params:
+            return 'search'
+        if 'i' in params:
+            return 'id'
+        return 'title'
@@ -0,0 +1,44 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    A thread-safe token bucket limiting calls to a rate per second.
+
+    Every call takes a token; tokens are refilled at `rate` per second up to
+    `burst`, so short bursts are allowed while the average stays within the
+    rate.
+
+    Args:
+        rate (float): Calls allowed per second; 0 or less disables the limit.
+        burst (int): Maximum number of calls allowed at once.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token, returning how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until the next call is within the rate."""
+        if self.rate <= 0:
+            return
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,224 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+
+from services.config_service import CONFIG
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = 'X-Trace'
+
+# Why a request is traced, as returned by should_trace.
+TRACED_BY_HEADER = 'header'
+TRACED_BY_SAMPLING = 'sampling'
+TRACE_SAMPLE_RATE = CONFIG.TRACE_SAMPLE_RATE
+SLOW_REQUEST_MS = CONFIG.SLOW_REQUEST_MS
+TRACE_PROFILE_DIR = CONFIG.TRACE_PROFILE_DIR
+CONFIG.bind(globals(), 'TRACE_SAMPLE_RATE', 'SLOW_REQUEST_MS',
+            'TRACE_PROFILE_DIR')
+
+_local = threading.local()
+_profiler_lock = threading.Lock()
+
+
+class RequestTrace:
+    """
+    Timed spans recorded for a single request.
+
+    Spans are stored as (name, offset, duration, depth, detail) tuples, with
+    offset and duration in seconds relative to the start of the request.
+    """
+
+    def __init__(self, method, path, start=None):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.start = start if start is not None else time.perf_counter()
+        self.spans = []
+        self.depth = 0
+        self.profiler = None
+
+    def add(self, name, start, duration, detail=None):
+        """Record a span that has already finished."""
+        self.spans.append(
+            (name, start - self.start, duration, self.depth, detail)
+        )
+
+    def span(self, name, detail=None):
+        """Return a context manager timing a nested span."""
+        return _Span(self, name, detail)
+
+    def format(self, total, status):
+        """Return a human readable breakdown of the recorded spans."""
+        lines = [
+            f"{self.method} {self.path} {total * 1000:.1f} ms "
+            f"(status {status}, trace {self.trace_id})"
+        ]
+        for name, offset, duration, depth, detail in sorted(
+                self.spans, key=lambda span: span[1]):
+            line = (f"  {'  ' * depth}+{offset * 1000:.1f}ms "
+                    f"{duration * 1000:.2f}ms {name}")
+            if detail:
+                line += f" {detail}"
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+class _Span:
+    __slots__ = ('_trace', '_name', '_detail', '_start', '_depth')
+
+    def __init__(self, trace, name, detail):
+        self._trace = trace
+        self._name = name
+        self._detail = detail
+        self._start = None
+        self._depth = 0
+
+    def __enter__(self):
+        self._depth = self._trace.depth
+        self._trace.depth += 1
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration = time.perf_counter() - self._start
+        self._trace.depth = self._depth
+        self._trace.spans.append((
+            self._name, self._start - self._trace.start, duration,
+            self._depth, self._detail
+        ))
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def current_trace():
+    """Return the trace of the request handled by this thread, if any."""
+    return getattr(_local, 'trace', None)
+
+
+def span(name, detail=None):
+    """
+    Time a block as a span of the current request trace.
+
+    This is a no-op context manager when the request is not traced.
+    """
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return _NULL_SPAN
+    return trace.span(name, detail)
+
+
+def record_span(name, start, duration, detail=None):
+    """Record an already measured span on the current trace, if any."""
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.add(name, start, duration, detail)
+
+
+def should_trace(headers):
+    """
+    Decide whether a request is traced, by header or by sampling.
+
+    Returns:
+        str or None: TRACED_BY_HEADER, TRACED_BY_SAMPLING, or None if the
+        request is not traced.
+    """
+    if headers is not None:
+        flag = headers.get(TRACE_HEADER)
+        if flag is not None:
+            if flag.lower() in ['1', 'true', 'yes']:
+                return TRACED_BY_HEADER
+            return None
+    if TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE:
+        return TRACED_BY_SAMPLING
+    return None
+
+
+def start_trace(method, path, headers=None, start=None):
+    """
+    Start tracing the current request if it is enabled by header or sampled.
+
+    Sampled requests are also profiled with cProfile when TRACE_PROFILE_DIR
+    is set; only one request is profiled at a time. Requests traced by the
+    header are never profiled, as any client can send it.
+
+    Returns:
+        RequestTrace or None: The active trace, or None if not traced.
+    """
+    _local.trace = None
+    reason = should_trace(headers)
+    if reason is None:
+        return None
+
+    trace = RequestTrace(method, path, start)
+    _local.trace = trace
+
+    if reason == TRACED_BY_SAMPLING and TRACE_PROFILE_DIR and \
+            _profiler_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            trace.profiler = profiler
+        except ValueError:
+            _profiler_lock.release()
+    return trace
+
+
+def finish_trace(method, path, status, start):
+    """
+    Finish the current request, logging it if it exceeded SLOW_REQUEST_MS.
+
+    Traced requests are logged with their span breakdown; untraced slow
+    requests are logged with their total time only.
+    """
+    total = time.perf_counter() - start
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+
+    if trace is not None and trace.profiler is not None:
+        trace.profiler.disable()
+        _profiler_lock.release()
+        _dump_profile(trace)
+
+    if total * 1000 < SLOW_REQUEST_MS:
+        if trace is not None:
+            logger.debug("Request trace:\n%s", trace.format(total, status))
+        return
+
+    if trace is not None:
+        logger.warning("Slow request: %s", trace.format(total, status))
+    else:
+        logger.warning(
+            "Slow request: %s %s %.1f ms (status %s, not traced; send "
+            "'%s: 1' for a span breakdown)",
+            method, path, total * 1000, status, TRACE_HEADER
+        )
+
+
+def _dump_profile(trace):
+    """Write the cProfile stats of a sampled request to TRACE_PROFILE_DIR."""
+    try:
+        os.makedirs(TRACE_PROFILE_DIR, exist_ok=True)
+        filename = os.path.join(
+            TRACE_PROFILE_DIR,
+            f"{int(time.time())}_{trace.method}_{trace.trace_id}.prof"
+        )
+        trace.profiler.dump_stats(filename)
+        logger.info("Wrote request profile to %s", filename)
+    except OSError as e:
+        logger.error("Could not write request profile: %s", e)
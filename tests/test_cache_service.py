@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+
+from services.cache_service import LRUCache, MISSING
+from services.metrics_service import CACHE_LOOKUPS
+
+
+class TestLRUCache(unittest.TestCase):
+    """Tests for the LRU cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest unused entry is evicted first."""
+        cache = LRUCache('test_lru', maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIs(cache.get('b'), MISSING)
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('services.cache_service.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        """Test that entries older than the TTL are treated as misses."""
+        cache = LRUCache('test_ttl', ttl=10)
+        mock_monotonic.return_value = 100
+        cache.set('a', 1)
+
+        mock_monotonic.return_value = 109
+        self.assertEqual(cache.get('a'), 1)
+        mock_monotonic.return_value = 110
+        self.assertIsNone(cache.get('a', None))
+
+    def test_hits_and_misses_are_counted(self):
+        """Test that lookups are reported to the cache metrics."""
+        cache = LRUCache('test_metrics')
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get_many(['a', 'b', 'c'])
+
+        self.assertEqual(CACHE_LOOKUPS.labels('test_metrics', 'hit').value, 2)
+        self.assertEqual(CACHE_LOOKUPS.labels('test_metrics', 'miss').value, 2)
+
+    def test_disabled_cache_stores_nothing(self):
+        """Test that a cache with maxsize 0 never stores entries."""
+        cache = LRUCache('test_disabled', maxsize=0)
+        cache.set('a', 1)
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from api.movie_api import DEFERRED_ADDS, MovieAPI
+from database.database import DatabaseSession
+from database.models import Movie
+from services.cache_service import OMDB_CACHE
+from services.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+)
+from services.metrics_service import REGISTRY
+from services.movie_service import fetch_movies
+from services.omdb_service import (
+    OMDB_BREAKER, OMDBService, OMDBUnavailableError
+)
+
+
+def fail():
+    raise ConnectionError('down')
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests for the closed, open and half-open states."""
+
+    def test_opens_on_failure_rate(self):
+        """Test that the circuit opens once enough calls fail."""
+        breaker = CircuitBreaker('test_rate', failure_rate=0.5, min_calls=4)
+        breaker.call(lambda: 'ok')
+        breaker.call(lambda: 'ok')
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(fail)
+
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(lambda: 'ok')
+        self.assertIn('circuit_breaker_state{name="test_rate"} 2',
+                      REGISTRY.render())
+
+    def test_slow_calls_count_as_failures(self):
+        """Test that calls over the latency threshold open the circuit."""
+        breaker = CircuitBreaker('test_slow', slow_call_seconds=0.001,
+                                 min_calls=2)
+        for _ in range(2):
+            self.assertEqual(breaker.call(time.sleep, 0.005), None)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_half_open_trial(self):
+        """Test that one trial call decides whether the circuit closes."""
+        breaker = CircuitBreaker('test_trial', min_calls=1, open_seconds=0.05)
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+        self.assertGreater(breaker.retry_after(), 0)
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, HALF_OPEN)
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+        self.assertEqual(breaker.state, OPEN)
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(breaker.state, CLOSED)
+
+
+class OMDBTestCase(unittest.TestCase):
+    """Base class resetting the OMDB breaker and cache around each test."""
+
+    def setUp(self):
+        patcher = patch.dict(os.environ, {'OMDB_API_KEY': 'test'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for cleanup in [OMDB_BREAKER.reset, OMDB_CACHE.clear]:
+            cleanup()
+            self.addCleanup(cleanup)
+
+
+class TestOMDBFallback(OMDBTestCase):
+    """Tests for failing fast and serving stale OMDB responses."""
+
+    def test_stale_response_is_served_during_outage(self):
+        """Test that an expired cached lookup is used when OMDB fails."""
+        movie = {'Title': 'Cached', 'imdbID': 'tt5550001'}
+        with patch('requests.get') as get:
+            get.return_value.json.return_value = movie
+            self.assertEqual(OMDBService().fetch_movie_by_id('tt5550001'),
+                             movie)
+            self.assertEqual(OMDBService().fetch_movie_by_id('tt5550001'),
+                             movie)
+            self.assertEqual(get.call_count, 1)
+
+        with patch('services.omdb_service.OMDB_CACHE_TTL', 0), \
+                patch('requests.get',
+                      side_effect=requests.Timeout('slow')) as get:
+            self.assertEqual(OMDBService().fetch_movie_by_id('tt5550001'),
+                             movie)
+            self.assertEqual(get.call_count, 1)
+            with self.assertRaises(OMDBUnavailableError):
+                OMDBService().fetch_movie_by_id('tt5550002')
+
+    def test_open_circuit_skips_requests(self):
+        """Test that no request is made while the circuit is open."""
+        with patch('requests.get',
+                   side_effect=requests.ConnectionError('down')) as get:
+            for i in range(10):
+                with self.assertRaises(OMDBUnavailableError):
+                    OMDBService().fetch_movie_by_title(f'Outage {i}')
+
+        self.assertEqual(OMDB_BREAKER.state, OPEN)
+        self.assertEqual(get.call_count, OMDB_BREAKER.min_calls)
+
+    def test_seed_search_stops_on_invalid_json(self):
+        """Test that a response that is not JSON ends a seed search."""
+        with patch('requests.get') as get:
+            get.return_value.json.side_effect = ValueError('not JSON')
+            self.assertEqual(fetch_movies('Broken'), [])
+
+
+class TestDeferredAdd(OMDBTestCase):
+    """Tests for deferring movie additions while OMDB is unavailable."""
+
+    def tearDown(self):
+        with DatabaseSession() as session:
+            session.query(Movie).filter(
+                Movie.imdb_id == 'tt5550003'
+            ).delete()
+            session.commit()
+
+    def test_add_is_retried_when_omdb_is_back(self):
+        """Test that a deferred movie is stored once OMDB answers again."""
+        movie = {'Title': 'Deferred', 'Year': '2020', 'imdbID': 'tt5550003',
+                 'Poster': 'N/A', 'Type': 'movie'}
+        lookups = [OMDBUnavailableError('down'), OMDBUnavailableError('down'),
+                   movie]
+
+        def fetch(self, title):
+            result = lookups.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        with patch.object(OMDBService, 'fetch_movie_by_title', fetch), \
+                patch.object(DEFERRED_ADDS, 'retry_interval', 0.01):
+            response, status_code = MovieAPI.add_movie('Deferred')
+            self.assertEqual(status_code, 202)
+            self.assertEqual(response['status'], 'deferred')
+
+            deadline = time.monotonic() + 5
+            while 'Deferred' in DEFERRED_ADDS and \
+                    time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertEqual(lookups, [])
+        with DatabaseSession() as session:
+            self.assertEqual(session.query(Movie).filter(
+                Movie.imdb_id == 'tt5550003'
+            ).count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
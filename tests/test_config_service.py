@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import unittest
+
+from services.cache_service import LRUCache, MISSING
+from services.circuit_breaker import CircuitBreaker
+from services.config_service import Config
+
+
+class TestConfig(unittest.TestCase):
+    """Tests for reading and reloading the configuration."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        self.write({})
+
+    def write(self, values):
+        with open(self.path, 'w') as config_file:
+            json.dump(values, config_file)
+
+    def test_settings_are_typed_and_file_overrides_env(self):
+        """Test that values are parsed and the file wins over the env."""
+        self.write({'MOVIE_CACHE_TTL': 5})
+        config = Config(environ={'MOVIE_CACHE_SIZE': '10',
+                                 'MOVIE_CACHE_TTL': '1',
+                                 'ENRICHMENT_ENABLED': 'yes'},
+                        path=self.path)
+
+        self.assertEqual(config.MOVIE_CACHE_SIZE, 10)
+        self.assertEqual(config.MOVIE_CACHE_TTL, 5.0)
+        self.assertIs(config.ENRICHMENT_ENABLED, True)
+        self.assertEqual(config.PORT, 8080)
+        with self.assertRaises(AttributeError):
+            config.NOT_A_SETTING
+
+    def test_invalid_settings_are_rejected(self):
+        """Test that bad values and unknown names fail at start."""
+        with self.assertRaises(ValueError):
+            Config(environ={'DB_POOL_SIZE': 'many'})
+        self.write({'DB_POOL_SIZ': 3})
+        with self.assertRaises(ValueError):
+            Config(environ={}, path=self.path)
+
+    def test_reload_notifies_subscribers(self):
+        """Test that a reload updates bound names and calls subscribers."""
+        config = Config(environ={}, path=self.path)
+        namespace = {'SLOW_REQUEST_MS': config.SLOW_REQUEST_MS}
+        config.bind(namespace, 'SLOW_REQUEST_MS')
+        calls = []
+        config.subscribe(lambda config, changed: calls.append(changed))
+
+        self.write({'SLOW_REQUEST_MS': 50, 'TRACE_SAMPLE_RATE': 0.5})
+        changed = config.reload()
+
+        self.assertEqual(changed, {'SLOW_REQUEST_MS', 'TRACE_SAMPLE_RATE'})
+        self.assertEqual(calls, [changed])
+        self.assertEqual(namespace['SLOW_REQUEST_MS'], 50.0)
+        self.assertEqual(config.TRACE_SAMPLE_RATE, 0.5)
+
+    def test_invalid_reload_keeps_settings(self):
+        """Test that a broken file leaves every setting as it was."""
+        self.write({'SLOW_REQUEST_MS': 50})
+        config = Config(environ={}, path=self.path)
+        self.write({'SLOW_REQUEST_MS': 'fast', 'TRACE_SAMPLE_RATE': 1})
+
+        self.assertEqual(config.reload(), set())
+        self.assertEqual(config.SLOW_REQUEST_MS, 50.0)
+        self.assertEqual(config.TRACE_SAMPLE_RATE, 0.0)
+
+    def test_restart_only_settings_keep_their_value(self):
+        """Test that a reload does not apply restart-only settings."""
+        config = Config(environ={'PORT': '8000'}, path=self.path)
+        self.write({'PORT': 9000, 'SERVER_THREADS': 8})
+
+        self.assertEqual(config.reload(), {'SERVER_THREADS'})
+        self.assertEqual(config.PORT, 8000)
+        self.assertEqual(config.SERVER_THREADS, 8)
+
+
+class TestReconfigure(unittest.TestCase):
+    """Tests for applying new settings to running components."""
+
+    def test_shrinking_a_cache_evicts_entries(self):
+        """Test that a smaller cache keeps its most recent entries."""
+        cache = LRUCache('test_configure', maxsize=3)
+        for key in 'abc':
+            cache.set(key, key)
+        cache.configure(maxsize=2, ttl=10)
+
+        self.assertIs(cache.get('a'), MISSING)
+        self.assertEqual(cache.get('c'), 'c')
+        self.assertEqual(cache.ttl, 10)
+
+    def test_breaker_window_keeps_recent_calls(self):
+        """Test that a new window keeps the latest recorded calls."""
+        breaker = CircuitBreaker('test_configure', min_calls=10)
+        for _ in range(3):
+            breaker.call(lambda: 'ok')
+        breaker.configure(failure_rate=0.5, slow_call_seconds=None, window=2,
+                          min_calls=2, open_seconds=1)
+
+        self.assertEqual(len(breaker._outcomes), 2)
+        self.assertEqual(breaker.min_calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,329 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import http.client
+from http.server import HTTPServer
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, inspect, select, text
+
+import database.database as database
+from api.api_server import MovieRequestHandler
+from database.database import (
+    DatabaseSession, initialize_database, initialize_database_in_background,
+    seed_status
+)
+from database.models import Base, Movie, parse_year_range
+from database.snapshot import (
+    export_snapshot, load_snapshot, is_snapshot_file, SnapshotReader
+)
+
+SEED_MOVIES = [
+    {'Title': 'Seed One', 'Year': '2001', 'Type': 'movie',
+     'imdbID': 'tt8880001', 'Poster': 'N/A'},
+    {'Title': 'Seed Two', 'Year': '2005–2010', 'Type': 'series',
+     'imdbID': 'tt8880002', 'Poster': 'N/A'}
+]
+
+
+class TestDatabaseSeeding(unittest.TestCase):
+    """Tests for seeding the database from a local snapshot."""
+
+    def setUp(self):
+        self.db_session = DatabaseSession()
+        self.session = self.db_session.get_session()
+        self.session.query(Movie).delete()
+        self.session.commit()
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.directory.name, 'seed.json')
+        with open(self.snapshot, 'w', encoding='utf-8') as f:
+            json.dump(SEED_MOVIES, f)
+
+    def tearDown(self):
+        self.session.query(Movie).delete()
+        self.session.commit()
+        self.db_session.close(self.session)
+        self.directory.cleanup()
+
+    @patch('database.database.find_unique_movies')
+    def test_seed_from_snapshot(self, mock_find):
+        """Test that a snapshot seeds the database without calling OMDB."""
+        initialize_database(snapshot_path=self.snapshot)
+
+        mock_find.assert_not_called()
+        titles = sorted(title for title, in self.session.query(Movie.title))
+        self.assertEqual(titles, ['Seed One', 'Seed Two'])
+        self.assertEqual(seed_status()['status'], database.SEED_READY)
+
+    @patch('database.database.find_unique_movies', return_value=[])
+    def test_seed_without_movies(self, mock_find):
+        """Test that a seed finding no movies leaves the table empty."""
+        initialize_database()
+
+        self.assertEqual(self.session.query(Movie).count(), 0)
+        self.assertEqual(seed_status()['status'], database.SEED_READY)
+
+    @patch('database.database.find_unique_movies')
+    def test_background_seed_reports_failure(self, mock_find):
+        """Test that a failing background seed is reported, not raised."""
+        mock_find.side_effect = ValueError('OMDB is down')
+
+        initialize_database_in_background().join()
+
+        state = seed_status()
+        self.assertEqual(state['status'], database.SEED_FAILED)
+        self.assertEqual(state['error'], 'OMDB is down')
+        self.assertFalse(database.database_ready.is_set())
+
+    @patch('database.database.find_unique_movies')
+    def test_seed_from_binary_snapshot(self, mock_find):
+        """Test that a binary snapshot is detected and bulk loaded."""
+        source = create_engine(
+            f"sqlite:///{os.path.join(self.directory.name, 'source.db')}"
+        )
+        Base.metadata.create_all(source)
+        with source.begin() as conn:
+            conn.execute(Movie.__table__.insert(), [
+                {'title': 'Binary Seed', 'year': '1999', 'imdb_id': 'tt7770001'}
+            ])
+        path = os.path.join(self.directory.name, 'seed.snap')
+        export_snapshot(source, path)
+        source.dispose()
+
+        initialize_database(snapshot_path=path)
+
+        mock_find.assert_not_called()
+        movies = self.session.query(
+            Movie.title, Movie.year_start, Movie.year_end
+        ).all()
+        self.assertEqual(movies, [('Binary Seed', 1999, 1999)])
+
+    @patch('database.database.find_unique_movies')
+    def test_truncated_snapshot_falls_back(self, mock_find):
+        """Test that a truncated snapshot seeds from OMDB instead."""
+        mock_find.return_value = [SEED_MOVIES[0]]
+        source = create_engine(
+            f"sqlite:///{os.path.join(self.directory.name, 'source.db')}"
+        )
+        Base.metadata.create_all(source)
+        with source.begin() as conn:
+            conn.execute(Movie.__table__.insert(), [
+                {'title': 'Binary Seed', 'year': '1999', 'imdb_id': 'tt7770001'}
+            ])
+        path = os.path.join(self.directory.name, 'seed.snap')
+        export_snapshot(source, path)
+        source.dispose()
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 4)
+
+        initialize_database(snapshot_path=path)
+
+        mock_find.assert_called_once()
+        titles = [title for (title,) in self.session.query(Movie.title)]
+        self.assertEqual(titles, [SEED_MOVIES[0]['Title']])
+        self.assertEqual(seed_status()['status'], database.SEED_READY)
+
+
+class TestYearRange(unittest.TestCase):
+    """Tests for the integer year columns and their migration."""
+
+    def test_parse_year_range(self):
+        """Test that OMDB years are parsed into start and end years."""
+        cases = {
+            '1999': (1999, 1999),
+            '2005–2010': (2005, 2010),
+            '2005-2010': (2005, 2010),
+            '2019–': (2019, None),
+            'N/A': (None, None),
+            '': (None, None),
+            None: (None, None)
+        }
+        for year, expected in cases.items():
+            with self.subTest(year=year):
+                self.assertEqual(parse_year_range(year), expected)
+
+    def test_year_columns_follow_year(self):
+        """Test that setting year on a movie sets the integer columns."""
+        movie = Movie(title='Series', year='2005–2010')
+        self.assertEqual((movie.year_start, movie.year_end), (2005, 2010))
+        movie.year = '2001'
+        self.assertEqual((movie.year_start, movie.year_end), (2001, 2001))
+
+    def test_existing_database_is_migrated(self):
+        """Test that missing columns are added and backfilled."""
+        with tempfile.TemporaryDirectory() as directory:
+            url = f"sqlite:///{os.path.join(directory, 'old.db')}"
+            engine = create_engine(url)
+            with engine.begin() as conn:
+                conn.execute(text(
+                    'CREATE TABLE movies (id INTEGER PRIMARY KEY, '
+                    'title VARCHAR(255) NOT NULL, year VARCHAR(4), '
+                    'movie_type VARCHAR(50), imdb_id VARCHAR(20) UNIQUE, '
+                    'poster VARCHAR(255))'
+                ))
+                conn.execute(text(
+                    "INSERT INTO movies (title, year) VALUES "
+                    "('Old Movie', '1999'), ('Old Series', '2005–2010'), "
+                    "('Unknown', 'N/A')"
+                ))
+
+            with patch.object(database, 'DATABASE_URL', url):
+                db_session = DatabaseSession()
+            columns = {
+                column['name']
+                for column in inspect(engine).get_columns('movies')
+            }
+            with engine.connect() as conn:
+                rows = conn.execute(text(
+                    'SELECT title, year_start, year_end FROM movies '
+                    'ORDER BY id'
+                )).all()
+            db_session.engine.dispose()
+            engine.dispose()
+
+        self.assertLessEqual({'year_start', 'year_end'}, columns)
+        self.assertEqual(rows, [
+            ('Old Movie', 1999, 1999),
+            ('Old Series', 2005, 2010),
+            ('Unknown', None, None)
+        ])
+
+
+class TestSnapshot(unittest.TestCase):
+    """Tests for the columnar snapshot export and import."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'movies.snap')
+        self.source = self.engine('source.db')
+        self.rows = [
+            {'id': i, 'title': f'Película {i}', 'year': str(1990 + i % 3),
+             'movie_type': None if i % 4 == 0 else 'movie',
+             'imdb_id': f'tt{i:07d}', 'poster': 'N/A',
+             'year_start': 1990 + i % 3, 'year_end': 1990 + i % 3}
+            for i in range(1, 26)
+        ]
+        with self.source.begin() as conn:
+            conn.execute(Movie.__table__.insert(), self.rows)
+
+    def tearDown(self):
+        self.source.dispose()
+        self.directory.cleanup()
+
+    def engine(self, name):
+        engine = create_engine(
+            f'sqlite:///{os.path.join(self.directory.name, name)}'
+        )
+        Base.metadata.create_all(engine)
+        return engine
+
+    def read_rows(self, engine):
+        with engine.connect() as conn:
+            result = conn.execute(
+                select(Movie.__table__).order_by(Movie.id)
+            )
+            return [dict(row._mapping) for row in result]
+
+    def test_round_trip(self):
+        """Test that export then import reproduces every row and NULL."""
+        self.assertEqual(export_snapshot(self.source, self.path), 25)
+        self.assertTrue(is_snapshot_file(self.path))
+
+        target = self.engine('target.db')
+        self.assertEqual(load_snapshot(target, self.path, chunk_size=7), 25)
+
+        self.assertEqual(self.read_rows(target), self.rows)
+        target.dispose()
+
+    def test_chunks_are_bounded(self):
+        """Test that rows are streamed in chunks of the requested size."""
+        export_snapshot(self.source, self.path)
+
+        with SnapshotReader(self.path) as reader:
+            sizes = [len(chunk) for chunk in reader.chunks(10)]
+
+        self.assertEqual(sizes, [10, 10, 5])
+
+    def test_load_without_ids(self):
+        """Test that ids can be left for the database to assign."""
+        export_snapshot(self.source, self.path)
+        target = self.engine('target.db')
+        with target.begin() as conn:
+            conn.execute(Movie.__table__.insert(), [
+                {'id': 1, 'title': 'Existing', 'imdb_id': 'tt9999999'}
+            ])
+
+        load_snapshot(target, self.path, keep_ids=False)
+
+        ids = [row['id'] for row in self.read_rows(target)]
+        self.assertEqual(ids, list(range(1, 27)))
+        target.dispose()
+
+    def test_rejects_other_files(self):
+        """Test that non-snapshot files are refused."""
+        with open(self.path, 'wb') as f:
+            f.write(b'[{"Title": "x"}]' + bytes(32))
+
+        self.assertFalse(is_snapshot_file(self.path))
+        with self.assertRaises(ValueError):
+            SnapshotReader(self.path)
+
+    def test_rejects_truncated_files(self):
+        """Test that a snapshot cut short or padded out is refused."""
+        export_snapshot(self.source, self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        target = self.engine('target.db')
+
+        for damaged in (data[:20], data[:len(data) // 2], data[:-1],
+                        data + bytes(8)):
+            with open(self.path, 'wb') as f:
+                f.write(damaged)
+            with self.assertRaises(ValueError):
+                load_snapshot(target, self.path)
+
+        self.assertEqual(self.read_rows(target), [])
+        target.dispose()
+
+
+class TestHealthEndpoints(unittest.TestCase):
+    """Tests for the /healthz and /readyz endpoints."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('localhost', 0), MovieRequestHandler)
+        cls.port = cls.server.server_address[1]
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.thread.join()
+        cls.server.server_close()
+
+    def get(self, path):
+        conn = http.client.HTTPConnection('localhost', self.port)
+        conn.request('GET', path)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_healthz(self):
+        """Test that the liveness endpoint always answers."""
+        self.assertEqual(self.get('/healthz'), (200, {'status': 'ok'}))
+
+    def test_readyz_follows_seed_state(self):
+        """Test that readiness is only reported once seeding finished."""
+        seeding = {'status': database.SEED_PENDING, 'error': None}
+        with patch.dict(database._seed_state, seeding):
+            self.assertEqual(self.get('/readyz'), (503, {'status': 'seeding'}))
+
+        ready = {'status': database.SEED_READY, 'error': None}
+        with patch.dict(database._seed_state, ready):
+            self.assertEqual(self.get('/readyz'), (200, {'status': 'ready'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.pool import StaticPool
+
+from database.dialects import (
+    FullTextMatch, PrefixMatch, create_search_index, engine_options, fts5_query,
+    insert_ignoring_duplicates, reset_id_sequence, search_index_deferred
+)
+from database.models import Base, Movie
+
+
+def compile_for(statement, dialect):
+    return ' '.join(str(statement.compile(
+        dialect=dialect, compile_kwargs={'literal_binds': True}
+    )).split())
+
+
+class TestEngineOptions(unittest.TestCase):
+    """Tests for the backend-aware engine and pool settings."""
+
+    def test_sqlite_memory_shares_one_connection(self):
+        """Test that in-memory SQLite uses a single shared connection."""
+        options = engine_options('sqlite://')
+        self.assertIs(options['poolclass'], StaticPool)
+
+    def test_server_databases_get_checked_pools(self):
+        """Test that server databases get pre-ping and recycling."""
+        options = engine_options('postgresql://api@db/movies')
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertIn('pool_recycle', options)
+        self.assertNotIn('poolclass', options)
+
+        self.assertIn('timeout', engine_options(
+            'sqlite:////tmp/movies.db'
+        )['connect_args'])
+
+
+class TestPostgreSQLStatements(unittest.TestCase):
+    """Tests for the PostgreSQL paths, compiled without a server."""
+
+    def test_search_uses_tsvector(self):
+        """Test that searches compile to the indexed tsvector expression."""
+        statement = select(Movie.id).where(
+            FullTextMatch(Movie.title, 'dark knight')
+        )
+        self.assertIn(
+            "to_tsvector('simple', movies.title) @@ "
+            "plainto_tsquery('simple', 'dark knight')",
+            compile_for(statement, postgresql.dialect())
+        )
+
+    def test_insert_ignores_conflicts(self):
+        """Test that seeding inserts skip duplicates on PostgreSQL."""
+        statement = insert_ignoring_duplicates(Movie.__table__, 'postgresql')
+        self.assertTrue(
+            compile_for(statement, postgresql.dialect()).endswith(
+                'ON CONFLICT DO NOTHING'
+            )
+        )
+
+    def test_prefix_uses_binary_collation(self):
+        """Test that prefixes compile to a range in the "C" collation."""
+        statement = select(Movie.id).where(PrefixMatch(Movie.title, 'Sev'))
+        self.assertIn(
+            '(movies.title COLLATE "C") >= \'Sev\' AND '
+            '(movies.title COLLATE "C") < \'Sew\'',
+            compile_for(statement, postgresql.dialect())
+        )
+        self.assertNotIn('COLLATE', compile_for(statement, sqlite.dialect()))
+
+    def test_other_backends_search_with_like(self):
+        """Test that backends without a search index fall back to LIKE."""
+        statement = select(Movie.id).where(
+            FullTextMatch(Movie.title, 'Dark')
+        )
+        self.assertIn("lower(movies.title) LIKE",
+                      compile_for(statement, mysql.dialect()))
+
+
+class TestSQLiteStatements(unittest.TestCase):
+    """Tests for the SQLite full-text index and conflict handling."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(
+            f"sqlite:///{os.path.join(self.directory.name, 'movies.db')}"
+        )
+        Base.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def search(self, query):
+        with self.engine.connect() as conn:
+            return sorted(title for title, in conn.execute(
+                select(Movie.title).where(FullTextMatch(Movie.title, query))
+            ))
+
+    def test_fts5_query_quotes_words(self):
+        """Test that FTS5 syntax in user input is matched literally."""
+        self.assertEqual(fts5_query('dark  "knight'), '"dark" """knight"')
+
+    def test_search_index_follows_writes(self):
+        """Test that existing and new rows are searchable, deleted not."""
+        table = Movie.__table__
+        with self.engine.begin() as conn:
+            conn.execute(table.insert(), [
+                {'id': 1, 'title': 'The Dark Knight'},
+                {'id': 2, 'title': 'Dark City'}
+            ])
+        create_search_index(self.engine, Movie.title)
+        create_search_index(self.engine, Movie.title)
+
+        with self.engine.begin() as conn:
+            conn.execute(table.insert(), {'id': 3, 'title': 'Knight Rider'})
+            conn.execute(table.delete().where(table.c.id == 2))
+            conn.execute(table.update().where(table.c.id == 1).values(
+                title='The Dark Knight Rises'
+            ))
+
+        self.assertEqual(self.search('dark'), ['The Dark Knight Rises'])
+        self.assertEqual(self.search('knight'),
+                         ['Knight Rider', 'The Dark Knight Rises'])
+        self.assertEqual(self.search('city'), [])
+
+    def test_deferred_index_is_rebuilt(self):
+        """Test that rows bulk loaded with deferred indexing are found."""
+        table = Movie.__table__
+        create_search_index(self.engine, Movie.title)
+        with self.engine.begin() as conn, search_index_deferred(conn, table):
+            conn.execute(table.insert(), [
+                {'title': f'Dark Film {i}'} for i in range(50)
+            ])
+        with self.engine.begin() as conn:
+            conn.execute(table.insert(), {'title': 'Dark Matter'})
+
+        self.assertEqual(len(self.search('dark')), 51)
+        self.assertEqual(self.search('matter'), ['Dark Matter'])
+
+    def test_insert_ignores_duplicates(self):
+        """Test that rows with a taken imdb_id are skipped."""
+        statement = insert_ignoring_duplicates(Movie.__table__, 'sqlite')
+        with self.engine.begin() as conn:
+            conn.execute(statement, [
+                {'title': 'One', 'imdb_id': 'tt0000001'},
+                {'title': 'Copy', 'imdb_id': 'tt0000001'},
+                {'title': 'Two', 'imdb_id': 'tt0000002'}
+            ])
+            reset_id_sequence(conn, Movie.__table__)
+            titles = [title for title, in conn.execute(
+                select(Movie.title).order_by(Movie.id)
+            )]
+
+        self.assertEqual(titles, ['One', 'Two'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,243 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from sqlalchemy import create_engine, select
+
+from api.movie_api import MovieAPI
+from database.database import DatabaseSession
+from database.dialects import enable_foreign_keys
+from database.models import (
+    Base, EnrichmentTask, Movie, MovieDetails, MovieRating, omdb_details_row
+)
+from services.cache_service import MOVIE_CACHE
+from services.circuit_breaker import OPEN
+from services.enrichment_service import (
+    DONE, FAILED, PENDING, EnrichmentPipeline, enqueue_missing
+)
+from services.omdb_service import OMDB_BREAKER, OMDBUnavailableError
+from services.rate_limiter import RateLimiter
+
+DETAILS = {
+    'Title': 'The Dark Knight',
+    'Rated': 'PG-13',
+    'Released': '18 Jul 2008',
+    'Runtime': '152 min',
+    'Genre': 'Action, Crime, Drama',
+    'Director': 'Christopher Nolan',
+    'Plot': 'N/A',
+    'imdbRating': '9.0',
+    'imdbVotes': '2,912,345',
+    'Metascore': '84',
+    'BoxOffice': '$534,987,076',
+    'Ratings': [
+        {'Source': 'Internet Movie Database', 'Value': '9.0/10'},
+        {'Source': 'Metacritic', 'Value': '84/100'}
+    ]
+}
+
+
+class FakeOMDB:
+    """Answers lookups by IMDb ID from a dict, counting the calls."""
+
+    def __init__(self, movies, failing=()):
+        self.movies = movies
+        self.failing = set(failing)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch_movie_by_id(self, imdb_id):
+        with self._lock:
+            self.calls.append(imdb_id)
+        if imdb_id in self.failing:
+            raise ConnectionError('OMDB is unreachable')
+        return self.movies.get(imdb_id)
+
+
+class TestOMDBDetails(unittest.TestCase):
+    """Tests for converting OMDB lookups into details rows."""
+
+    def test_details_are_parsed(self):
+        """Test that numbers are parsed and 'N/A' becomes None."""
+        row = omdb_details_row(7, DETAILS)
+        self.assertEqual(row['movie_id'], 7)
+        self.assertEqual(row['runtime_minutes'], 152)
+        self.assertEqual(row['imdb_votes'], 2912345)
+        self.assertEqual(row['imdb_rating'], 9.0)
+        self.assertEqual(row['metascore'], 84)
+        self.assertIsNone(row['plot'])
+        self.assertIsNone(omdb_details_row(7, {'Runtime': 'N/A'})[
+            'runtime_minutes'
+        ])
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Tests for the token bucket."""
+
+    def test_calls_beyond_burst_wait(self):
+        """Test that calls beyond the burst are spread over the rate."""
+        limiter = RateLimiter(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 4 / 50 - 0.01)
+
+
+class TestEnrichmentPipeline(unittest.TestCase):
+    """Tests for the queue-driven enrichment of stored movies."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = enable_foreign_keys(create_engine(
+            f"sqlite:///{os.path.join(self.directory.name, 'movies.db')}"
+        ))
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(Movie.__table__.insert(), [
+                {'id': i, 'title': f'Movie {i}', 'imdb_id': f'tt000000{i}'}
+                for i in range(1, 6)
+            ])
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def pipeline(self, omdb, **kwargs):
+        pipeline = EnrichmentPipeline(self.engine, omdb=omdb, rate=0,
+                                      **kwargs)
+        self.addCleanup(pipeline.close)
+        return pipeline
+
+    def tasks(self):
+        with self.engine.connect() as conn:
+            return {
+                movie_id: (status, attempts) for movie_id, status, attempts
+                in conn.execute(select(EnrichmentTask.movie_id,
+                                       EnrichmentTask.status,
+                                       EnrichmentTask.attempts))
+            }
+
+    def test_movies_are_queued_once(self):
+        """Test that only movies without details or task are queued."""
+        with self.engine.begin() as conn:
+            conn.execute(MovieDetails.__table__.insert(), {'movie_id': 1})
+            conn.execute(Movie.__table__.insert(), {'title': 'No ID',
+                                                    'imdb_id': None})
+
+        self.assertEqual(enqueue_missing(self.engine), 4)
+        self.assertEqual(enqueue_missing(self.engine), 0)
+
+    def test_details_and_ratings_are_stored(self):
+        """Test that every queued movie is enriched in batches."""
+        omdb = FakeOMDB({f'tt000000{i}': DETAILS for i in range(1, 6)})
+
+        processed = self.pipeline(omdb, batch_size=2).run()
+
+        self.assertEqual(processed, 5)
+        self.assertEqual(sorted(omdb.calls),
+                         [f'tt000000{i}' for i in range(1, 6)])
+        self.assertEqual(set(self.tasks().values()), {(DONE, 1)})
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(
+                select(MovieDetails.director).where(MovieDetails.movie_id == 3)
+            ).scalar(), 'Christopher Nolan')
+            self.assertEqual(len(conn.execute(
+                select(MovieRating.source).where(MovieRating.movie_id == 3)
+            ).all()), 2)
+
+    def test_failed_lookups_are_retried_later(self):
+        """Test that a restarted pipeline resumes the unfinished tasks."""
+        enqueue_missing(self.engine)
+        omdb = FakeOMDB({'tt0000001': DETAILS}, failing={'tt0000002'})
+        self.pipeline(omdb, batch_size=2, max_attempts=2).run_once()
+
+        self.assertEqual(self.tasks()[1], (DONE, 1))
+        self.assertEqual(self.tasks()[2], (PENDING, 1))
+        self.assertEqual(self.tasks()[3], (PENDING, 0))
+
+        omdb = FakeOMDB({f'tt000000{i}': DETAILS for i in range(2, 5)})
+        self.pipeline(omdb, batch_size=2, max_attempts=2).run()
+
+        self.assertNotIn('tt0000001', omdb.calls)
+        tasks = self.tasks()
+        self.assertEqual(tasks[2], (DONE, 2))
+        self.assertEqual(tasks[4], (DONE, 1))
+        # tt0000005 is unknown to OMDB; it is given up after max_attempts.
+        self.assertEqual(tasks[5], (FAILED, 2))
+
+    def test_outage_keeps_attempts(self):
+        """Test that tasks are left as they were once the circuit opens."""
+        self.addCleanup(OMDB_BREAKER.reset)
+
+        class OpeningOMDB(FakeOMDB):
+            def fetch_movie_by_id(self, imdb_id):
+                if len(self.calls) == 2:
+                    self.calls.append(imdb_id)
+                    OMDB_BREAKER._open()
+                    raise OMDBUnavailableError('The omdb circuit is open.')
+                return super().fetch_movie_by_id(imdb_id)
+
+        enqueue_missing(self.engine)
+        omdb = OpeningOMDB({f'tt000000{i}': DETAILS for i in range(1, 6)})
+        pipeline = self.pipeline(omdb, workers=1, batch_size=5)
+
+        self.assertEqual(pipeline.run_once(), 2)
+        self.assertEqual(OMDB_BREAKER.state, OPEN)
+        self.assertEqual(len(omdb.calls), 3)
+        self.assertEqual(pipeline.run(), 0)
+        self.assertEqual(len(omdb.calls), 3)
+        tasks = self.tasks()
+        self.assertEqual([tasks[i] for i in range(1, 6)],
+                         [(DONE, 1)] * 2 + [(PENDING, 0)] * 3)
+
+    def test_deleting_a_movie_deletes_its_details(self):
+        """Test that details, ratings and tasks cascade with the movie."""
+        self.pipeline(FakeOMDB({'tt0000001': DETAILS})).run()
+
+        with self.engine.begin() as conn:
+            conn.execute(Movie.__table__.delete().where(Movie.id == 1))
+            for table in [MovieDetails, MovieRating, EnrichmentTask]:
+                self.assertEqual(conn.execute(
+                    select(table.movie_id).where(table.movie_id == 1)
+                ).all(), [])
+
+
+class TestMovieDetailsAPI(unittest.TestCase):
+    """Tests for serving the stored details of a movie."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db_session = DatabaseSession()
+        cls.session = cls.db_session.get_session()
+        cls.movie = Movie(title='Detailed', year='2008', imdb_id='tt7770001')
+        cls.db_session.add_element(cls.session, cls.movie)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.query(Movie).delete()
+        cls.session.commit()
+        cls.db_session.close(cls.session)
+
+    def test_details_are_returned_once_enriched(self):
+        """Test that a movie carries its details after enrichment."""
+        MOVIE_CACHE.clear()
+        response, _ = MovieAPI.get_movie_by_id(self.movie.id)
+        self.assertIsNone(response['details'])
+
+        pipeline = EnrichmentPipeline(
+            self.db_session.engine, omdb=FakeOMDB({'tt7770001': DETAILS}),
+            rate=0
+        )
+        self.addCleanup(pipeline.close)
+        pipeline.run()
+
+        response, _ = MovieAPI.get_movie_by_id(self.movie.id)
+        self.assertEqual(response['details']['runtime_minutes'], 152)
+        self.assertEqual(response['details']['ratings'][1],
+                         {'source': 'Metacritic', 'value': '84/100'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import select, text
+
+from api.filters import (
+    parse_filter, compile_filters, FilterError, EQ, IN, RANGE, PREFIX, SEARCH
+)
+from api.movie_api import MovieAPI
+from api.utils import get_query_params, extract_query_params
+import database.database as database
+from database.database import DatabaseSession
+from database.models import Movie
+from services.cache_service import FACETS_CACHE
+
+
+class TestFilterGrammar(unittest.TestCase):
+    """Tests for parsing filter query parameters."""
+
+    def test_parse_operators(self):
+        """Test that each form of value maps to its operator."""
+        self.assertEqual(parse_filter('year', '2001'), ('year', EQ, '2001'))
+        self.assertEqual(
+            parse_filter('year', '2001..2010'),
+            ('year', RANGE, ('2001', '2010'))
+        )
+        self.assertEqual(
+            parse_filter('year', '..2010'), ('year', RANGE, (None, '2010'))
+        )
+        self.assertEqual(
+            parse_filter('movie_type', 'movie,series,movie'),
+            ('movie_type', IN, ['movie', 'series'])
+        )
+        self.assertEqual(
+            parse_filter('title_prefix', 'Sev'), ('title', PREFIX, 'Sev')
+        )
+        self.assertEqual(
+            parse_filter('title_search', 'dark knight'),
+            ('title', SEARCH, 'dark knight')
+        )
+        self.assertEqual(
+            parse_filter('title', 'Love, Actually'),
+            ('title', EQ, 'Love, Actually')
+        )
+
+    def test_invalid_filters(self):
+        """Test that malformed or unknown filters raise FilterError."""
+        cases = [
+            ('rating', '5'),
+            ('year', '..'),
+            ('year', '20x1..2010'),
+            ('year', '2010..2001'),
+            ('movie_type_prefix', 'mo'),
+            ('title_prefix', ''),
+            ('movie_type', ','),
+            ('year_search', '2001'),
+            ('title_search', ' '),
+        ]
+        for key, value in cases:
+            with self.subTest(key=key, value=value):
+                with self.assertRaises(FilterError):
+                    parse_filter(key, value)
+
+    def test_query_params_are_decoded(self):
+        """Test that percent-encoded query parameters are decoded."""
+        params = get_query_params('title=The%20Matrix&movie_type=movie%2Cseries')
+        self.assertEqual(
+            params, {'title': 'The Matrix', 'movie_type': 'movie,series'}
+        )
+
+    def test_invalid_paging(self):
+        """Test that invalid limit, page or order_by raise ValueError."""
+        for params in [{'limit': 'ten'}, {'page': '0'}, {'order_by': 'id'}]:
+            with self.subTest(params=params):
+                with self.assertRaises(ValueError):
+                    extract_query_params(params)
+
+
+class TestFilteredMovies(unittest.TestCase):
+    """Tests for filtering GET /movies with the filter grammar."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db_session = DatabaseSession()
+        cls.session = cls.db_session.get_session()
+        cls.db_session.bulk_save(cls.session, [
+            Movie(title='Sevilla', year='1999', movie_type='movie',
+                  imdb_id='tt5550001'),
+            Movie(title='Seven', year='2005', movie_type='movie',
+                  imdb_id='tt5550002'),
+            Movie(title='Severance', year='2010–2015', movie_type='series',
+                  imdb_id='tt5550003'),
+            Movie(title='Malaga', year='2012', movie_type='episode',
+                  imdb_id='tt5550004'),
+        ])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.query(Movie).delete()
+        cls.session.commit()
+        cls.db_session.close(cls.session)
+
+    def titles(self, **filters):
+        response, status_code = MovieAPI.get_movies(limit=50, filters=filters)
+        self.assertEqual(status_code, 200)
+        return sorted(movie['title'] for movie in response['data']['movies'])
+
+    def test_range_filter(self):
+        """Test that year ranges include series starting in the range."""
+        self.assertEqual(
+            self.titles(year='2005..2010'), ['Seven', 'Severance']
+        )
+        self.assertEqual(self.titles(year='2011..'), ['Malaga'])
+        self.assertEqual(self.titles(year='2010,2012'), ['Malaga', 'Severance'])
+        self.assertEqual(self.titles(year='2010–2015'), ['Severance'])
+
+    def test_order_by_year_is_numeric(self):
+        """Test that ordering by year uses the year a movie started."""
+        response, _ = MovieAPI.get_movies(limit=50, order_by='year')
+        self.assertEqual(
+            [movie['title'] for movie in response['data']['movies']],
+            ['Sevilla', 'Seven', 'Severance', 'Malaga']
+        )
+
+    def test_multi_value_filter(self):
+        """Test that comma separated values match any of them."""
+        self.assertEqual(
+            self.titles(movie_type='series,episode'), ['Malaga', 'Severance']
+        )
+
+    def test_prefix_filter(self):
+        """Test that prefixes match case-sensitively from the start."""
+        self.assertEqual(
+            self.titles(title_prefix='Seve'), ['Seven', 'Severance']
+        )
+        self.assertEqual(self.titles(title_prefix='seve'), [])
+
+    def test_search_filter(self):
+        """Test that searches match whole words in any order and case."""
+        self.assertEqual(self.titles(title_search='severance'), ['Severance'])
+        self.assertEqual(self.titles(title_search='MALAGA'), ['Malaga'])
+        self.assertEqual(self.titles(title_search='Sev'), [])
+        self.assertEqual(self.titles(title_search='"seven" OR'), [])
+
+    def test_combined_filters(self):
+        """Test that several filters are combined with AND."""
+        self.assertEqual(
+            self.titles(title_prefix='Se', movie_type='movie',
+                        year='2000..2020'),
+            ['Seven']
+        )
+
+    def test_invalid_filter_returns_400(self):
+        """Test that unknown filters are rejected instead of ignored."""
+        response, status_code = MovieAPI.get_movies(filters={'rating': '5'})
+        self.assertEqual(status_code, 400)
+        self.assertEqual(response['error'], "Unknown filter 'rating'.")
+
+    @unittest.skipUnless(database.DATABASE_URL.startswith('sqlite'),
+                         'EXPLAIN QUERY PLAN is SQLite syntax')
+    def test_prefix_filter_uses_index(self):
+        """Test that prefix filters are answered from the title index."""
+        statement = select(Movie.id).where(
+            *compile_filters({'title_prefix': 'Sev'})
+        )
+        compiled = statement.compile(
+            self.db_session.engine, compile_kwargs={'literal_binds': True}
+        )
+        with self.db_session.engine.connect() as conn:
+            plan = ' '.join(
+                str(row[-1]) for row in
+                conn.execute(text(f'EXPLAIN QUERY PLAN {compiled}'))
+            )
+        self.assertIn('ix_movies_title', plan)
+
+
+class TestMovieFacets(unittest.TestCase):
+    """Tests for counting movies by decade and type."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db_session = DatabaseSession()
+        cls.session = cls.db_session.get_session()
+        cls.db_session.bulk_save(cls.session, [
+            Movie(title='Facet One', year='1994', movie_type='movie',
+                  imdb_id='tt6660001'),
+            Movie(title='Facet Two', year='1999', movie_type='movie',
+                  imdb_id='tt6660002'),
+            Movie(title='Facet Three', year='2005–2010', movie_type='series',
+                  imdb_id='tt6660003'),
+            Movie(title='Facet Four', year='N/A', movie_type='movie',
+                  imdb_id='tt6660004'),
+        ])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.query(Movie).delete()
+        cls.session.commit()
+        cls.db_session.close(cls.session)
+        FACETS_CACHE.clear()
+
+    def setUp(self):
+        FACETS_CACHE.clear()
+
+    def test_facet_counts(self):
+        """Test that movies are counted by decade and by type."""
+        response, status_code = MovieAPI.get_facets()
+
+        self.assertEqual(status_code, 200)
+        data = response['data']
+        self.assertEqual(data['total_count'], 4)
+        self.assertEqual(data['decades'], [
+            {'decade': None, 'count': 1},
+            {'decade': 1990, 'count': 2},
+            {'decade': 2000, 'count': 1}
+        ])
+        self.assertEqual(data['movie_types'], [
+            {'movie_type': 'movie', 'count': 3},
+            {'movie_type': 'series', 'count': 1}
+        ])
+
+    def test_facets_apply_filters(self):
+        """Test that facets count only movies matching the filters."""
+        response, _ = MovieAPI.get_facets({'year': '1995..2010'})
+        self.assertEqual(response['data']['total_count'], 2)
+
+        response, status_code = MovieAPI.get_facets({'rating': '5'})
+        self.assertEqual(status_code, 400)
+
+    def test_facets_are_cached_until_write(self):
+        """Test that cached facets are dropped when the catalog changes."""
+        MovieAPI.get_facets()
+        self.assertEqual(len(FACETS_CACHE), 1)
+
+        movie = Movie(title='Facet Five', year='2021', movie_type='movie',
+                      imdb_id='tt6660005')
+        self.db_session.add_element(self.session, movie)
+        self.assertEqual(len(FACETS_CACHE), 0)
+        response, _ = MovieAPI.get_facets()
+        self.db_session.delete_element(self.session, movie)
+
+        self.assertEqual(response['data']['total_count'], 5)
+        self.assertIn({'decade': 2020, 'count': 1},
+                      response['data']['decades'])
+
+    def test_facets_expire(self):
+        """Test that writes of other processes show up after the TTL."""
+        MovieAPI.get_facets()
+        table = Movie.__table__
+        with self.db_session.engine.begin() as conn:
+            conn.execute(table.insert(), {'title': 'Facet Six',
+                                          'imdb_id': 'tt6660006'})
+        self.addCleanup(self.delete_six)
+
+        response, _ = MovieAPI.get_facets()
+        self.assertEqual(response['data']['total_count'], 4)
+        later = time.monotonic() + FACETS_CACHE.ttl + 1
+        with patch('services.cache_service.time.monotonic',
+                   return_value=later):
+            response, _ = MovieAPI.get_facets()
+        self.assertEqual(response['data']['total_count'], 5)
+
+    def delete_six(self):
+        with self.db_session.engine.begin() as conn:
+            conn.execute(Movie.__table__.delete().where(
+                Movie.imdb_id == 'tt6660006'
+            ))
+
+
+if __name__ == '__main__':
+    unittest.main()
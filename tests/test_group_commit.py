@@ -0,0 +1,184 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import sqlalchemy.exc
+from sqlalchemy import create_engine, event
+
+import database.database as database
+from database.database import DatabaseSession
+from database.group_commit import GroupCommitWriter
+from database.models import Base, Movie
+
+
+class TestGroupCommitWriter(unittest.TestCase):
+    """Tests for batching inserts and deletes into shared transactions."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(
+            f"sqlite:///{os.path.join(self.directory.name, 'writes.db')}"
+        )
+        Base.metadata.create_all(self.engine)
+        self.commits = 0
+        event.listen(self.engine, 'commit', self.count_commit)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def count_commit(self, conn):
+        self.commits += 1
+
+    def titles(self):
+        with self.engine.connect() as conn:
+            return sorted(
+                title for title, in
+                conn.execute(Movie.__table__.select().with_only_columns(
+                    Movie.title
+                ))
+            )
+
+    def test_concurrent_writes_share_commits(self):
+        """Test that writes from many threads are committed together."""
+        writer = GroupCommitWriter(self.engine, max_delay_ms=50,
+                                   max_batch=100)
+        barrier = threading.Barrier(20)
+        futures = []
+
+        def submit(i):
+            barrier.wait()
+            futures.append(writer.add(
+                Movie(title=f'Movie {i:02d}', imdb_id=f'tt{i:07d}')
+            ))
+
+        threads = [threading.Thread(target=submit, args=(i,))
+                   for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        movies = [future.result(timeout=5) for future in futures]
+        writer.close()
+
+        self.assertEqual(len(self.titles()), 20)
+        self.assertTrue(all(movie.id is not None for movie in movies))
+        self.assertLess(self.commits, 20)
+
+    def test_integrity_error_fails_only_its_write(self):
+        """Test that a duplicate is rejected without failing its batch."""
+        writer = GroupCommitWriter(self.engine, max_delay_ms=50)
+        first = writer.add(Movie(title='First', imdb_id='tt0000001'))
+        duplicate = writer.add(Movie(title='Duplicate', imdb_id='tt0000001'))
+        last = writer.add(Movie(title='Last', imdb_id='tt0000002'))
+
+        self.assertEqual(first.result(timeout=5).title, 'First')
+        with self.assertRaises(sqlalchemy.exc.IntegrityError):
+            duplicate.result(timeout=5)
+        self.assertEqual(last.result(timeout=5).title, 'Last')
+        writer.close()
+
+        self.assertEqual(self.titles(), ['First', 'Last'])
+        self.assertEqual(self.commits, 1)
+
+    def test_delete(self):
+        """Test that persistent objects are deleted by primary key."""
+        writer = GroupCommitWriter(self.engine, max_delay_ms=1)
+        movie = writer.add(Movie(title='Gone', imdb_id='tt0000003')).result(
+            timeout=5
+        )
+
+        self.assertEqual(writer.delete(movie).result(timeout=5), 1)
+        writer.close()
+
+        self.assertEqual(self.titles(), [])
+
+    def test_callback_failure_keeps_writer_running(self):
+        """Test that a failing on_commit fails neither writes nor writer."""
+        on_commit = Mock(side_effect=RuntimeError('boom'))
+        writer = GroupCommitWriter(self.engine, max_delay_ms=1,
+                                   on_commit=on_commit)
+        with self.assertLogs('database.group_commit', 'ERROR'):
+            first = writer.add(Movie(title='First', imdb_id='tt0000001'))
+            self.assertEqual(first.result(timeout=5).title, 'First')
+        second = writer.add(Movie(title='Second', imdb_id='tt0000002'))
+
+        self.assertEqual(second.result(timeout=5).title, 'Second')
+        writer.close()
+        self.assertEqual(on_commit.call_count, 2)
+
+    def test_rollback_failure_fails_its_batch(self):
+        """Test that an error while recovering a batch reaches its callers."""
+        writer = GroupCommitWriter(self.engine, max_delay_ms=1)
+        with patch.object(writer, '_apply_together',
+                          side_effect=RuntimeError('flush failed')), \
+                patch('sqlalchemy.orm.Session.rollback',
+                      side_effect=RuntimeError('connection lost')), \
+                self.assertLogs('database.group_commit', 'ERROR'):
+            failed = writer.add(Movie(title='Lost', imdb_id='tt0000001'))
+            with self.assertRaises(RuntimeError):
+                failed.result(timeout=5)
+
+        movie = writer.add(Movie(title='Kept', imdb_id='tt0000002'))
+        self.assertEqual(movie.result(timeout=5).title, 'Kept')
+        writer.close()
+
+    def test_closed_writer_rejects_writes(self):
+        """Test that writes after close raise instead of hanging."""
+        writer = GroupCommitWriter(self.engine)
+        writer.close()
+
+        with self.assertRaises(RuntimeError):
+            writer.add(Movie(title='Late'))
+
+
+class TestDatabaseSessionGroupCommit(unittest.TestCase):
+    """Tests for routing DatabaseSession writes through group commit."""
+
+    def setUp(self):
+        patcher = patch.object(database, 'WRITE_BATCH_MS', 5)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_writers)
+        self.db_session = DatabaseSession()
+        self.session = self.db_session.get_session()
+
+    def tearDown(self):
+        self.session.query(Movie).delete()
+        self.session.commit()
+        self.db_session.close(self.session)
+
+    def test_add_and_delete_element(self):
+        """Test that add_element and delete_element use the writer."""
+        movie = Movie(title='Grouped', imdb_id='tt4440001')
+        self.db_session.add_element(self.session, movie)
+        self.assertIsNotNone(movie.id)
+        self.assertIsNotNone(self.db_session.writer())
+
+        with self.assertRaises(sqlalchemy.exc.IntegrityError):
+            self.db_session.add_element(
+                self.session, Movie(title='Again', imdb_id='tt4440001')
+            )
+
+        stored = self.session.get(Movie, movie.id)
+        self.db_session.delete_element(self.session, stored)
+        self.session.expire_all()
+        self.assertIsNone(self.session.get(Movie, movie.id))
+
+    def test_pool_reload_rebinds_writer(self):
+        """Test that the writer moves to the engine of a reloaded pool."""
+        writer = self.db_session.writer()
+        database.reload_engines()
+
+        db_session = DatabaseSession()
+        self.assertIsNot(db_session.engine, self.db_session.engine)
+        self.assertIs(writer.engine, db_session.engine)
+        movie = Movie(title='Rebound', imdb_id='tt4440002')
+        db_session.add_element(self.session, movie)
+        self.assertIsNotNone(movie.id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import unittest
+import urllib.request
+from unittest.mock import patch
+
+from benchmarks.fake_omdb import FakeOMDBServer
+from benchmarks.load_test import percentile, run_benchmark, DEFAULT_MIX
+
+
+class TestFakeOMDB(unittest.TestCase):
+    """Tests for the local OMDB stand-in."""
+
+    def test_lookup_and_search(self):
+        """Test that title lookups and searches return OMDB-shaped data."""
+        with FakeOMDBServer() as omdb:
+            with urllib.request.urlopen(f'{omdb.url}?t=Sevilla') as response:
+                movie = json.loads(response.read())
+            with urllib.request.urlopen(
+                    f'{omdb.url}?s=Sevilla&page=10') as response:
+                search = json.loads(response.read())
+
+        self.assertEqual(movie['Title'], 'Sevilla')
+        self.assertEqual(movie['imdbID'], FakeOMDBServer.imdb_id_for('Sevilla'))
+        self.assertEqual(len(search['Search']), 10)
+        self.assertEqual(search['totalResults'], '100')
+
+    def test_error_injection(self):
+        """Test that the configured error rate is answered with HTTP 503."""
+        with FakeOMDBServer(error_rate=1.0) as omdb:
+            with self.assertRaises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f'{omdb.url}?t=Sevilla')
+
+        self.assertEqual(error.exception.code, 503)
+
+
+class TestLoadTest(unittest.TestCase):
+    """Smoke test for the benchmark harness."""
+
+    def test_percentile_nearest_rank(self):
+        """Test that percentiles pick the nearest-rank sample."""
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile(values, 1.0), 100)
+        self.assertEqual(percentile([7], 0.0), 7)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_run_benchmark_report(self):
+        """Test that a small benchmark run produces a complete report."""
+        report = run_benchmark(movies=200, requests=60, concurrency=4,
+                               warmup=5)
+
+        self.assertEqual(report['total']['count'], 60)
+        self.assertEqual(report['total']['errors'], 0)
+        self.assertGreater(report['total']['throughput_rps'], 0)
+        self.assertEqual(set(report['operations']), set(DEFAULT_MIX))
+        for key in ['p50_ms', 'p95_ms', 'p99_ms']:
+            self.assertIn(key, report['total'])
+
+    @patch('benchmarks.load_test.FakeOMDBServer',
+           side_effect=OSError('Address in use'))
+    def test_failed_setup_restores_settings(self, mock_omdb):
+        """Test that a run failing before the load restores what it set."""
+        import database.database as database
+        import services.jwt_service as jwt_service
+
+        url, secret_key = database.DATABASE_URL, jwt_service.SECRET_KEY
+        api_key = os.environ.get('OMDB_API_KEY')
+        with self.assertRaises(OSError):
+            run_benchmark(movies=10, requests=1, warmup=0)
+
+        self.assertEqual(database.DATABASE_URL, url)
+        self.assertEqual(jwt_service.SECRET_KEY, secret_key)
+        self.assertEqual(os.environ.get('OMDB_API_KEY'), api_key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import threading
+import http.client
+from http.server import HTTPServer
+
+from api.api_server import MovieRequestHandler, route_label
+from services.metrics_service import MetricsRegistry, HTTP_REQUESTS
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Tests for the metric primitives and text rendering."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_render(self):
+        """Test that labelled counters are rendered with their values."""
+        counter = self.registry.counter('hits_total', 'Hits.', ('route',))
+        counter.labels('/movies').inc()
+        counter.labels('/movies').inc(2)
+
+        output = self.registry.render()
+
+        self.assertIn('# TYPE hits_total counter', output)
+        self.assertIn('hits_total{route="/movies"} 3', output)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets, sum and count are consistent."""
+        histogram = self.registry.histogram(
+            'latency_seconds', 'Latency.', buckets=(0.1, 1.0)
+        )
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        output = self.registry.render()
+
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', output)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2', output)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', output)
+        self.assertIn('latency_seconds_count 3', output)
+
+    def test_concurrent_increments(self):
+        """Test that increments from many threads are not lost."""
+        counter = self.registry.counter('ops_total', 'Ops.')
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.labels().value, 8000)
+
+    def test_duplicate_metric_rejected(self):
+        """Test that registering the same metric name twice fails."""
+        self.registry.counter('dup_total', 'Dup.')
+        with self.assertRaises(ValueError):
+            self.registry.counter('dup_total', 'Dup.')
+
+    def test_route_label(self):
+        """Test that request paths map to bounded route templates."""
+        self.assertEqual(route_label('/movies?limit=5'), '/movies')
+        self.assertEqual(route_label('/movies/42'), '/movies/{movie_id}')
+        self.assertEqual(route_label('/login'), '/login')
+        self.assertEqual(route_label('/unknown/a/b'), 'other')
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """Tests for the GET /metrics endpoint."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('localhost', 0), MovieRequestHandler)
+        cls.port = cls.server.server_address[1]
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.thread.join()
+        cls.server.server_close()
+
+    def test_metrics_endpoint(self):
+        """Test that served requests show up on the /metrics endpoint."""
+        conn = http.client.HTTPConnection('localhost', self.port)
+        conn.request('GET', '/does-not-exist')
+        conn.getresponse().read()
+
+        conn = http.client.HTTPConnection('localhost', self.port)
+        conn.request('GET', '/metrics')
+        response = conn.getresponse()
+        body = response.read().decode('utf-8')
+
+        self.assertEqual(response.status, 200)
+        self.assertIn('http_requests_total{method="GET",route="other",'
+                      'status="404"}', body)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertGreaterEqual(
+            HTTP_REQUESTS.labels('GET', 'other', '404').value, 1
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,11 @@
 import unittest
 from unittest.mock import patch
 
-from api.movie_api import MovieAPI
-from database.models import Movie
+from api.movie_api import MovieAPI, BATCH_LOOKUP_MAX
+from database.models import Movie, MOVIE_COLUMNS, movie_row_to_dict
 from database.database import DatabaseSession
 from services.omdb_service import OMDBService
+from services.cache_service import MOVIE_CACHE
 
 
 class TestAddMovieAPI(unittest.TestCase):
@@ -149,5 +150,122 @@ class TestRemoveMovieAPI(unittest.TestCase):
         self.assertEqual(response["error"], "Movie not found")
 
 
+class TestMovieSerialization(unittest.TestCase):
+    """Tests for the ORM and column-tuple serialization paths."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db_session = DatabaseSession()
+        cls.session = cls.db_session.get_session()
+        cls.movie = Movie(title='Serialized', year='2001',
+                          movie_type='movie', imdb_id='tt9990001',
+                          poster='N/A')
+        cls.db_session.add_element(cls.session, cls.movie)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.query(Movie).delete()
+        cls.session.commit()
+        cls.db_session.close(cls.session)
+
+    def test_row_and_orm_dicts_match(self):
+        """Test that tuple rows serialize exactly like ORM objects."""
+        row = (
+            self.session.query(*MOVIE_COLUMNS)
+            .filter(Movie.id == self.movie.id)
+            .one()
+        )
+        self.assertEqual(movie_row_to_dict(row), self.movie.to_dict())
+        self.assertEqual(
+            list(self.movie.to_dict()),
+            [column.name for column in Movie.__table__.columns]
+        )
+
+    def test_get_movies_uses_row_dicts(self):
+        """Test that listed movies carry every movie column."""
+        response, status_code = MovieAPI.get_movies(
+            filters={'imdb_id': 'tt9990001'}
+        )
+        self.assertEqual(status_code, 200)
+        self.assertEqual(
+            response['data']['movies'], [self.movie.to_dict()]
+        )
+
+
+class TestGetMoviesBatchAPI(unittest.TestCase):
+    """Tests for the batch movie lookup."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db_session = DatabaseSession()
+        cls.session = cls.db_session.get_session()
+        cls.movies = [
+            Movie(title=f'Batch {i}', year='2001', movie_type='movie',
+                  imdb_id=f'tt666000{i}', poster='N/A')
+            for i in range(3)
+        ]
+        cls.db_session.bulk_save(cls.session, cls.movies)
+        cls.ids = [
+            movie_id for movie_id, in cls.session.query(Movie.id)
+            .filter(Movie.title.like('Batch %')).order_by(Movie.title)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.query(Movie).delete()
+        cls.session.commit()
+        cls.db_session.close(cls.session)
+
+    def setUp(self):
+        MOVIE_CACHE.clear()
+
+    def test_batch_by_ids_keeps_request_order(self):
+        """Test that results follow the request order with explicit misses."""
+        requested = [self.ids[2], 999999, self.ids[0]]
+
+        response, status_code = MovieAPI.get_movies_batch(ids=requested)
+
+        self.assertEqual(status_code, 200)
+        movies = response['data']['movies']
+        self.assertEqual(movies[0]['title'], 'Batch 2')
+        self.assertIsNone(movies[1])
+        self.assertEqual(movies[2]['title'], 'Batch 0')
+        self.assertEqual(response['data']['missing'], [999999])
+
+    def test_batch_by_imdb_ids(self):
+        """Test looking movies up by IMDb ID."""
+        response, status_code = MovieAPI.get_movies_batch(
+            imdb_ids=['tt6660001', 'tt0000000']
+        )
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(response['data']['movies'][0]['title'], 'Batch 1')
+        self.assertEqual(response['data']['missing'], ['tt0000000'])
+
+    def test_batch_uses_movie_cache(self):
+        """Test that cached movies are not queried again."""
+        cached = {'id': self.ids[0], 'title': 'Cached'}
+        MOVIE_CACHE.set(self.ids[0], cached)
+
+        response, _ = MovieAPI.get_movies_batch(ids=[self.ids[0], self.ids[1]])
+
+        self.assertEqual(response['data']['movies'][0], cached)
+        self.assertEqual(response['data']['movies'][1]['title'], 'Batch 1')
+
+    def test_batch_validation(self):
+        """Test that invalid batch requests are rejected with 400."""
+        cases = [
+            {},
+            {'ids': [1], 'imdb_ids': ['tt1']},
+            {'ids': []},
+            {'ids': ['abc']},
+            {'ids': list(range(BATCH_LOOKUP_MAX + 1))}
+        ]
+        for kwargs in cases:
+            with self.subTest(kwargs=kwargs):
+                _, status_code = MovieAPI.get_movies_batch(**kwargs)
+                self.assertEqual(status_code, 400)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,238 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import sqlalchemy.exc
+from sqlalchemy import create_engine
+
+import database.database as database
+from api.movie_api import MovieAPI
+from database.database import DatabaseSession
+from database.models import Base, Movie
+from database.replica import (
+    ReadOnlyReplica, SnapshotReplica, read_only_url, sqlite_path
+)
+from services.cache_service import MOVIE_CACHE
+
+
+class ReplicaTestCase(unittest.TestCase):
+    """Base class with a primary SQLite file holding one movie."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, 'primary.db')
+        self.url = f'sqlite:///{path}'
+        self.engine = create_engine(self.url)
+        Base.metadata.create_all(self.engine)
+        self.insert('First', 'tt3330001')
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def insert(self, title, imdb_id):
+        with self.engine.begin() as conn:
+            conn.execute(Movie.__table__.insert(),
+                         {'title': title, 'imdb_id': imdb_id})
+
+    @staticmethod
+    def titles(Session):
+        session = Session()
+        try:
+            return sorted(title for title, in session.query(Movie.title))
+        finally:
+            session.close()
+
+
+class TestReadOnlyReplica(ReplicaTestCase):
+    """Tests for the read-only connection pool."""
+
+    def test_urls(self):
+        """Test that SQLite file URLs are turned into read-only URIs."""
+        self.assertEqual(sqlite_path('sqlite:////tmp/a.db'), '/tmp/a.db')
+        self.assertIsNone(sqlite_path('sqlite://'))
+        self.assertIsNone(sqlite_path('postgresql://db/movies'))
+        self.assertEqual(read_only_url('sqlite:////tmp/a.db'),
+                         'sqlite:///file:/tmp/a.db?mode=ro&uri=true')
+
+    def test_reads_see_commits_and_refuse_writes(self):
+        """Test that the pool sees new commits and cannot write."""
+        replica = ReadOnlyReplica(self.url)
+        self.addCleanup(replica.close)
+        Session = replica.sessionmaker()
+
+        self.insert('Second', 'tt3330002')
+        self.assertEqual(self.titles(Session), ['First', 'Second'])
+
+        session = Session()
+        session.add(Movie(title='Refused'))
+        with self.assertRaises(sqlalchemy.exc.OperationalError):
+            session.commit()
+        session.close()
+
+
+class TestSnapshotReplica(ReplicaTestCase):
+    """Tests for the periodically refreshed snapshot."""
+
+    def replica(self, **kwargs):
+        replica = SnapshotReplica(self.url, refresh_interval=3600,
+                                  directory=self.directory.name, **kwargs)
+        self.addCleanup(replica.close)
+        return replica
+
+    def test_refresh_swaps_in_new_copy(self):
+        """Test that new commits are visible after the next refresh."""
+        refreshed = []
+        replica = self.replica(on_refresh=lambda: refreshed.append(1))
+        self.insert('Second', 'tt3330002')
+
+        self.assertEqual(self.titles(replica.sessionmaker()), ['First'])
+        replica.refresh()
+        self.assertEqual(self.titles(replica.sessionmaker()),
+                         ['First', 'Second'])
+        self.assertEqual(len(refreshed), 2)
+
+    def test_unchanged_primary_is_not_copied(self):
+        """Test that a refresh without new commits keeps the copy."""
+        replica = self.replica()
+        snapshot = replica._current
+
+        replica.refresh()
+
+        self.assertIs(replica._current, snapshot)
+        self.assertLess(replica.age(), 1)
+        copies = [name for name in os.listdir(self.directory.name)
+                  if name.startswith('replica-')]
+        self.assertEqual(len(copies), 1)
+
+    def test_retired_copy_outlives_its_sessions(self):
+        """Test that a refresh never deletes a copy still being read."""
+        replica = self.replica()
+        Session = replica.sessionmaker()
+        session = Session()
+        self.assertEqual(session.query(Movie).count(), 1)
+
+        self.insert('Second', 'tt3330002')
+        replica.refresh()
+        # The factory taken before the refresh opens the new copy, while the
+        # open session keeps reading the copy it started on.
+        self.assertEqual(self.titles(Session), ['First', 'Second'])
+        self.assertEqual(session.query(Movie).count(), 1)
+        self.assertEqual(self.copies(), 2)
+
+        session.close()
+        self.assertEqual(self.copies(), 1)
+
+    def test_reads_do_not_wait_for_refresh(self):
+        """Test that sessions open on the old copy while a new one is taken."""
+        replica = self.replica()
+        Session = replica.sessionmaker()
+        copying = threading.Event()
+        release = threading.Event()
+
+        class SlowSource:
+            def __init__(self, source):
+                self.source = source
+
+            def execute(self, sql):
+                return self.source.execute(sql)
+
+            def backup(self, target):
+                copying.set()
+                release.wait(5)
+                self.source.backup(target)
+
+            def close(self):
+                self.source.close()
+
+        replica.source = SlowSource(replica.source)
+        self.insert('Second', 'tt3330002')
+        refresh = threading.Thread(target=replica.refresh)
+        refresh.start()
+        try:
+            self.assertTrue(copying.wait(5))
+            self.assertEqual(self.titles(Session), ['First'])
+        finally:
+            release.set()
+            refresh.join()
+        self.assertEqual(self.titles(Session), ['First', 'Second'])
+
+    def copies(self):
+        return len([name for name in os.listdir(self.directory.name)
+                    if name.startswith('replica-')])
+
+    def test_stale_copy_is_not_used(self):
+        """Test that a copy older than the staleness bound is refused."""
+        replica = self.replica(max_staleness=0.5)
+        with patch('database.replica.time.monotonic',
+                   return_value=replica._current.checked_at + 1):
+            self.assertIsNone(replica.sessionmaker())
+
+
+class TestReadRouting(ReplicaTestCase):
+    """Tests for routing read-only DatabaseSessions to the replica."""
+
+    def setUp(self):
+        super().setUp()
+        for name, value in [('DATABASE_URL', self.url),
+                            ('DATABASE_READ_MODE', database.READ_SNAPSHOT),
+                            ('READ_REFRESH_INTERVAL', 3600)]:
+            patcher = patch.object(database, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_replicas)
+
+    def test_reads_use_replica_and_writes_use_primary(self):
+        """Test that only read-only sessions read from the snapshot."""
+        with DatabaseSession(read_only=True) as session:
+            self.assertEqual(session.query(Movie).count(), 1)
+
+        db_session = DatabaseSession()
+        session = db_session.get_session()
+        db_session.add_element(session, Movie(title='Second'))
+        db_session.close(session)
+
+        with DatabaseSession(read_only=True) as session:
+            self.assertEqual(session.query(Movie).count(), 1)
+        with DatabaseSession() as session:
+            self.assertEqual(session.query(Movie).count(), 2)
+
+        DatabaseSession().replica().refresh()
+        with DatabaseSession(read_only=True) as session:
+            self.assertEqual(session.query(Movie).count(), 2)
+
+    def test_refresh_drops_cached_movies(self):
+        """Test that a movie cached from an old copy is dropped on refresh."""
+        MOVIE_CACHE.clear()
+        self.addCleanup(MOVIE_CACHE.clear)
+        replica = DatabaseSession().replica()
+        with self.engine.begin() as conn:
+            conn.execute(Movie.__table__.delete())
+        MOVIE_CACHE.invalidate(1)
+
+        # The copy still holds the deleted movie, which is cached again.
+        self.assertEqual(MovieAPI.get_movie_by_id(1)[1], 200)
+        replica.refresh()
+        self.assertEqual(MovieAPI.get_movie_by_id(1)[1], 404)
+
+    def test_pool_reload_replaces_replica_engine(self):
+        """Test that reloading the pools reopens the snapshot copy."""
+        replica = DatabaseSession().replica()
+        engine = replica._current.engine
+        database.reload_engines()
+
+        self.assertIsNot(replica._current.engine, engine)
+        with DatabaseSession(read_only=True) as session:
+            self.assertEqual(session.query(Movie).count(), 1)
+
+    def test_invalid_read_mode(self):
+        """Test that an unknown read mode is reported."""
+        with patch.object(database, 'DATABASE_READ_MODE', 'replica'):
+            with self.assertRaises(ValueError):
+                DatabaseSession(read_only=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
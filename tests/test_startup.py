@@ -0,0 +1,34 @@
+import unittest
+
+from benchmarks.startup import STARTUP_BUDGET_MS, parse_importtime, run
+
+
+class TestStartup(unittest.TestCase):
+    """Regression checks for the import time of the server process."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.report = run(runs=3)
+
+    def test_parse_importtime(self):
+        """Test that import time lines are parsed and the header skipped."""
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   _json\n'
+            'import time:       300 |        420 | json\n'
+        )
+        self.assertEqual(parse_importtime(output),
+                         {'_json': (120, 120), 'json': (300, 420)})
+
+    def test_deferred_modules_are_not_imported(self):
+        """Test that route-specific dependencies stay off the startup path."""
+        self.assertEqual(self.report['deferred_loaded'], [])
+
+    def test_startup_within_budget(self):
+        """Test that the server module imports within the startup budget."""
+        self.assertLessEqual(self.report['best_ms'], STARTUP_BUDGET_MS,
+                             self.report['slowest'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+import threading
+import http.client
+from http.server import HTTPServer
+from unittest.mock import patch
+
+from api.api_server import MovieRequestHandler
+from services import trace_service
+
+
+class TestRequestTracing(unittest.TestCase):
+    """Tests for opt-in request traces and slow request logging."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('localhost', 0), MovieRequestHandler)
+        cls.port = cls.server.server_address[1]
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.thread.join()
+        cls.server.server_close()
+
+    def request(self, path, headers=None):
+        conn = http.client.HTTPConnection('localhost', self.port)
+        conn.request('GET', path, headers=headers or {})
+        response = conn.getresponse()
+        response.read()
+        return response
+
+    def wait_for_server(self):
+        """
+        Wait until the previous request is fully handled.
+
+        Traces are finished after the response is sent; the single-threaded
+        server only answers this request once that is done.
+        """
+        self.request('/healthz')
+
+    def setUp(self):
+        self.wait_for_server()
+
+    def test_untraced_request_has_no_trace_id(self):
+        """Test that requests are not traced unless asked or sampled."""
+        response = self.request('/movies')
+        self.assertIsNone(response.getheader('X-Trace-Id'))
+
+    @patch.object(trace_service, 'SLOW_REQUEST_MS', 0)
+    def test_traced_slow_request_logs_spans(self):
+        """Test that a traced slow request is logged with its spans."""
+        with self.assertLogs('services.trace_service', 'WARNING') as logs:
+            response = self.request('/movies', {'X-Trace': '1'})
+            self.wait_for_server()
+
+        self.assertIsNotNone(response.getheader('X-Trace-Id'))
+        output = '\n'.join(logs.output)
+        self.assertIn(response.getheader('X-Trace-Id'), output)
+        for name in ['parse_request', 'routing', 'api.get_movies',
+                     'session.checkout', 'sql', 'serialize']:
+            self.assertIn(name, output)
+
+    @patch.object(trace_service, 'SLOW_REQUEST_MS', 0)
+    def test_untraced_slow_request_logs_total(self):
+        """Test that untraced slow requests are still logged."""
+        with self.assertLogs('services.trace_service', 'WARNING') as logs:
+            self.request('/does-not-exist')
+            self.wait_for_server()
+
+        self.assertIn('not traced', '\n'.join(logs.output))
+
+    def test_sampled_request_dumps_profile(self):
+        """Test that sampled requests write cProfile output to disk."""
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(trace_service, 'TRACE_PROFILE_DIR', directory):
+            with patch.object(trace_service, 'TRACE_SAMPLE_RATE', 1.0):
+                self.request('/movies')
+            self.wait_for_server()
+            profiles = os.listdir(directory)
+
+        self.assertEqual(len(profiles), 1)
+        self.assertTrue(profiles[0].endswith('.prof'))
+
+    def test_header_traced_request_is_not_profiled(self):
+        """Test that clients cannot turn on profiling with the header."""
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(trace_service, 'TRACE_PROFILE_DIR', directory):
+            response = self.request('/movies', {'X-Trace': '1'})
+            self.wait_for_server()
+            profiles = os.listdir(directory)
+
+        self.assertIsNotNone(response.getheader('X-Trace-Id'))
+        self.assertEqual(profiles, [])
+
+
+if __name__ == '__main__':
+    unittest.main()